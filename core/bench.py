@@ -0,0 +1,378 @@
+# core/bench.py
+"""
+Офлайн-бенчмарк клиентов бирж и Monitor на локальном сервере-заглушке:
+
+    python -m core.bench --rounds 30 --ticks 200 --latency 0.02 --error-rate 0.02 --out bench.json
+
+Клиенты ходят на свои настоящие URL, но транспорт переадресует запросы
+на 127.0.0.1, где MockExchangeServer отвечает в формате API каждой биржи
+(ответы собирает ReplayTransport из core/replay.py по синтетической
+ленте цен) с заданными задержкой, долей ошибок и зависаний.
+Результат пишется в JSON, чтобы сравнивать прогоны между версиями.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import platform
+import random
+import sys
+import time
+from collections import Counter
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Type
+
+import httpx
+
+from core.exchange.base import BaseClient
+from core.exchange.binance import BinanceClient
+from core.exchange.bitget import BitgetClient
+from core.exchange.bybit import BybitClient
+from core.exchange.gate import GateClient
+from core.exchange.hyperliquid import HyperliquidClient
+from core.exchange.mexc import MexcClient
+from core.exchange.okx import OkxClient
+from core.exchange.transport import HTTP2_AVAILABLE, HostLimiters, TransportPolicy, create_http_client
+from core.monitor import Monitor
+from core.recorder import Tick
+from core.replay import ReplayTransport, TickTape
+
+logger = logging.getLogger(__name__)
+
+CLIENTS: Dict[str, Type[BaseClient]] = {
+    "binance": BinanceClient,
+    "okx": OkxClient,
+    "gate": GateClient,
+    "bitget": BitgetClient,
+    "mexc": MexcClient,
+    "bybit": BybitClient,
+    "hyperliquid": HyperliquidClient,
+}
+
+# Формат фьючерсного символа каждой биржи
+PERP_SYMBOLS: Dict[str, str] = {
+    "binance": "{}USDT",
+    "okx": "{}-USDT-SWAP",
+    "gate": "{}_USDT",
+    "bitget": "{}USDT_UMCBL",
+    "mexc": "{}_USDT",
+    "bybit": "{}USDT",
+    "hyperliquid": "{}",
+}
+
+
+@dataclass
+class MockConfig:
+    """Поведение сервера-заглушки."""
+
+    # Задержка ответа: latency ± jitter секунд
+    latency: float = 0.02
+    jitter: float = 0.01
+    # Доля ответов с HTTP error_status
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Доля запросов, на которые сервер не отвечает hang секунд
+    timeout_rate: float = 0.0
+    hang: float = 30.0
+
+
+def synthetic_tape(tokens: Sequence[str], seconds: int = 3600, seed: int = 1) -> TickTape:
+    """Лента со случайным блужданием цены каждого токена на всех биржах, тик в секунду."""
+    rng = random.Random(seed)
+    ticks: List[Tick] = []
+    for token in tokens:
+        price = rng.uniform(1.0, 1000.0)
+        for second in range(seconds):
+            price *= 1 + rng.gauss(0, 0.0005)
+            for exchange, fmt in PERP_SYMBOLS.items():
+                ticks.append(Tick(float(second), exchange, "perp", fmt.format(token), price))
+    return TickTape(ticks, speed=None)
+
+
+class MockExchangeServer:
+    """
+    Минимальный HTTP/1.1-сервер с keep-alive на 127.0.0.1. Биржа
+    определяется по заголовку Host, который остаётся от исходного URL
+    клиента, а тело ответа строит ReplayTransport.
+    """
+
+    def __init__(self, tape: TickTape, config: MockConfig, seed: int = 1):
+        self.replay = ReplayTransport(tape)
+        self.config = config
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+        self.requests: Counter = Counter()
+        self.injected_errors = 0
+        self.injected_hangs = 0
+
+    @property
+    def total_requests(self) -> int:
+        return sum(self.requests.values())
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, _ = lines[0].split(" ", 2)
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        name, _, value = line.partition(":")
+                        headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length") or 0))
+                request = httpx.Request(method, f"https://{headers.get('host', '')}{target}", content=body)
+                status, payload = await self._respond(request)
+                if status is None:
+                    # Зависание: соединение не отвечает, клиент уходит по таймауту
+                    await asyncio.sleep(self.config.hang)
+                    return
+                writer.write(
+                    f"HTTP/1.1 {status} X\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n\r\n".encode("latin-1") + payload
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request: httpx.Request):
+        self.requests[request.url.host] += 1
+        config = self.config
+        await asyncio.sleep(max(0.0, config.latency + self._rng.uniform(-config.jitter, config.jitter)))
+        roll = self._rng.random()
+        if roll < config.timeout_rate:
+            self.injected_hangs += 1
+            return None, b""
+        if roll < config.timeout_rate + config.error_rate:
+            self.injected_errors += 1
+            return config.error_status, b'{"msg": "injected error"}'
+        response = await self.replay.handle_async_request(request)
+        return response.status_code, response.content
+
+
+class LocalRedirectTransport(httpx.AsyncHTTPTransport):
+    """Переадресует все запросы на локальный порт, сохраняя исходный Host."""
+
+    def __init__(self, port: int, **kwargs):
+        super().__init__(**kwargs)
+        self.port = port
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(scheme="http", host="127.0.0.1", port=self.port)
+        return await super().handle_async_request(request)
+
+
+def percentile(values: Sequence[float], q: float) -> Optional[float]:
+    """Перцентиль методом ближайшего ранга (None для пустой выборки)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100.0 * len(ordered)) - 1)]
+
+
+def summarize(values: Sequence[float], scale: float = 1000.0) -> Dict[str, Optional[float]]:
+    """n, p50, p99, среднее и максимум; время — в миллисекундах."""
+    def scaled(v: Optional[float]) -> Optional[float]:
+        return None if v is None else round(v * scale, 3)
+
+    return {
+        "n": len(values),
+        "p50": scaled(percentile(values, 50)),
+        "p99": scaled(percentile(values, 99)),
+        "mean": scaled(sum(values) / len(values) if values else None),
+        "max": scaled(max(values) if values else None),
+    }
+
+
+def build_clients(
+    http_client: httpx.AsyncClient,
+    policy: TransportPolicy,
+    exchanges: Sequence[str],
+    limiters: Optional[HostLimiters] = None,
+) -> List[BaseClient]:
+    return [CLIENTS[name](http_client, policy, limiters) for name in exchanges]
+
+
+async def run_benchmark(
+    tokens: Sequence[str],
+    exchanges: Sequence[str],
+    rounds: int,
+    ticks: int,
+    mock: MockConfig,
+    policy: TransportPolicy,
+    seed: int = 1,
+) -> dict:
+    server = MockExchangeServer(synthetic_tape(tokens, seed=seed), mock, seed=seed)
+    await server.start()
+    transport = LocalRedirectTransport(
+        server.port,
+        limits=httpx.Limits(
+            max_connections=policy.max_connections,
+            max_keepalive_connections=policy.max_keepalive_connections,
+            keepalive_expiry=policy.keepalive_expiry,
+        ),
+    )
+    http_client = create_http_client(policy, transport)
+    # Свой пул ограничителей на прогон: общий пул приложения не трогается
+    limiters = HostLimiters() if policy.rate_limits else None
+    first_price: List[float] = []
+    query_total: List[float] = []
+    query_requests: List[float] = []
+    not_found: Counter = Counter()
+    tick_times: List[float] = []
+    tick_requests: List[float] = []
+    tick_misses = 0
+    try:
+        # Поиск: на каждый раунд новые клиенты, как при новом запуске мониторинга
+        # (запомненные форматы кандидатов при этом общие, как в приложении)
+        known: Dict[str, str] = {}
+        for _ in range(rounds):
+            for token in tokens:
+                mon = Monitor(clients=build_clients(http_client, policy, exchanges, limiters))
+                before = server.total_requests
+                started = time.perf_counter()
+                first: Optional[float] = None
+                found = set()
+                async for name, result, _ in mon.iter_query(token, "perp"):
+                    if result:
+                        found.add(name)
+                        if first is None:
+                            first = time.perf_counter() - started
+                        if token == tokens[0]:
+                            known[name] = result[0]
+                query_total.append(time.perf_counter() - started)
+                query_requests.append(server.total_requests - before)
+                if first is not None:
+                    first_price.append(first)
+                for name in set(exchanges) - found:
+                    not_found[name] += 1
+
+        # Тики: цены известных символов первого токена, как в основном цикле окна
+        mon = Monitor(
+            clients=build_clients(http_client, policy, exchanges, limiters),
+            tick_deadline=policy.tick_deadline,
+        )
+        for _ in range(ticks):
+            before = server.total_requests
+            started = time.perf_counter()
+            prices, _ = await mon.fetch_prices_for_known_symbols(known, "perp")
+            tick_times.append(time.perf_counter() - started)
+            tick_requests.append(server.total_requests - before)
+            tick_misses += len(set(known) - set(prices))
+        mon.cancel_pending()
+    finally:
+        await http_client.aclose()
+        await server.stop()
+
+    return {
+        "config": {
+            "tokens": list(tokens),
+            "exchanges": list(exchanges),
+            "rounds": rounds,
+            "ticks": ticks,
+            "seed": seed,
+            "mock": asdict(mock),
+            "policy": asdict(policy),
+        },
+        "environment": {
+            "python": platform.python_version(),
+            "httpx": httpx.__version__,
+            "http2_available": HTTP2_AVAILABLE,
+            "platform": platform.platform(),
+        },
+        "results": {
+            "query_first_price_ms": summarize(first_price),
+            "query_total_ms": summarize(query_total),
+            "query_requests": summarize(query_requests, scale=1.0),
+            "query_not_found": dict(not_found),
+            "tick_ms": summarize(tick_times),
+            "tick_requests": summarize(tick_requests, scale=1.0),
+            "tick_missing_prices": tick_misses,
+            "server_requests": dict(server.requests),
+            "injected_errors": server.injected_errors,
+            "injected_hangs": server.injected_hangs,
+        },
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк клиентов бирж и Monitor")
+    parser.add_argument("--tokens", default="BTC,ETH,SOL", help="тикеры через запятую")
+    parser.add_argument("--exchanges", default=",".join(CLIENTS), help="биржи через запятую")
+    parser.add_argument("--rounds", type=int, default=20, help="раундов поиска на токен")
+    parser.add_argument("--ticks", type=int, default=100, help="тиков обновления цен")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа, с")
+    parser.add_argument("--jitter", type=float, default=0.01, help="разброс задержки, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов с ошибкой")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="доля зависших запросов")
+    parser.add_argument("--read-timeout", type=float, default=2.0, help="таймаут чтения клиентов, с")
+    parser.add_argument("--tick-deadline", type=float, default=3.0)
+    parser.add_argument(
+        "--rate-limits", action="store_true",
+        help="включить ограничители темпа бирж (по умолчанию выключены: сервер локальный)",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", type=Path, default=Path("bench.json"), help="файл результатов (JSON)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="логи клиентов")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.CRITICAL,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+    )
+    exchanges = [e.strip() for e in args.exchanges.split(",") if e.strip()]
+    unknown = [e for e in exchanges if e not in CLIENTS]
+    if unknown:
+        sys.exit(f"Неизвестные биржи: {', '.join(unknown)}")
+    tokens = [t.strip().upper() for t in args.tokens.split(",") if t.strip()]
+    mock = MockConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        timeout_rate=args.timeout_rate,
+        hang=args.read_timeout * 2,
+    )
+    policy = TransportPolicy(
+        read_timeout=args.read_timeout,
+        tick_deadline=args.tick_deadline,
+        rate_limits=args.rate_limits,
+    )
+    report = asyncio.run(
+        run_benchmark(tokens, exchanges, args.rounds, args.ticks, mock, policy, seed=args.seed)
+    )
+    args.out.write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    results = report["results"]
+    for name in ("query_first_price_ms", "query_total_ms", "tick_ms"):
+        stats = results[name]
+        print(f"{name:22} n={stats['n']:<5} p50={stats['p50']} p99={stats['p99']} max={stats['max']}")
+    print(
+        f"{'query_requests':22} mean={results['query_requests']['mean']}  "
+        f"tick_requests mean={results['tick_requests']['mean']}  "
+        f"не найдено: {results['query_not_found'] or '-'}"
+    )
+    print(f"Результаты записаны в {args.out}")
+
+
+if __name__ == "__main__":
+    main()
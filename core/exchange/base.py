@@ -1,26 +1,88 @@
 import asyncio
 import logging
-from typing import Optional, Tuple, Any
+import time
+from typing import (
+    Any, Awaitable, Callable, ClassVar, Collection, Dict, Iterable, List, Literal,
+    NamedTuple, Optional, Set, Tuple,
+)
 import httpx
 
+from core.exchange.metrics import MetricsRegistry, RequestTrace
+from core.exchange.transport import (
+    PRIORITY_BACKGROUND,
+    THROTTLE_STATUSES,
+    CircuitBreaker,
+    HostLimiters,
+    RateLimiter,
+    RetryBudget,
+    TransportPolicy,
+    current_priority,
+    shared_limiters,
+)
+
 logger = logging.getLogger(__name__)
 
+MarketType = Literal["spot", "perp"]
+
+
+class BookTicker(NamedTuple):
+    """Лучшие цены стакана: по bid можно продать, по ask — купить."""
+
+    bid: float
+    ask: float
+
+    @property
+    def mid(self) -> float:
+        return (self.bid + self.ask) / 2
+
+    @property
+    def spread_bps(self) -> float:
+        """Ширина спреда в базисных пунктах от середины."""
+        mid = self.mid
+        return (self.ask - self.bid) / mid * 10_000 if mid > 0 else 0.0
+
 
 class BaseClient:
     """
     Базовый класс для клиента биржи с механизмом повторов.
     Предоставляет универсальный `_request(...)` без вложенных функций.
+    Таймауты, число попыток и паузы между ними задаёт `TransportPolicy`.
     """
 
     name: str = "base"
-    MAX_RETRIES: int = 3
+    # Дешёвые эндпоинты для прогрева соединений со всеми хостами биржи
+    WARMUP_URLS: Tuple[str, ...] = ()
+    # Какой по счёту кандидат символа сработал в последний раз:
+    # {(биржа, рынок): индекс}. Общий для всех экземпляров клиента биржи
+    _candidate_hits: ClassVar[Dict[Tuple[str, str], int]] = {}
+    # Метрики запросов всех бирж; переживают пересоздание клиентов между сессиями
+    metrics: ClassVar[MetricsRegistry] = MetricsRegistry()
 
-    def __init__(self, http_client: httpx.AsyncClient):
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
         if not isinstance(http_client, httpx.AsyncClient):
             raise TypeError(
                 "http_client должен быть экземпляром httpx.AsyncClient"
             )
         self.http_client = http_client
+        self.policy = policy or TransportPolicy()
+        # Пул ограничителей темпа: свой, общий для приложения или никакого
+        if limiters is None and self.policy.rate_limits:
+            limiters = shared_limiters
+        self.limiters = limiters
+        self.retry_budget = RetryBudget()
+        self.breaker = CircuitBreaker(
+            self.policy.breaker_threshold, self.policy.breaker_cooldown
+        )
+
+    def _limiter(self, url: str) -> Optional[RateLimiter]:
+        if self.limiters is None:
+            return None
+        return self.limiters.get(url)
 
     @staticmethod
     def get_supported_exchanges() -> list[str]:
@@ -35,47 +97,126 @@ class BaseClient:
             "bitget",
         ]
 
+    async def warm_up(self) -> None:
+        """
+        Открывает соединения с хостами биржи заранее, чтобы первый поиск
+        попал в уже установленные TCP/TLS-сессии. Ошибки игнорируются,
+        автомат защиты не затрагивается.
+        """
+        for url in self.WARMUP_URLS:
+            limiter = self._limiter(url)
+            if limiter:
+                await limiter.acquire(PRIORITY_BACKGROUND)
+            try:
+                resp = await self.http_client.get(url, timeout=self.policy.timeout())
+            except httpx.HTTPError as e:
+                logger.debug("[%s] Прогрев %s не удался: %s", self.name, url, e)
+                continue
+            # Заголовки лимитов прогрева тоже учитываются
+            if limiter:
+                limiter.observe(resp.status_code, resp.headers)
+
     async def _request(
         self,
         method: str,
         url: str,
         *,
         request_name: str,
+        category: str,
         params: Optional[dict] = None,
         json: Optional[Any] = None,
         timeout: Optional[float] = None,
+        weight: float = 1.0,
     ) -> Optional[httpx.Response]:
         """
         Выполняет HTTP-запрос с повторами. Возвращает ответ или None.
         Сетевые ошибки логируются. Статус-коды не поднимаются исключением.
+        Повторы идут с jitter-паузой и только пока не исчерпан бюджет биржи.
+        При разомкнутом автомате защиты запрос не отправляется вовсе.
+        Каждая попытка учитывается в `metrics` под категорией `category`
+        (рынок и вид запроса, например "perp all prices") и проходит через
+        ограничитель темпа хоста с приоритетом из `request_priority`;
+        `weight` — вес эндпоинта в единицах лимита биржи.
         """
-        for attempt in range(self.MAX_RETRIES):
+        if not self.breaker.allow():
+            logger.debug(
+                "[%s] Цепь разомкнута, '%s' пропущен.", self.name, request_name
+            )
+            self.metrics.skip(self.name, category)
+            return None
+        attempts = self.policy.attempts
+        limiter = self._limiter(url)
+        priority = current_priority()
+        self.retry_budget.on_request()
+        attempt = 0
+        while attempt < attempts:
+            if attempt:
+                if not self.retry_budget.try_spend():
+                    logger.warning(
+                        "[%s] Бюджет повторов исчерпан, '%s' не повторяется.",
+                        self.name,
+                        request_name,
+                    )
+                    break
+                await asyncio.sleep(self.policy.backoff(attempt))
+            if limiter:
+                waited = await limiter.acquire(priority, weight)
+                if waited:
+                    self.metrics.throttle(self.name, category, waited)
+            trace = RequestTrace()
+            started = time.perf_counter()
             try:
                 resp = await self.http_client.request(
                     method=method,
                     url=url,
                     params=params,
                     json=json,
-                    timeout=timeout or 10,
+                    timeout=self.policy.timeout(timeout),
+                    extensions={"trace": trace},
                 )
+                self.metrics.observe(
+                    self.name,
+                    category,
+                    attempt,
+                    time.perf_counter() - started,
+                    trace,
+                    status=resp.status_code,
+                    size=resp.num_bytes_downloaded,
+                )
+                if limiter:
+                    limiter.observe(resp.status_code, resp.headers)
+                # Превышение лимита или бан IP — не признак здоровья биржи:
+                # ограничитель ставит хост на паузу, автомат считает неудачу
+                if resp.status_code >= 500 or resp.status_code in THROTTLE_STATUSES:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
                 return resp
             except httpx.RequestError as e:
+                self.metrics.observe(
+                    self.name,
+                    category,
+                    attempt,
+                    time.perf_counter() - started,
+                    trace,
+                    error=type(e).__name__,
+                )
                 logger.error(
                     "[%s] Попытка %d/%d для '%s' провалена: %s",
                     self.name,
                     attempt + 1,
-                    self.MAX_RETRIES,
+                    attempts,
                     request_name,
                     e,
                 )
-                if attempt + 1 < self.MAX_RETRIES:
-                    await asyncio.sleep(1 + attempt)
+            attempt += 1
         logger.error(
             "[%s] Все %d попытки для '%s' провалены.",
             self.name,
-            self.MAX_RETRIES,
+            attempt,
             request_name,
         )
+        self.breaker.record_failure()
         return None
 
     async def get_futures_price(
@@ -110,4 +251,251 @@ class BaseClient:
 
     def get_spot_link(self, pair: str) -> str:
         """Возвращает веб-ссылку на страницу торгов спотовой парой."""
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        """
+        Запрашивает цены всех фьючерсов биржи одним запросом.
+        Возвращает словарь {символ: цена} или None при ошибке.
+        """
+        raise NotImplementedError
+
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        """
+        Запрашивает цены всех спотовых пар биржи одним запросом.
+        Возвращает словарь {пара: цена} или None при ошибке.
+        """
+        raise NotImplementedError
+
+    async def get_futures_markets(self) -> Optional[Set[str]]:
+        """
+        Список всех фьючерсных символов биржи для индекса рынков.
+        По умолчанию берётся из массового запроса цен.
+        """
+        prices = await self.get_all_futures_prices()
+        return set(prices) if prices is not None else None
+
+    async def get_spot_markets(self) -> Optional[Set[str]]:
+        """
+        Список всех спотовых пар биржи для индекса рынков.
+        По умолчанию берётся из массового запроса цен.
+        """
+        prices = await self.get_all_spot_prices()
+        return set(prices) if prices is not None else None
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        """Возможные имена фьючерсного символа для тикера, по приоритету."""
+        raise NotImplementedError
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        """Возможные имена спотовой пары для тикера, по приоритету."""
+        raise NotImplementedError
+
+    def resolve_symbol(
+        self, token: str, market_type: MarketType, markets: Collection[str]
+    ) -> Optional[str]:
+        """
+        Находит символ тикера среди известных рынков биржи без сетевых
+        запросов. Возвращает None, если рынка нет.
+        """
+        if market_type == "perp":
+            candidates = self.get_futures_candidates(token)
+        else:
+            candidates = self.get_spot_candidates(token)
+        for candidate in candidates:
+            if candidate in markets:
+                return candidate
+        return None
+
+    async def search_symbol(
+        self, token: str, market_type: MarketType
+    ) -> Optional[Tuple[str, float, str]]:
+        """
+        Поиск рынка токена по кандидатам символа: (символ, цена, url).
+        Цена кандидата запрашивается через get_price_for_*_symbol,
+        несуществующий символ даёт None.
+        """
+        if market_type == "perp":
+            candidates = self.get_futures_candidates(token)
+            fetch, link = self.get_price_for_futures_symbol, self.get_futures_link
+        else:
+            candidates = self.get_spot_candidates(token)
+            fetch, link = self.get_price_for_spot_symbol, self.get_spot_link
+        found = await self._probe_candidates(candidates, fetch, market_type)
+        if not found:
+            return None
+        symbol, price = found
+        return symbol, price, link(symbol)
+
+    async def _probe_candidates(
+        self,
+        candidates: List[str],
+        probe: Callable[[str], Awaitable[Optional[float]]],
+        market_type: MarketType,
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Проверяет кандидатов параллельно: побеждает первый ответивший
+        ценой, остальные запросы отменяются. Если формат символа уже
+        срабатывал на этой бирже, сначала в одиночку пробуется он, и лишь
+        при промахе — все остальные разом.
+        """
+        key = (self.name, market_type)
+        order = list(range(len(candidates)))
+        known = self._candidate_hits.get(key)
+        if known is not None and known < len(candidates) and len(candidates) > 1:
+            price = await self._probe_one(probe, candidates[known])
+            if price is not None:
+                return candidates[known], price
+            order.remove(known)
+
+        tasks = {
+            asyncio.ensure_future(self._probe_one(probe, candidates[i])): i
+            for i in order
+        }
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                # Из одновременно завершившихся берём более приоритетного
+                hits = sorted(tasks[t] for t in done if t.result() is not None)
+                if hits:
+                    i = hits[0]
+                    self._candidate_hits[key] = i
+                    winner = next(t for t in done if tasks[t] == i)
+                    return candidates[i], winner.result()
+        finally:
+            for task in pending:
+                task.cancel()
+        return None
+
+    async def _probe_one(
+        self, probe: Callable[[str], Awaitable[Optional[float]]], symbol: str
+    ) -> Optional[float]:
+        """Один кандидат; неожиданный формат ответа считается промахом."""
+        try:
+            return await probe(symbol)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            logger.debug("[%s] Кандидат %s отклонён: %s", self.name, symbol, e)
+            return None
+
+    async def get_prices_for_symbols(
+        self, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, float]:
+        """
+        Запрашивает цены сразу для набора известных символов.
+        Базовая реализация опрашивает символы параллельно по одному;
+        клиенты с массовым эндпоинтом переопределяют её одним запросом.
+
+        Возвращает словарь {символ: цена} только для найденных цен.
+        """
+        if market_type == "perp":
+            fetch = self.get_price_for_futures_symbol
+        else:
+            fetch = self.get_price_for_spot_symbol
+        prices = await asyncio.gather(*(fetch(s) for s in symbols))
+        return {s: p for s, p in zip(symbols, prices) if p is not None}
+
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        """Лучшие bid/ask для известного символа или None при ошибке."""
+        raise NotImplementedError
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        """
+        Лучшие bid/ask всех символов рынка одним запросом.
+        Возвращает словарь {символ: BookTicker} или None при ошибке.
+        """
+        raise NotImplementedError
+
+    async def get_book_tickers_for_symbols(
+        self, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, BookTicker]:
+        """
+        Запрашивает bid/ask сразу для набора известных символов.
+        Базовая реализация опрашивает символы параллельно по одному.
+        """
+        books = await asyncio.gather(
+            *(self.get_book_ticker(s, market_type) for s in symbols)
+        )
+        return {s: b for s, b in zip(symbols, books) if b is not None}
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        """
+        Возвращает адрес публичного WebSocket для рынка или None,
+        если биржа не стримит этот рынок (тогда цены опрашиваются по REST).
+        """
+        return None
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        """
+        Сообщения подписки на тикеры/сделки для символов.
+        Словари отправляются как JSON, строки — как есть.
+        """
+        return []
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        """Извлекает {символ: цена} из разобранного JSON-сообщения стрима."""
+        return {}
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        """
+        Прикладной ping, если биржа требует его поверх протокольного.
+        Вызывается перед каждой отправкой, поэтому может содержать время.
+        """
+        return None
+
+    @staticmethod
+    def _parse_prices(
+        items: Iterable[dict], symbol_key: str, *price_keys: str
+    ) -> Dict[str, float]:
+        """
+        Собирает {символ: цена} из списка тикеров массового эндпоинта.
+        Берётся первое непустое поле из `price_keys`; записи без цены
+        или с некорректным значением пропускаются.
+        """
+        prices: Dict[str, float] = {}
+        for item in items:
+            symbol = item.get(symbol_key)
+            if not symbol:
+                continue
+            for key in price_keys:
+                raw = item.get(key)
+                if raw in (None, ""):
+                    continue
+                try:
+                    prices[symbol] = float(raw)
+                except (TypeError, ValueError):
+                    pass
+                break
+        return prices
+
+    @staticmethod
+    def _parse_books(
+        items: Iterable[dict], symbol_key: str, bid_key: str, ask_key: str
+    ) -> Dict[str, BookTicker]:
+        """
+        Собирает {символ: BookTicker} из списка тикеров. Записи без одной
+        из сторон стакана (пустой стакан у свежего листинга) пропускаются.
+        """
+        books: Dict[str, BookTicker] = {}
+        for item in items:
+            symbol = item.get(symbol_key)
+            if not symbol:
+                continue
+            try:
+                bid = float(item.get(bid_key))
+                ask = float(item.get(ask_key))
+            except (TypeError, ValueError):
+                continue
+            if bid > 0 and ask > 0:
+                books[symbol] = BookTicker(bid, ask)
+        return books
@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any
 
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -13,30 +14,31 @@ class BinanceClient(BaseClient):
 
     SPOT_API = "https://api.binance.com/api/v3/ticker/price"
     FUT_API = "https://fapi.binance.com/fapi/v1/ticker/price"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    SPOT_BOOK_API = "https://api.binance.com/api/v3/ticker/bookTicker"
+    FUT_BOOK_API = "https://fapi.binance.com/fapi/v1/ticker/bookTicker"
+    SPOT_WS = "wss://stream.binance.com:9443/ws"
+    FUT_WS = "wss://fstream.binance.com/ws"
+    # Веса запросов в лимите Binance: (один символ, все символы)
+    SPOT_PRICE_WEIGHT = (2, 4)
+    FUT_PRICE_WEIGHT = (1, 2)
+    SPOT_BOOK_WEIGHT = (2, 4)
+    FUT_BOOK_WEIGHT = (2, 5)
+    WARMUP_URLS = (
+        "https://api.binance.com/api/v3/ping",
+        "https://fapi.binance.com/fapi/v1/ping",
+    )
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "binance"
 
     async def get_spot_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._generate_candidate_symbols(token):
-            params = {"symbol": symbol}
-            r = await self._request(
-                "GET",
-                self.SPOT_API,
-                request_name=f"binance spot {symbol}",
-                params=params,
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = r.json()
-            price = float(data.get("price")) if data and data.get("price") else None
-            if price is None:
-                continue
-            url = self.get_spot_link(symbol)
-            return symbol, price, url
-        return None
+        return await self.search_symbol(token, "spot")
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         params = {"symbol": symbol}
@@ -44,37 +46,33 @@ class BinanceClient(BaseClient):
             "GET",
             self.SPOT_API,
             request_name=f"binance spot price {symbol}",
+            category="spot price",
             params=params,
-            timeout=10,
+            weight=self.SPOT_PRICE_WEIGHT[0],
         )
         if not r or r.status_code != 200:
             return None
         data = r.json()
         return float(data.get("price")) if data and data.get("price") else None
 
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.SPOT_API,
+            request_name="binance spot all prices",
+            category="spot all prices",
+            weight=self.SPOT_PRICE_WEIGHT[1],
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_prices(r.json() or [], "symbol", "price")
+
     def get_spot_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.binance.com/en/trade/{base}_USDT?type=spot"
 
     async def get_futures_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._generate_candidate_symbols(token):
-            params = {"symbol": symbol}
-            r = await self._request(
-                "GET",
-                self.FUT_API,
-                request_name=f"binance fut {symbol}",
-                params=params,
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = r.json()
-            price = float(data.get("price")) if data and data.get("price") else None
-            if price is None:
-                continue
-            url = self.get_futures_link(symbol)
-            return symbol, price, url
-        return None
+        return await self.search_symbol(token, "perp")
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         params = {"symbol": symbol}
@@ -82,18 +80,88 @@ class BinanceClient(BaseClient):
             "GET",
             self.FUT_API,
             request_name=f"binance fut price {symbol}",
+            category="perp price",
             params=params,
-            timeout=10,
+            weight=self.FUT_PRICE_WEIGHT[0],
         )
         if not r or r.status_code != 200:
             return None
         data = r.json()
         return float(data.get("price")) if data and data.get("price") else None
 
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.FUT_API,
+            request_name="binance fut all prices",
+            category="perp all prices",
+            weight=self.FUT_PRICE_WEIGHT[1],
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_prices(r.json() or [], "symbol", "price")
+
     def get_futures_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.binance.com/en/futures/{base}USDT"
 
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        url = self.FUT_BOOK_API if market_type == "perp" else self.SPOT_BOOK_API
+        weight = self.FUT_BOOK_WEIGHT if market_type == "perp" else self.SPOT_BOOK_WEIGHT
+        r = await self._request(
+            "GET",
+            url,
+            request_name=f"binance {market_type} book {symbol}",
+            category=f"{market_type} book",
+            params={"symbol": symbol},
+            weight=weight[0],
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_books([r.json() or {}], "symbol", "bidPrice", "askPrice").get(symbol)
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        url = self.FUT_BOOK_API if market_type == "perp" else self.SPOT_BOOK_API
+        weight = self.FUT_BOOK_WEIGHT if market_type == "perp" else self.SPOT_BOOK_WEIGHT
+        r = await self._request(
+            "GET",
+            url,
+            request_name=f"binance {market_type} all books",
+            category=f"{market_type} all books",
+            weight=weight[1],
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_books(r.json() or [], "symbol", "bidPrice", "askPrice")
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        if market_type == "perp":
+            return self.FUT_WS
+        return self.SPOT_WS
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        streams = [f"{s.lower()}@aggTrade" for s in symbols]
+        return [{"method": "SUBSCRIBE", "params": streams, "id": 1}]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict) or message.get("e") != "aggTrade":
+            return {}
+        return self._parse_prices([message], "s", "p")
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._generate_candidate_symbols(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._generate_candidate_symbols(token)
+
     @staticmethod
     def _generate_candidate_symbols(user_input: str) -> List[str]:
         s = (
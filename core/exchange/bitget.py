@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any
 
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -12,43 +13,28 @@ class BitgetClient(BaseClient):
     """Клиент Bitget для спота и USDT-перпетуалов."""
 
     BASE_API = "https://api.bitget.com/api"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    PUBLIC_WS = "wss://ws.bitget.com/spot/v1/stream"
+    WARMUP_URLS = ("https://api.bitget.com/api/spot/v1/public/time",)
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "bitget"
 
     async def get_spot_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._gen_spot(token):
-            r = await self._request(
-                "GET",
-                f"{self.BASE_API}/spot/v1/market/tickers",
-                request_name=f"bitget spot {symbol}",
-                params={"symbol": symbol},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = (r.json() or {}).get("data") or []
-            entry = None
-            for item in data:
-                if item.get("symbol") == symbol:
-                    entry = item
-                    break
-            if not entry:
-                continue
-            price = entry.get("close") or entry.get("last")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_spot_link(symbol)
-        return None
+        return await self.search_symbol(token, "spot")
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             f"{self.BASE_API}/spot/v1/market/tickers",
             request_name=f"bitget spot price {symbol}",
+            category="spot price",
             params={"symbol": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -63,35 +49,32 @@ class BitgetClient(BaseClient):
         price = entry.get("close") or entry.get("last")
         return float(price) if price is not None else None
 
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/spot/v1/market/tickers",
+            request_name="bitget spot all prices",
+            category="spot all prices",
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_prices(data, "symbol", "close", "last")
+
     def get_spot_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.bitget.com/spot/{base}USDT_SPBL"
 
     async def get_futures_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._gen_perp(token):
-            r = await self._request(
-                "GET",
-                f"{self.BASE_API}/mix/v1/market/ticker",
-                request_name=f"bitget perp {symbol}",
-                params={"symbol": symbol, "productType": "umcbl"},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = (r.json() or {}).get("data") or {}
-            price = data.get("last")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_futures_link(symbol)
-        return None
+        return await self.search_symbol(token, "perp")
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             f"{self.BASE_API}/mix/v1/market/ticker",
             request_name=f"bitget perp price {symbol}",
+            category="perp price",
             params={"symbol": symbol, "productType": "umcbl"},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -99,9 +82,109 @@ class BitgetClient(BaseClient):
         price = data.get("last")
         return float(price) if price is not None else None
 
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/mix/v1/market/tickers",
+            request_name="bitget perp all prices",
+            category="perp all prices",
+            params={"productType": "umcbl"},
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_prices(data, "symbol", "last")
+
     def get_futures_link(self, symbol: str) -> str:
         return f"https://www.bitget.com/futures/usdt/{symbol}"
 
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        if market_type == "perp":
+            r = await self._request(
+                "GET",
+                f"{self.BASE_API}/mix/v1/market/ticker",
+                request_name=f"bitget perp book {symbol}",
+                category="perp book",
+                params={"symbol": symbol, "productType": "umcbl"},
+            )
+            if not r or r.status_code != 200:
+                return None
+            data = (r.json() or {}).get("data") or {}
+            return self._parse_books([data], "symbol", "bestBid", "bestAsk").get(symbol)
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/spot/v1/market/tickers",
+            request_name=f"bitget spot book {symbol}",
+            category="spot book",
+            params={"symbol": symbol},
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_books(data, "symbol", "buyOne", "sellOne").get(symbol)
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        if market_type == "perp":
+            r = await self._request(
+                "GET",
+                f"{self.BASE_API}/mix/v1/market/tickers",
+                request_name="bitget perp all books",
+                category="perp all books",
+                params={"productType": "umcbl"},
+            )
+            bid_key, ask_key = "bestBid", "bestAsk"
+        else:
+            r = await self._request(
+                "GET",
+                f"{self.BASE_API}/spot/v1/market/tickers",
+                request_name="bitget spot all books",
+                category="spot all books",
+            )
+            bid_key, ask_key = "buyOne", "sellOne"
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_books(data, "symbol", bid_key, ask_key)
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        return self.PUBLIC_WS
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        inst_type = "mc" if market_type == "perp" else "sp"
+        args = [
+            {"instType": inst_type, "channel": "ticker", "instId": s.replace("_UMCBL", "")}
+            for s in symbols
+        ]
+        return [{"op": "subscribe", "args": args}]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict):
+            return {}
+        if (message.get("arg") or {}).get("channel") != "ticker":
+            return {}
+        prices = self._parse_prices(message.get("data") or [], "instId", "last", "close")
+        if market_type == "perp":
+            # В стриме instId без суффикса, а REST-символ — ETHUSDT_UMCBL
+            return {f"{s}_UMCBL": p for s, p in prices.items()}
+        return prices
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        return "ping"
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._gen_perp(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._gen_spot(token)
+
     @staticmethod
     def _gen_spot(user_input: str) -> List[str]:
         s = user_input.strip().upper().replace(" ", "").replace("-", "").replace("/", "")
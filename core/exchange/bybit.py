@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any
 
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -13,39 +14,30 @@ class BybitClient(BaseClient):
 
     SPOT_API = "https://api.bybit.com/v5/market/tickers"
     FUT_API = "https://api.bybit.com/v5/market/tickers"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    SPOT_WS = "wss://stream.bybit.com/v5/public/spot"
+    FUT_WS = "wss://stream.bybit.com/v5/public/linear"
+    WS_TOPICS_PER_MESSAGE = 10
+    WARMUP_URLS = ("https://api.bybit.com/v5/market/time",)
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "bybit"
 
     async def get_spot_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._generate_spot(token):
-            r = await self._request(
-                "GET",
-                self.SPOT_API,
-                request_name=f"bybit spot {symbol}",
-                params={"category": "spot", "symbol": symbol},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            result = (r.json() or {}).get("result") or {}
-            lst = result.get("list") or []
-            if not lst:
-                continue
-            price = lst[0].get("lastPrice") or lst[0].get("price")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_spot_link(symbol)
-        return None
+        return await self.search_symbol(token, "spot")
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             self.SPOT_API,
             request_name=f"bybit spot price {symbol}",
+            category="spot price",
             params={"category": "spot", "symbol": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -56,37 +48,33 @@ class BybitClient(BaseClient):
         price = lst[0].get("lastPrice") or lst[0].get("price")
         return float(price) if price is not None else None
 
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.SPOT_API,
+            request_name="bybit spot all prices",
+            category="spot all prices",
+            params={"category": "spot"},
+        )
+        if not r or r.status_code != 200:
+            return None
+        lst = ((r.json() or {}).get("result") or {}).get("list") or []
+        return self._parse_prices(lst, "symbol", "lastPrice", "price")
+
     def get_spot_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.bybit.com/spot/trade/{base}/USDT"
 
     async def get_futures_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._generate_perp(token):
-            r = await self._request(
-                "GET",
-                self.FUT_API,
-                request_name=f"bybit perp {symbol}",
-                params={"category": "linear", "symbol": symbol},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            list_ = (r.json() or {}).get("result", {}).get("list") or []
-            if not list_:
-                continue
-            price = list_[0].get("lastPrice")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_futures_link(symbol)
-        return None
+        return await self.search_symbol(token, "perp")
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             self.FUT_API,
             request_name=f"bybit perp price {symbol}",
+            category="perp price",
             params={"category": "linear", "symbol": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -96,10 +84,89 @@ class BybitClient(BaseClient):
         price = list_[0].get("lastPrice")
         return float(price) if price is not None else None
 
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.FUT_API,
+            request_name="bybit perp all prices",
+            category="perp all prices",
+            params={"category": "linear"},
+        )
+        if not r or r.status_code != 200:
+            return None
+        list_ = ((r.json() or {}).get("result") or {}).get("list") or []
+        return self._parse_prices(list_, "symbol", "lastPrice")
+
     def get_futures_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.bybit.com/trade/usdt/{base}USDT"
 
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        category = "linear" if market_type == "perp" else "spot"
+        r = await self._request(
+            "GET",
+            self.FUT_API,
+            request_name=f"bybit {market_type} book {symbol}",
+            category=f"{market_type} book",
+            params={"category": category, "symbol": symbol},
+        )
+        if not r or r.status_code != 200:
+            return None
+        lst = ((r.json() or {}).get("result") or {}).get("list") or []
+        return self._parse_books(lst, "symbol", "bid1Price", "ask1Price").get(symbol)
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        category = "linear" if market_type == "perp" else "spot"
+        r = await self._request(
+            "GET",
+            self.FUT_API,
+            request_name=f"bybit {market_type} all books",
+            category=f"{market_type} all books",
+            params={"category": category},
+        )
+        if not r or r.status_code != 200:
+            return None
+        lst = ((r.json() or {}).get("result") or {}).get("list") or []
+        return self._parse_books(lst, "symbol", "bid1Price", "ask1Price")
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        if market_type == "perp":
+            return self.FUT_WS
+        return self.SPOT_WS
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        # Спотовый стрим принимает не более 10 топиков в одной подписке
+        topics = [f"publicTrade.{s}" for s in symbols]
+        return [
+            {"op": "subscribe", "args": topics[i:i + self.WS_TOPICS_PER_MESSAGE]}
+            for i in range(0, len(topics), self.WS_TOPICS_PER_MESSAGE)
+        ]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict):
+            return {}
+        if not str(message.get("topic", "")).startswith("publicTrade."):
+            return {}
+        # Сделки приходят пачкой по времени — последняя и есть текущая цена
+        return self._parse_prices(message.get("data") or [], "s", "p")
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        return {"op": "ping"}
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._generate_perp(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._generate_spot(token)
+
     @staticmethod
     def _generate_spot(user_input: str) -> List[str]:
         s = user_input.strip().upper().replace(" ", "").replace("-", "").replace("/", "")
@@ -1,24 +1,38 @@
 import logging
-from typing import Optional, Tuple, List
+import time
+from typing import Optional, Tuple, List, Dict, Any
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
 
 class GateClient(BaseClient):
     """
-    Оптимизированный клиент для Gate.io, использующий прямые запросы к API
-    для быстрой проверки существования пар и контрактов.
+    Оптимизированный клиент для Gate.io. Поиск символа делается одним
+    запросом тикера на кандидата: ответ одновременно подтверждает
+    существование пары или контракта и даёт цену.
     """
 
     FX_API_BASE = "https://fx-api.gateio.ws/api/v4"
     SPOT_API_BASE = "https://api.gateio.ws/api/v4"
     SETTLE = "usdt"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    SPOT_WS = "wss://api.gateio.ws/ws/v4/"
+    FX_WS = "wss://fx-ws.gateio.ws/v4/ws/usdt"
+    WARMUP_URLS = (
+        "https://api.gateio.ws/api/v4/spot/time",
+        "https://fx-api.gateio.ws/api/v4/futures/usdt/contracts/BTC_USDT",
+    )
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "gate"
 
     async def get_futures_price(
@@ -28,20 +42,8 @@ class GateClient(BaseClient):
         Находит фьючерсный контракт для токена и возвращает его первую цену.
         Возвращает (символ, цена, url).
         """
-        candidate_symbols = self._generate_candidate_names(token)
-
-        valid_symbol = None
-        for symbol in candidate_symbols:
-            if await self._is_valid_future(symbol):
-                valid_symbol = symbol
-                logger.info(
-                    "[%s] Найден валидный фьючерсный контракт: %s",
-                    self.name,
-                    symbol,
-                )
-                break
-
-        if not valid_symbol:
+        found = await self.search_symbol(token, "perp")
+        if not found:
             logger.info(
                 "[%s] Фьючерсы: не удалось найти валидный контракт для "
                 "токена '%s'.",
@@ -49,17 +51,24 @@ class GateClient(BaseClient):
                 token,
             )
             return None
-
-        price = await self.get_price_for_futures_symbol(valid_symbol)
-        if price is None:
-            return None
-
-        url = self.get_futures_link(valid_symbol)
-        return valid_symbol, price, url
+        return found
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         """Получает последнюю цену для конкретного фьючерса."""
-        return await self._fetch_fx_last(symbol)
+        return await self._fetch_last(symbol, "perp")
+
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        """Последние цены всех USDT-контрактов одним запросом."""
+        url = f"{self.FX_API_BASE}/futures/{self.SETTLE}/tickers"
+        r = await self._request(
+            "GET",
+            url,
+            request_name="получение всех цен фьючерсов",
+            category="perp all prices",
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_prices(r.json() or [], "contract", "last")
 
     def get_futures_link(self, symbol: str) -> str:
         return f"https://www.gate.com/futures/USDT/{symbol}"
@@ -71,20 +80,8 @@ class GateClient(BaseClient):
         Находит спотовую пару для токена и возвращает её первую цену.
         Возвращает (пара, цена, url).
         """
-        candidate_pairs = self._generate_candidate_names(token)
-
-        valid_pair = None
-        for pair in candidate_pairs:
-            if await self._is_valid_spot_pair(pair):
-                valid_pair = pair
-                logger.info(
-                    "[%s] Найдена валидная спотовая пара: %s",
-                    self.name,
-                    pair,
-                )
-                break
-
-        if not valid_pair:
+        found = await self.search_symbol(token, "spot")
+        if not found:
             logger.info(
                 "[%s] Спот: не удалось найти валидную пару для токена "
                 "'%s'.",
@@ -92,89 +89,160 @@ class GateClient(BaseClient):
                 token,
             )
             return None
-
-        price = await self.get_price_for_spot_symbol(valid_pair)
-        if price is None:
-            return None
-
-        url = self.get_spot_link(valid_pair)
-        return valid_pair, price, url
+        return found
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         """Получает последнюю цену для конкретной спотовой пары."""
-        return await self._fetch_spot_last(symbol)
+        return await self._fetch_last(symbol, "spot")
+
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        """Последние цены всех спотовых пар одним запросом."""
+        url = f"{self.SPOT_API_BASE}/spot/tickers"
+        r = await self._request(
+            "GET",
+            url,
+            request_name="получение всех цен спота",
+            category="spot all prices",
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_prices(r.json() or [], "currency_pair", "last")
 
     def get_spot_link(self, pair: str) -> str:
         return f"https://www.gate.com/trade/{pair}"
 
-    @staticmethod
-    def _generate_candidate_names(user_input: str) -> List[str]:
-        """Генерирует возможные имена для API из ввода пользователя."""
-        s = (
-            user_input.strip()
-            .upper()
-            .replace(" ", "")
-            .replace("-", "_")
-            .replace("/", "_")
-        )
-        if s.endswith("_USDT"):
-            return [s]
-        return [s + "_USDT"]
-
-    async def _is_valid_future(self, contract: str) -> bool:
-        """Проверяет существование фьючерсного контракта."""
-        url = (
-            f"{self.FX_API_BASE}/futures/{self.SETTLE}/contracts/{contract}"
-        )
+    async def get_prices_for_symbols(
+        self, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, float]:
+        """
+        Один символ — запрос с фильтром, несколько — один запрос всех
+        тикеров рынка без фильтра: фильтр у Gate принимает только один символ.
+        """
+        if len(symbols) == 1:
+            price = await self._fetch_last(symbols[0], market_type)
+            return {symbols[0]: price} if price is not None else {}
+        url, key = self._tickers_endpoint(market_type)
         r = await self._request(
             "GET",
             url,
-            request_name=f"проверка фьючерса {contract}",
+            request_name=f"получение цен {len(symbols)} символов {market_type}",
+            category=f"{market_type} all prices",
         )
-        return bool(r and r.status_code == 200)
-
-    async def _is_valid_spot_pair(self, pair: str) -> bool:
-        """Проверяет существование спотовой пары."""
-        url = f"{self.SPOT_API_BASE}/spot/currency_pairs/{pair}"
+        if not r or r.status_code != 200:
+            return {}
+        prices = self._parse_prices(r.json() or [], key, "last")
+        return {s: prices[s] for s in symbols if s in prices}
+
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        """Лучшие bid/ask контракта или пары из тикера."""
+        url, key = self._tickers_endpoint(market_type)
         r = await self._request(
             "GET",
             url,
-            request_name=f"проверка спот-пары {pair}",
+            request_name=f"получение стакана {symbol}",
+            category=f"{market_type} book",
+            params={key: symbol},
         )
-        return bool(r and r.status_code == 200)
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_books(r.json() or [], key, "highest_bid", "lowest_ask").get(symbol)
 
-    async def _fetch_fx_last(self, contract: str) -> Optional[float]:
-        """Получает последнюю цену для конкретного фьючерса."""
-        url = f"{self.FX_API_BASE}/futures/{self.SETTLE}/tickers"
-        params = {"contract": contract}
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        """Лучшие bid/ask всех контрактов или пар одним запросом."""
+        url, key = self._tickers_endpoint(market_type)
         r = await self._request(
             "GET",
             url,
-            request_name=f"получение цены фьючерса {contract}",
-            params=params,
-            timeout=10,
+            request_name=f"получение всех стаканов {market_type}",
+            category=f"{market_type} all books",
         )
         if not r or r.status_code != 200:
             return None
-        data = r.json()
-        if data and "last" in data[0]:
-            return float(data[0]["last"])
-        return None
+        return self._parse_books(r.json() or [], key, "highest_bid", "lowest_ask")
+
+    def _tickers_endpoint(self, market_type: MarketType) -> Tuple[str, str]:
+        """URL тикеров рынка и имя поля символа в нём."""
+        if market_type == "perp":
+            return f"{self.FX_API_BASE}/futures/{self.SETTLE}/tickers", "contract"
+        return f"{self.SPOT_API_BASE}/spot/tickers", "currency_pair"
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        if market_type == "perp":
+            return self.FX_WS
+        return self.SPOT_WS
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        channel = "futures.trades" if market_type == "perp" else "spot.trades"
+        return [
+            {
+                "time": int(time.time()),
+                "channel": channel,
+                "event": "subscribe",
+                "payload": list(symbols),
+            }
+        ]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict) or message.get("event") != "update":
+            return {}
+        result = message.get("result")
+        if market_type == "perp":
+            if message.get("channel") != "futures.trades":
+                return {}
+            return self._parse_prices(result or [], "contract", "price")
+        if message.get("channel") != "spot.trades" or not isinstance(result, dict):
+            return {}
+        return self._parse_prices([result], "currency_pair", "price")
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        channel = "futures.ping" if market_type == "perp" else "spot.ping"
+        return {"time": int(time.time()), "channel": channel}
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._generate_candidate_names(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._generate_candidate_names(token)
 
-    async def _fetch_spot_last(self, pair: str) -> Optional[float]:
-        """Получает последнюю цену для конкретной спотовой пары."""
-        url = f"{self.SPOT_API_BASE}/spot/tickers"
-        params = {"currency_pair": pair}
+    @staticmethod
+    def _generate_candidate_names(user_input: str) -> List[str]:
+        """Генерирует возможные имена для API из ввода пользователя."""
+        s = (
+            user_input.strip()
+            .upper()
+            .replace(" ", "")
+            .replace("-", "_")
+            .replace("/", "_")
+        )
+        if s.endswith("_USDT"):
+            return [s]
+        return [s + "_USDT"]
+
+    async def _fetch_last(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[float]:
+        """
+        Последняя цена контракта или пары из тикера с фильтром по символу.
+        Ответ тикера сам подтверждает существование символа: несуществующий
+        Gate отклоняет с кодом 400, поэтому отдельная проверка через
+        contracts/currency_pairs не нужна.
+        """
+        url, key = self._tickers_endpoint(market_type)
         r = await self._request(
             "GET",
             url,
-            request_name=f"получение цены спота {pair}",
-            params=params,
-            timeout=10,
+            request_name=f"получение цены {symbol} ({market_type})",
+            category=f"{market_type} price",
+            params={key: symbol},
         )
         if not r or r.status_code != 200:
             return None
-        data = r.json()
-        if data and "last" in data[0]:
-            return float(data[0]["last"])
-        return None
\ No newline at end of file
+        return self._parse_prices(r.json() or [], key, "last").get(symbol)
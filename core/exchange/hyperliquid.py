@@ -1,9 +1,13 @@
+import asyncio
 import logging
 import re
-from typing import Optional, Tuple, Set, Dict
+import time
+from typing import Optional, Tuple, Set, Dict, List, Collection, Any
+
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -11,22 +15,50 @@ logger = logging.getLogger(__name__)
 class HyperliquidClient(BaseClient):
     """
     Клиент для Hyperliquid, использующий асинхронный httpx клиент.
-    Поддерживает только фьючерсы (perpetuals).
+    Поддерживает перпетуалы и спот (пары к USDC).
+
+    Все цены берутся из одного снимка allMids: он общий для перпов и спота
+    и переиспользуется всеми монетами в пределах MIDS_TTL, а параллельные
+    запросы одного тика ждут один и тот же сетевой вызов.
     """
 
     INFO_API = "https://api.hyperliquid.xyz/info"
+    PUBLIC_WS = "wss://api.hyperliquid.xyz/ws"
+    # GET на info отвечает 405, но TLS-сессия при этом открывается
+    WARMUP_URLS = (INFO_API,)
+    SPOT_QUOTE = "USDC"
+    # Сколько секунд снимок allMids считается текущим тиком
+    MIDS_TTL = 0.25
+    # Списки монет меняются только с листингами
+    META_TTL = 300.0
+    # Веса запросов info в лимите на IP (1200 в минуту)
+    META_WEIGHT = 20
+    INFO_WEIGHT = 2
 
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "hyperliquid"
+        self._mids: Optional[Dict[str, float]] = None
+        self._mids_at = 0.0
+        self._mids_task: Optional[asyncio.Task] = None
+        self._universe: Optional[Set[str]] = None
+        self._universe_at = 0.0
+        # Спот: {"HYPE/USDC": "@107"} и обратно — API знает пары по индексу
+        self._spot_coins: Dict[str, str] = {}
+        self._spot_pairs: Dict[str, str] = {}
+        self._spot_meta_at = 0.0
 
     async def get_futures_price(
             self, token: str
     ) -> Optional[Tuple[str, float, str]]:
-        universe = await self._fetch_universe()
+        universe = await self._get_universe()
         if not universe:
             return None
-
         coin = self._normalize_to_coin(token, universe)
         if not coin:
             logger.info(
@@ -35,7 +67,6 @@ class HyperliquidClient(BaseClient):
                 token,
             )
             return None
-
         price = await self.get_price_for_futures_symbol(coin)
         if price is None:
             logger.warning(
@@ -44,7 +75,6 @@ class HyperliquidClient(BaseClient):
                 coin,
             )
             return None
-
         url = self.get_futures_link(coin)
         return coin, price, url
 
@@ -53,7 +83,7 @@ class HyperliquidClient(BaseClient):
         У Hyperliquid некоторые тикеры префиксируются мультипликатором (например, kPEPE).
         В ответе allMids ключи соответствуют символам без приставки k в API ссылки.
         Поэтому всегда используем ключ ровно как symbol.upper()."""
-        mids = await self._fetch_all_mids()
+        mids = await self._get_mids()
         if not mids:
             return None
         key = symbol.upper()
@@ -62,25 +92,241 @@ class HyperliquidClient(BaseClient):
     def get_futures_link(self, symbol: str) -> str:
         return f"https://app.hyperliquid.xyz/trade/{symbol}"
 
+    async def get_futures_markets(self) -> Optional[Set[str]]:
+        return await self._get_universe(force=True)
+
+    def resolve_symbol(
+            self, token: str, market_type: MarketType, markets: Collection[str]
+    ) -> Optional[str]:
+        if market_type != "perp":
+            return super().resolve_symbol(token, market_type, markets)
+        return self._normalize_to_coin(token, set(markets))
+
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        mids = await self._get_mids()
+        if mids is None:
+            return None
+        return {k: v for k, v in mids.items() if not self._is_spot_key(k)}
+
+    async def get_prices_for_symbols(
+            self, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, float]:
+        """allMids уже содержит все монеты — один запрос на весь список."""
+        mids = await self._get_mids()
+        if not mids:
+            return {}
+        if market_type == "perp":
+            return {s: mids[s.upper()] for s in symbols if s.upper() in mids}
+        if any(s not in self._spot_coins for s in symbols):
+            await self._get_spot_meta()
+        prices: Dict[str, float] = {}
+        for symbol in symbols:
+            coin = self._spot_coins.get(symbol)
+            if coin in mids:
+                prices[symbol] = mids[coin]
+        return prices
+
     async def get_spot_price(
             self, token: str
     ) -> Optional[Tuple[str, float, str]]:
-        logger.info("[%s] Спотовый рынок не поддерживается.", self.name)
+        prices = await self.get_all_spot_prices()
+        if not prices:
+            return None
+        for pair in self.get_spot_candidates(token):
+            if pair in prices:
+                return pair, prices[pair], self.get_spot_link(pair)
+        logger.info("[%s] Спот: пара для токена '%s' не найдена.", self.name, token)
         return None
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
-        return None
+        prices = await self.get_prices_for_symbols([symbol], "spot")
+        return prices.get(symbol)
+
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        """
+        Цены всех спотовых пар и их названия одним запросом
+        spotMetaAndAssetCtxs; заодно обновляет кэш соответствия пар.
+        """
+        r = await self._request(
+            "POST",
+            self.INFO_API,
+            request_name="получение спотовых рынков и цен",
+            category="spot all prices",
+            json={"type": "spotMetaAndAssetCtxs"},
+            weight=self.META_WEIGHT,
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = r.json() or []
+        if not isinstance(data, list) or len(data) < 2:
+            return None
+        meta, ctxs = data[0] or {}, data[1] or []
+        self._store_spot_meta(meta)
+        prices: Dict[str, float] = {}
+        for ctx in ctxs:
+            pair = self._spot_pairs.get(ctx.get("coin"))
+            raw = ctx.get("midPx") or ctx.get("markPx")
+            if not pair or raw is None:
+                continue
+            try:
+                prices[pair] = float(raw)
+            except (TypeError, ValueError):
+                continue
+        return prices
+
+    async def get_spot_markets(self) -> Optional[Set[str]]:
+        if not await self._get_spot_meta(force=True):
+            return None
+        return set(self._spot_coins)
 
     def get_spot_link(self, pair: str) -> str:
-        return ""
+        return f"https://app.hyperliquid.xyz/trade/{pair}"
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return [self._clean(token)]
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return [f"{self._clean(token)}/{self.SPOT_QUOTE}"]
+
+    async def get_book_ticker(
+            self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        """Верх стакана монеты из l2Book. Массового эндпоинта стаканов у
+        Hyperliquid нет, поэтому набор символов опрашивается параллельно."""
+        coin = symbol
+        if market_type == "spot":
+            if symbol not in self._spot_coins:
+                await self._get_spot_meta()
+            coin = self._spot_coins.get(symbol)
+            if not coin:
+                return None
+        r = await self._request(
+            "POST",
+            self.INFO_API,
+            request_name=f"получение стакана {symbol}",
+            category=f"{market_type} book",
+            json={"type": "l2Book", "coin": coin},
+            weight=self.INFO_WEIGHT,
+        )
+        if not r or r.status_code != 200:
+            return None
+        levels = (r.json() or {}).get("levels") or []
+        if len(levels) < 2 or not levels[0] or not levels[1]:
+            return None
+        try:
+            return BookTicker(float(levels[0][0]["px"]), float(levels[1][0]["px"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        return self.PUBLIC_WS
+
+    def build_stream_subscriptions(
+            self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        # Одна подписка allMids покрывает все монеты, лишние отсекает Monitor
+        return [{"method": "subscribe", "subscription": {"type": "allMids"}}]
+
+    def parse_stream_message(
+            self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict) or message.get("channel") != "allMids":
+            return {}
+        mids = (message.get("data") or {}).get("mids") or {}
+        prices: Dict[str, float] = {}
+        for key, raw in mids.items():
+            if market_type == "perp":
+                if self._is_spot_key(key):
+                    continue
+                symbol = key.upper()
+            else:
+                symbol = self._spot_pairs.get(key)
+                if not symbol:
+                    continue
+            try:
+                prices[symbol] = float(raw)
+            except (TypeError, ValueError):
+                continue
+        return prices
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        return {"method": "ping"}
+
+    async def _get_mids(self) -> Optional[Dict[str, float]]:
+        """
+        Снимок allMids текущего тика. Свежий снимок отдаётся из памяти,
+        а одновременные вызовы ждут один общий запрос.
+        """
+        if self._mids is not None and time.monotonic() - self._mids_at < self.MIDS_TTL:
+            return self._mids
+        if self._mids_task is None or self._mids_task.done():
+            self._mids_task = asyncio.ensure_future(self._refresh_mids())
+        # shield: отмена одного ожидающего не отменяет запрос для остальных
+        return await asyncio.shield(self._mids_task)
+
+    async def _refresh_mids(self) -> Optional[Dict[str, float]]:
+        mids = await self._fetch_all_mids()
+        if mids is not None:
+            self._mids, self._mids_at = mids, time.monotonic()
+        return mids
+
+    async def _get_universe(self, force: bool = False) -> Optional[Set[str]]:
+        """Список перпов из meta, кэшируется на META_TTL."""
+        fresh = time.monotonic() - self._universe_at < self.META_TTL
+        if self._universe is not None and fresh and not force:
+            return self._universe
+        universe = await self._fetch_universe()
+        if universe is not None:
+            self._universe, self._universe_at = universe, time.monotonic()
+        return universe if universe is not None else self._universe
+
+    async def _get_spot_meta(self, force: bool = False) -> bool:
+        """Обновляет соответствие спотовых пар их ключам API (spotMeta)."""
+        fresh = time.monotonic() - self._spot_meta_at < self.META_TTL
+        if self._spot_coins and fresh and not force:
+            return True
+        r = await self._request(
+            "POST",
+            self.INFO_API,
+            request_name="получение спотовых рынков (spotMeta)",
+            category="spot markets",
+            json={"type": "spotMeta"},
+            weight=self.META_WEIGHT,
+        )
+        if not r or r.status_code != 200:
+            return bool(self._spot_coins)
+        self._store_spot_meta(r.json() or {})
+        return True
+
+    def _store_spot_meta(self, meta: dict) -> None:
+        """Строит {"HYPE/USDC": "@107"} из spotMeta; берутся только пары к USDC."""
+        tokens = {t.get("index"): t.get("name") for t in meta.get("tokens") or []}
+        coins: Dict[str, str] = {}
+        for pair in meta.get("universe") or []:
+            base_idx, quote_idx = (pair.get("tokens") or [None, None])[:2]
+            base, quote = tokens.get(base_idx), tokens.get(quote_idx)
+            coin = pair.get("name")
+            if not base or not coin or quote != self.SPOT_QUOTE:
+                continue
+            coins.setdefault(f"{base.upper()}/{self.SPOT_QUOTE}", coin)
+        if coins:
+            self._spot_coins = coins
+            self._spot_pairs = {coin: pair for pair, coin in coins.items()}
+            self._spot_meta_at = time.monotonic()
+
+    @staticmethod
+    def _is_spot_key(key: str) -> bool:
+        """Спотовые ключи allMids: "@107" или "PURR/USDC"."""
+        return key.startswith("@") or "/" in key
 
     async def _fetch_universe(self) -> Optional[Set[str]]:
         r = await self._request(
             "POST",
             self.INFO_API,
             request_name="получение списка активов (universe)",
+            category="perp markets",
             json={"type": "meta"},
-            timeout=10,
+            weight=self.META_WEIGHT,
         )
         if not r or r.status_code != 200:
             return None
@@ -95,27 +341,37 @@ class HyperliquidClient(BaseClient):
             "POST",
             self.INFO_API,
             request_name="получение всех цен (mids)",
+            category="all mids",
             json={"type": "allMids"},
-            timeout=10,
+            weight=self.INFO_WEIGHT,
         )
         if not r or r.status_code != 200:
             return None
         data = r.json() or {}
-        return {k.upper(): float(v) for k, v in data.items()}
+        mids: Dict[str, float] = {}
+        for key, value in data.items():
+            # Спотовые ключи (@107) сохраняются как есть — по ним ищет _spot_coins
+            mids[key if self._is_spot_key(key) else key.upper()] = float(value)
+        return mids
 
     @staticmethod
-    def _normalize_to_coin(
-            user_input: str, universe: Set[str]
-    ) -> Optional[str]:
+    def _clean(user_input: str) -> str:
         s = re.sub(r"[^A-Z0-9]", "", user_input.strip().upper().replace(
             "PERP", ""
         ))
         for quote in ("USDT", "USDC", "USD"):
             if s.endswith(quote):
                 s = s[: -len(quote)]
+        return s
+
+    @classmethod
+    def _normalize_to_coin(
+            cls, user_input: str, universe: Set[str]
+    ) -> Optional[str]:
+        s = cls._clean(user_input)
         if s in universe:
             return s
         candidates = [u for u in universe if s in u]
         if len(candidates) == 1:
             return candidates[0]
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,300 @@
+import asyncio
+import logging
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограммы задержек, секунды (как у клиентов Prometheus)
+BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Фазы запроса: полное время и то, что отдаёт трассировка httpcore.
+# DNS отдельно не трассируется — разрешение имени входит в connect
+PHASES: Tuple[str, ...] = ("total", "connect", "tls", "ttfb")
+
+
+class Histogram:
+    """Гистограмма с фиксированными корзинами BUCKETS; последняя — +Inf."""
+
+    __slots__ = ("counts", "count", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def merge(self, other: "Histogram") -> None:
+        for i, n in enumerate(other.counts):
+            self.counts[i] += n
+        self.count += other.count
+        self.sum += other.sum
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Оценка квантиля линейной интерполяцией внутри корзины."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+    def cumulative(self) -> Iterator[Tuple[str, int]]:
+        """Пары (le, накопленное число) в формате Prometheus."""
+        total = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), self.counts):
+            total += n
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+class RequestStats:
+    """Счётчики и гистограммы одной категории запросов одной биржи."""
+
+    __slots__ = (
+        "requests", "retries", "skipped", "throttled", "throttle_seconds",
+        "bytes", "statuses", "errors", "latency",
+    )
+
+    def __init__(self):
+        # Попытки, ушедшие в сеть (повторы включены)
+        self.requests = 0
+        self.retries = 0
+        # Запросы, не отправленные из-за разомкнутой цепи
+        self.skipped = 0
+        # Попытки, придержанные ограничителем темпа, и суммарное ожидание
+        self.throttled = 0
+        self.throttle_seconds = 0.0
+        self.bytes = 0
+        self.statuses: Counter = Counter()
+        # Сетевые ошибки по типу исключения httpx
+        self.errors: Counter = Counter()
+        self.latency: Dict[str, Histogram] = {phase: Histogram() for phase in PHASES}
+
+    def merge(self, other: "RequestStats") -> None:
+        self.requests += other.requests
+        self.retries += other.retries
+        self.skipped += other.skipped
+        self.throttled += other.throttled
+        self.throttle_seconds += other.throttle_seconds
+        self.bytes += other.bytes
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        for phase, histogram in other.latency.items():
+            self.latency[phase].merge(histogram)
+
+    @property
+    def failures(self) -> int:
+        """Сетевые ошибки и ответы 5xx."""
+        return sum(self.errors.values()) + sum(n for s, n in self.statuses.items() if s >= 500)
+
+
+class RequestTrace:
+    """
+    Колбэк трассировки httpcore (`extensions={"trace": ...}`): запоминает
+    моменты событий соединения, из которых затем считаются фазы.
+    Транспорты без трассировки (подменённые) его просто не вызывают.
+    """
+
+    __slots__ = ("marks",)
+
+    def __init__(self):
+        self.marks: Dict[str, float] = {}
+
+    async def __call__(self, event_name: str, info: dict) -> None:
+        # http11.* и http2.* сводятся к одним именам
+        _, _, event = event_name.partition(".") if event_name.startswith("http") else ("", "", event_name)
+        self.marks[event] = time.perf_counter()
+
+    def phases(self) -> Dict[str, float]:
+        marks = self.marks
+        result: Dict[str, float] = {}
+        for phase, start, end in (
+            ("connect", "connection.connect_tcp.started", "connection.connect_tcp.complete"),
+            ("tls", "connection.start_tls.started", "connection.start_tls.complete"),
+            ("ttfb", "send_request_headers.started", "receive_response_headers.complete"),
+        ):
+            if start in marks and end in marks:
+                result[phase] = marks[end] - marks[start]
+        return result
+
+
+class MetricsRegistry:
+    """
+    Метрики запросов к биржам по (биржа, категория). Категорию задаёт место
+    вызова `BaseClient._request`: рынок и вид запроса без символов, например
+    "perp price", "spot all books", — чтобы ряды не дробились по символам.
+    Учёт идёт прямо в `BaseClient._request`: это несколько сложений и
+    поиск корзины на попытку, без блокировок — всё в одном цикле событий.
+    """
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], RequestStats] = {}
+        self.started = time.time()
+
+    def stats(self, exchange: str, category: str) -> RequestStats:
+        key = (exchange, category)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = RequestStats()
+        return stats
+
+    def observe(
+        self,
+        exchange: str,
+        category: str,
+        attempt: int,
+        elapsed: float,
+        trace: Optional[RequestTrace] = None,
+        status: Optional[int] = None,
+        size: int = 0,
+        error: Optional[str] = None,
+    ) -> None:
+        """Учитывает одну попытку запроса: ответ (status) или ошибку (error)."""
+        stats = self.stats(exchange, category)
+        stats.requests += 1
+        if attempt:
+            stats.retries += 1
+        if status is not None:
+            stats.statuses[status] += 1
+            stats.bytes += size
+        if error is not None:
+            stats.errors[error] += 1
+        stats.latency["total"].observe(elapsed)
+        if trace is not None:
+            for phase, value in trace.phases().items():
+                stats.latency[phase].observe(value)
+
+    def skip(self, exchange: str, category: str) -> None:
+        self.stats(exchange, category).skipped += 1
+
+    def throttle(self, exchange: str, category: str, waited: float) -> None:
+        stats = self.stats(exchange, category)
+        stats.throttled += 1
+        stats.throttle_seconds += waited
+
+    def items(self) -> List[Tuple[Tuple[str, str], RequestStats]]:
+        return sorted(self._stats.items())
+
+    def by_exchange(self) -> Dict[str, RequestStats]:
+        """Сводка по биржам: категории сложены."""
+        result: Dict[str, RequestStats] = {}
+        for (exchange, _), stats in self.items():
+            result.setdefault(exchange, RequestStats()).merge(stats)
+        return result
+
+    def reset(self) -> None:
+        self._stats.clear()
+        self.started = time.time()
+
+    def render_prometheus(self, prefix: str = "trade_helper") -> str:
+        """Текстовый формат экспозиции Prometheus 0.0.4."""
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> str:
+            full = f"{prefix}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            return full
+
+        items = self.items()
+        for attr, name, help_text in (
+            ("requests", "requests_total", "Попытки HTTP-запросов к бирже"),
+            ("retries", "retries_total", "Повторные попытки"),
+            ("skipped", "skipped_total", "Запросы, пропущенные из-за разомкнутой цепи"),
+            ("throttled", "throttled_total", "Попытки, придержанные ограничителем темпа"),
+            ("throttle_seconds", "throttle_seconds_total", "Суммарное ожидание ограничителя темпа"),
+            ("bytes", "response_bytes_total", "Получено байт в ответах"),
+        ):
+            full = family(name, "counter", help_text)
+            for (exchange, category), stats in items:
+                lines.append(f"{full}{{{_labels(exchange, category)}}} {getattr(stats, attr)}")
+
+        full = family("responses_total", "counter", "Ответы по HTTP-статусу")
+        for (exchange, category), stats in items:
+            for status, n in sorted(stats.statuses.items()):
+                lines.append(f"{full}{{{_labels(exchange, category, status=status)}}} {n}")
+        full = family("errors_total", "counter", "Сетевые ошибки по типу")
+        for (exchange, category), stats in items:
+            for error, n in sorted(stats.errors.items()):
+                lines.append(f"{full}{{{_labels(exchange, category, error=error)}}} {n}")
+
+        full = family("request_duration_seconds", "histogram", "Задержка запроса по фазам")
+        for (exchange, category), stats in items:
+            for phase, histogram in stats.latency.items():
+                if not histogram.count:
+                    continue
+                labels = _labels(exchange, category, phase=phase)
+                for le, n in histogram.cumulative():
+                    lines.append(f'{full}_bucket{{{labels},le="{le}"}} {n}')
+                lines.append(f"{full}_sum{{{labels}}} {histogram.sum!r}")
+                lines.append(f"{full}_count{{{labels}}} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(exchange: str, category: str, **extra) -> str:
+    pairs = [("exchange", exchange), ("category", category)] + [(k, str(v)) for k, v in extra.items()]
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsServer:
+    """
+    HTTP-эндпоинт метрик для Prometheus на localhost: GET /metrics
+    отдаёт `MetricsRegistry.render_prometheus()`. Слушает только
+    127.0.0.1, наружу ничего не открывается.
+    """
+
+    DEFAULT_PORT = 9464
+
+    def __init__(self, registry: MetricsRegistry, port: int = DEFAULT_PORT, host: str = "127.0.0.1"):
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        try:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        except OSError as e:
+            logger.warning("Не удалось открыть эндпоинт метрик на %s:%d: %s", self.host, self.port, e)
+            return
+        logger.info("Метрики доступны на http://%s:%d/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout=5.0)
+            parts = head.split(b" ", 2)
+            path = parts[1].split(b"?", 1)[0] if len(parts) > 1 else b""
+            if parts[0] == b"GET" and path == b"/metrics":
+                status, body = "200 OK", self.registry.render_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            else:
+                status, body, content_type = "404 Not Found", b"not found\n", "text/plain"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any, Set
 
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -13,36 +14,32 @@ class MexcClient(BaseClient):
 
     SPOT_API = "https://api.mexc.com/api/v3/ticker/price"
     FUT_API = "https://contract.mexc.com/api/v1/contract/ticker"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    SPOT_BOOK_API = "https://api.mexc.com/api/v3/ticker/bookTicker"
+    FUT_WS = "wss://contract.mexc.com/edge"
+    WARMUP_URLS = (
+        "https://api.mexc.com/api/v3/ping",
+        "https://contract.mexc.com/api/v1/contract/ping",
+    )
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "mexc"
 
     async def get_spot_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._gen_spot(token):
-            r = await self._request(
-                "GET",
-                self.SPOT_API,
-                request_name=f"mexc spot {symbol}",
-                params={"symbol": symbol},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = r.json() or {}
-            price = data.get("price")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_spot_link(symbol)
-        return None
+        return await self.search_symbol(token, "spot")
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             self.SPOT_API,
             request_name=f"mexc spot price {symbol}",
+            category="spot price",
             params={"symbol": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -50,43 +47,31 @@ class MexcClient(BaseClient):
         price = data.get("price")
         return float(price) if price is not None else None
 
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.SPOT_API,
+            request_name="mexc spot all prices",
+            category="spot all prices",
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_prices(r.json() or [], "symbol", "price")
+
     def get_spot_link(self, symbol: str) -> str:
         base = symbol.upper().replace("USDT", "")
         return f"https://www.mexc.com/exchange/{base}_USDT"
 
     async def get_futures_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for symbol in self._gen_perp(token):
-            r = await self._request(
-                "GET",
-                self.FUT_API,
-                request_name=f"mexc perp {symbol}",
-                params={"symbol": symbol},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            payload = r.json() or {}
-            data = payload.get("data")
-            entry = None
-            if isinstance(data, list):
-                entry = data[0] if data else None
-            elif isinstance(data, dict):
-                entry = data
-            if not entry:
-                continue
-            price = entry.get("lastPrice") or entry.get("last")
-            if price is None:
-                continue
-            return symbol, float(price), self.get_futures_link(symbol)
-        return None
+        return await self.search_symbol(token, "perp")
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             self.FUT_API,
             request_name=f"mexc perp price {symbol}",
+            category="perp price",
             params={"symbol": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
@@ -102,12 +87,136 @@ class MexcClient(BaseClient):
         price = entry.get("lastPrice") or entry.get("last")
         return float(price) if price is not None else None
 
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        r = await self._request(
+            "GET",
+            self.FUT_API,
+            request_name="mexc perp all prices",
+            category="perp all prices",
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        if isinstance(data, dict):
+            data = [data]
+        prices = self._parse_prices(data, "symbol", "lastPrice", "last")
+        # Контракты приходят как ETH_USDT, а поиск мог найти символ ETHUSDT —
+        # дублируем ключ без подчёркивания, чтобы оба формата находились
+        for symbol, price in list(prices.items()):
+            prices.setdefault(symbol.replace("_", ""), price)
+        return prices
+
+    async def get_futures_markets(self) -> Optional[Set[str]]:
+        prices = await self.get_all_futures_prices()
+        if prices is None:
+            return None
+        # Без псевдонимов ETHUSDT: в индекс попадают только настоящие контракты
+        return {s for s in prices if "_" in s}
+
     def get_futures_link(self, symbol: str) -> str:
         sym = symbol.upper()
         if sym.endswith("USDT") and "_" not in sym:
             sym = sym.replace("USDT", "_USDT")
         return f"https://futures.mexc.com/exchange/{sym}"
 
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        if market_type == "perp":
+            contract = self._to_contract(symbol)
+            r = await self._request(
+                "GET",
+                self.FUT_API,
+                request_name=f"mexc perp book {symbol}",
+                category="perp book",
+                params={"symbol": contract},
+            )
+            if not r or r.status_code != 200:
+                return None
+            data = (r.json() or {}).get("data")
+            items = data if isinstance(data, list) else [data or {}]
+            return self._parse_books(items, "symbol", "bid1", "ask1").get(contract)
+        r = await self._request(
+            "GET",
+            self.SPOT_BOOK_API,
+            request_name=f"mexc spot book {symbol}",
+            category="spot book",
+            params={"symbol": symbol},
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_books([r.json() or {}], "symbol", "bidPrice", "askPrice").get(symbol)
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        if market_type == "perp":
+            r = await self._request(
+                "GET",
+                self.FUT_API,
+                request_name="mexc perp all books",
+                category="perp all books",
+            )
+            if not r or r.status_code != 200:
+                return None
+            data = (r.json() or {}).get("data") or []
+            if isinstance(data, dict):
+                data = [data]
+            books = self._parse_books(data, "symbol", "bid1", "ask1")
+            # Как и для цен: контракт ETH_USDT доступен и под ключом ETHUSDT
+            for symbol, book in list(books.items()):
+                books.setdefault(symbol.replace("_", ""), book)
+            return books
+        r = await self._request(
+            "GET",
+            self.SPOT_BOOK_API,
+            request_name="mexc spot all books",
+            category="spot all books",
+        )
+        if not r or r.status_code != 200:
+            return None
+        return self._parse_books(r.json() or [], "symbol", "bidPrice", "askPrice")
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        # Спотовый стрим MEXC отдаёт только protobuf — спот остаётся на REST
+        if market_type == "perp":
+            return self.FUT_WS
+        return None
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        return [
+            {"method": "sub.ticker", "param": {"symbol": self._to_contract(s)}}
+            for s in symbols
+        ]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict) or message.get("channel") != "push.ticker":
+            return {}
+        prices = self._parse_prices([message.get("data") or {}], "symbol", "lastPrice")
+        for symbol, price in list(prices.items()):
+            prices.setdefault(symbol.replace("_", ""), price)
+        return prices
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        return {"method": "ping"}
+
+    @staticmethod
+    def _to_contract(symbol: str) -> str:
+        sym = symbol.upper()
+        if sym.endswith("USDT") and "_" not in sym:
+            sym = sym[:-4] + "_USDT"
+        return sym
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._gen_perp(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._gen_spot(token)
+
     @staticmethod
     def _gen_spot(user_input: str) -> List[str]:
         s = user_input.strip().upper().replace(" ", "").replace("-", "").replace("/", "")
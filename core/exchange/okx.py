@@ -1,9 +1,10 @@
 import logging
-from typing import Optional, Tuple, List
+from typing import Optional, Tuple, List, Dict, Any
 
 import httpx
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.transport import HostLimiters, TransportPolicy
 
 logger = logging.getLogger(__name__)
 
@@ -12,83 +13,135 @@ class OkxClient(BaseClient):
     """Клиент OKX для спота и USDT-перпетуалов."""
 
     BASE_API = "https://www.okx.com/api/v5"
-
-    def __init__(self, http_client: httpx.AsyncClient):
-        super().__init__(http_client)
+    PUBLIC_WS = "wss://ws.okx.com:8443/ws/v5/public"
+    WARMUP_URLS = ("https://www.okx.com/api/v5/public/time",)
+
+    def __init__(
+        self,
+        http_client: httpx.AsyncClient,
+        policy: Optional[TransportPolicy] = None,
+        limiters: Optional[HostLimiters] = None,
+    ):
+        super().__init__(http_client, policy, limiters)
         self.name = "okx"
 
     async def get_spot_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for instId in self._generate_spot(token):
-            r = await self._request(
-                "GET",
-                f"{self.BASE_API}/market/ticker",
-                request_name=f"okx spot {instId}",
-                params={"instId": instId},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = (r.json() or {}).get("data") or []
-            if not data:
-                continue
-            last = data[0].get("last")
-            if last is None:
-                continue
-            return instId, float(last), self.get_spot_link(instId)
-        return None
+        return await self.search_symbol(token, "spot")
 
     async def get_price_for_spot_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             f"{self.BASE_API}/market/ticker",
             request_name=f"okx spot price {symbol}",
+            category="spot price",
             params={"instId": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
         data = (r.json() or {}).get("data") or []
         return float(data[0].get("last")) if data and data[0].get("last") else None
 
+    async def get_all_spot_prices(self) -> Optional[Dict[str, float]]:
+        return await self._fetch_all_last("spot")
+
     def get_spot_link(self, instId: str) -> str:
         return f"https://www.okx.com/ru/trade-spot/{instId.replace('-', '-')}"
 
     async def get_futures_price(self, token: str) -> Optional[Tuple[str, float, str]]:
-        for instId in self._generate_perp(token):
-            r = await self._request(
-                "GET",
-                f"{self.BASE_API}/market/ticker",
-                request_name=f"okx perp {instId}",
-                params={"instId": instId},
-                timeout=10,
-            )
-            if not r or r.status_code != 200:
-                continue
-            data = (r.json() or {}).get("data") or []
-            if not data:
-                continue
-            last = data[0].get("last")
-            if last is None:
-                continue
-            return instId, float(last), self.get_futures_link(instId)
-        return None
+        return await self.search_symbol(token, "perp")
 
     async def get_price_for_futures_symbol(self, symbol: str) -> Optional[float]:
         r = await self._request(
             "GET",
             f"{self.BASE_API}/market/ticker",
             request_name=f"okx perp price {symbol}",
+            category="perp price",
             params={"instId": symbol},
-            timeout=10,
         )
         if not r or r.status_code != 200:
             return None
         data = (r.json() or {}).get("data") or []
         return float(data[0].get("last")) if data and data[0].get("last") else None
 
+    async def get_all_futures_prices(self) -> Optional[Dict[str, float]]:
+        return await self._fetch_all_last("perp")
+
     def get_futures_link(self, instId: str) -> str:
         return f"https://www.okx.com/ru/trade-swap/{instId}"
 
+    async def _fetch_all_last(self, market_type: MarketType) -> Optional[Dict[str, float]]:
+        """Последние цены всех инструментов рынка (SWAP или SPOT)."""
+        inst_type = "SWAP" if market_type == "perp" else "SPOT"
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/market/tickers",
+            request_name=f"okx all prices {inst_type}",
+            category=f"{market_type} all prices",
+            params={"instType": inst_type},
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_prices(data, "instId", "last")
+
+    async def get_book_ticker(
+        self, symbol: str, market_type: MarketType
+    ) -> Optional[BookTicker]:
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/market/ticker",
+            request_name=f"okx book {symbol}",
+            category=f"{market_type} book",
+            params={"instId": symbol},
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_books(data, "instId", "bidPx", "askPx").get(symbol)
+
+    async def get_all_book_tickers(
+        self, market_type: MarketType
+    ) -> Optional[Dict[str, BookTicker]]:
+        inst_type = "SWAP" if market_type == "perp" else "SPOT"
+        r = await self._request(
+            "GET",
+            f"{self.BASE_API}/market/tickers",
+            request_name=f"okx all books {inst_type}",
+            category=f"{market_type} all books",
+            params={"instType": inst_type},
+        )
+        if not r or r.status_code != 200:
+            return None
+        data = (r.json() or {}).get("data") or []
+        return self._parse_books(data, "instId", "bidPx", "askPx")
+
+    def get_stream_url(self, market_type: MarketType) -> Optional[str]:
+        return self.PUBLIC_WS
+
+    def build_stream_subscriptions(
+        self, symbols: List[str], market_type: MarketType
+    ) -> List[Any]:
+        args = [{"channel": "tickers", "instId": s} for s in symbols]
+        return [{"op": "subscribe", "args": args}]
+
+    def parse_stream_message(
+        self, message: Any, market_type: MarketType
+    ) -> Dict[str, float]:
+        if not isinstance(message, dict):
+            return {}
+        if (message.get("arg") or {}).get("channel") != "tickers":
+            return {}
+        return self._parse_prices(message.get("data") or [], "instId", "last")
+
+    def get_stream_ping(self, market_type: MarketType) -> Optional[Any]:
+        return "ping"
+
+    def get_futures_candidates(self, token: str) -> List[str]:
+        return self._generate_perp(token)
+
+    def get_spot_candidates(self, token: str) -> List[str]:
+        return self._generate_spot(token)
+
     @staticmethod
     def _generate_spot(user_input: str) -> List[str]:
         s = user_input.strip().upper().replace(" ", "").replace("/", "-").replace("_", "-")
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import logging
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class JsonFileStore:
+    """
+    Основа для данных, переживающих перезапуск в JSON-файле: загрузка с
+    проверкой версии формата и атомарная запись (временный файл + замена),
+    в том числе из фонового потока. Без `path` хранилище живёт только в памяти.
+
+    Наследник задаёт FILE_VERSION и DESCRIPTION (для логов) и реализует
+    `_snapshot()` (что писать) и `_restore(payload)` (как разобрать прочитанное).
+    """
+
+    FILE_VERSION = 1
+    # Что хранится, в винительном падеже: «Не удалось прочитать {DESCRIPTION}»
+    DESCRIPTION = "данные"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = path
+
+    def _snapshot(self) -> dict:
+        raise NotImplementedError
+
+    def _restore(self, payload: dict) -> None:
+        raise NotImplementedError
+
+    def load(self) -> None:
+        """Загружает данные с диска; битый или чужой файл игнорируется."""
+        if not self.path or not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Не удалось прочитать %s %s: %s", self.DESCRIPTION, self.path, e)
+            return
+        if not isinstance(payload, dict) or payload.get("version") != self.FILE_VERSION:
+            return
+        self._restore(payload)
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        self._write(self._snapshot())
+
+    async def save_async(self) -> None:
+        """Сохраняет данные, не блокируя цикл событий записью на диск."""
+        if not self.path:
+            return
+        await asyncio.to_thread(self._write, self._snapshot())
+
+    def _write(self, payload: dict) -> None:
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            tmp.replace(self.path)
+        except OSError as e:
+            logger.warning("Не удалось сохранить %s %s: %s", self.DESCRIPTION, self.path, e)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from core.exchange.base import BaseClient, MarketType
+
+try:
+    import websockets
+except ImportError:  # pragma: no cover - зависимость опциональна
+    websockets = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# (название_биржи, символ, цена)
+PriceCallback = Callable[[str, str, float], None]
+
+
+class StreamEngine:
+    """
+    Стриминговый движок цен: держит по одному публичному WebSocket на биржу
+    и передаёт каждую пришедшую цену в колбэк сразу по получении.
+
+    «Живой» считается пара (биржа, символ), по которой цена приходила не
+    дольше STALE_AFTER назад: подписка одного символа не означает, что
+    идут цены остальных. Молчащие символы и все символы оборванного сокета
+    выпадают из `live_symbols` (и опрашиваются по REST), а движок
+    переподключается в фоне с экспоненциальной паузой.
+    """
+
+    PING_INTERVAL: float = 20.0
+    RECONNECT_DELAY: float = 1.0
+    MAX_RECONNECT_DELAY: float = 30.0
+    # Сколько секунд тишины считать мёртвым сокетом
+    STALE_AFTER: float = 30.0
+
+    def __init__(
+        self,
+        clients: List[BaseClient],
+        market_type: MarketType,
+        on_price: PriceCallback,
+    ):
+        self.clients = clients
+        self.market_type = market_type
+        self.on_price = on_price
+        self._tasks: Dict[str, asyncio.Task] = {}
+        # {биржа: {символ: время последней цены (monotonic)}}
+        self._live: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def is_available() -> bool:
+        """Установлена ли библиотека websockets."""
+        return websockets is not None
+
+    @property
+    def live_symbols(self) -> Set[Tuple[str, str]]:
+        """Пары (биржа, символ), цены которых сейчас идут по стриму."""
+        since = time.monotonic() - self.STALE_AFTER
+        return {
+            (exchange, symbol)
+            for exchange, symbols in self._live.items()
+            for symbol, at in symbols.items()
+            if at >= since
+        }
+
+    @property
+    def live_exchanges(self) -> Set[str]:
+        """Биржи, по сокету которых идёт хотя бы одна цена."""
+        return {exchange for exchange, _ in self.live_symbols}
+
+    def is_live(self, exchange: str, symbol: str) -> bool:
+        at = self._live.get(exchange, {}).get(symbol)
+        return at is not None and time.monotonic() - at <= self.STALE_AFTER
+
+    def start(self, symbols_by_exchange: Dict[str, List[str]]) -> None:
+        """Запускает подписки для бирж, которые поддерживают стрим рынка."""
+        if not self.is_available():
+            logger.warning("Библиотека websockets не установлена, стрим отключён.")
+            return
+        for client in self.clients:
+            symbols = symbols_by_exchange.get(client.name)
+            if not symbols or client.name in self._tasks:
+                continue
+            url = client.get_stream_url(self.market_type)
+            if not url:
+                continue
+            self._tasks[client.name] = asyncio.create_task(
+                self._run_client(client, url, list(symbols))
+            )
+
+    async def stop(self) -> None:
+        """Закрывает все сокеты."""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._live.clear()
+
+    async def _run_client(
+        self, client: BaseClient, url: str, symbols: List[str]
+    ) -> None:
+        """Цикл подключения одной биржи с переподключением."""
+        delay = self.RECONNECT_DELAY
+        while True:
+            try:
+                await self._consume(client, url, symbols)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("[%s] WebSocket отключён: %s", client.name, e)
+            if self._live.pop(client.name, None):
+                delay = self.RECONNECT_DELAY
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.MAX_RECONNECT_DELAY)
+
+    async def _consume(
+        self, client: BaseClient, url: str, symbols: List[str]
+    ) -> None:
+        """Подписывается и читает сообщения, пока сокет жив."""
+        async with websockets.connect(
+            url, open_timeout=10, ping_interval=self.PING_INTERVAL, max_size=2 ** 23
+        ) as ws:
+            for sub in client.build_stream_subscriptions(symbols, self.market_type):
+                await ws.send(sub if isinstance(sub, str) else json.dumps(sub))
+            ping_task: Optional[asyncio.Task] = None
+            if client.get_stream_ping(self.market_type) is not None:
+                ping_task = asyncio.create_task(self._app_ping(ws, client))
+            try:
+                while True:
+                    raw = await asyncio.wait_for(ws.recv(), timeout=self.STALE_AFTER)
+                    try:
+                        message = json.loads(raw)
+                    except ValueError:
+                        continue  # pong и прочие служебные строки
+                    prices = client.parse_stream_message(message, self.market_type)
+                    if not prices:
+                        continue
+                    live = self._live.get(client.name)
+                    if live is None:
+                        logger.info("[%s] WebSocket: цены поступают.", client.name)
+                        live = self._live[client.name] = {}
+                    now = time.monotonic()
+                    for symbol, price in prices.items():
+                        live[symbol] = now
+                        self.on_price(client.name, symbol, price)
+            finally:
+                if ping_task:
+                    ping_task.cancel()
+
+    async def _app_ping(self, ws, client: BaseClient) -> None:
+        """Отправляет прикладной ping, которого ждут некоторые биржи."""
+        while True:
+            await asyncio.sleep(self.PING_INTERVAL)
+            ping = client.get_stream_ping(self.market_type)
+            await ws.send(ping if isinstance(ping, str) else json.dumps(ping))
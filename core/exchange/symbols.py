@@ -0,0 +1,89 @@
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from core.exchange.base import MarketType
+from core.exchange.storage import JsonFileStore
+
+
+class CachedSymbol(NamedTuple):
+    """Результат прошлого поиска: символ и ссылка или None — рынка нет."""
+
+    symbol: Optional[str]
+    url: str
+    updated: float
+
+
+class SymbolCache(JsonFileStore):
+    """
+    Кэш найденных символов между сессиями: для (тикер, рынок, биржа)
+    хранит символ и ссылку на торговую страницу. Повторный поиск того же
+    тикера берёт символы отсюда и сразу запрашивает цены, без поиска.
+
+    Хранит и отрицательные ответы («на бирже нет рынка на момент T»),
+    но с коротким сроком жизни: свежий листинг не должен теряться надолго.
+    """
+
+    FILE_VERSION = 1
+    DESCRIPTION = "кэш символов"
+    # Символы меняются только при переименовании или делистинге
+    FOUND_TTL: float = 7 * 24 * 3600.0
+    MISSING_TTL: float = 3600.0
+
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path)
+        self._entries: Dict[Tuple[str, str, str], CachedSymbol] = {}
+
+    @staticmethod
+    def _key(token: str, market_type: MarketType, exchange: str) -> Tuple[str, str, str]:
+        return token.strip().upper(), market_type, exchange
+
+    def get(
+        self, token: str, market_type: MarketType, exchange: str
+    ) -> Optional[CachedSymbol]:
+        """Непросроченная запись или None, если биржу нужно искать заново."""
+        entry = self._entries.get(self._key(token, market_type, exchange))
+        if entry is None:
+            return None
+        ttl = self.FOUND_TTL if entry.symbol else self.MISSING_TTL
+        if time.time() - entry.updated > ttl:
+            return None
+        return entry
+
+    def put(
+        self, token: str, market_type: MarketType, exchange: str, symbol: str, url: str
+    ) -> None:
+        self._entries[self._key(token, market_type, exchange)] = CachedSymbol(
+            symbol, url, time.time()
+        )
+
+    def put_missing(self, token: str, market_type: MarketType, exchange: str) -> None:
+        """Запоминает, что рынка токена на бирже нет."""
+        self._entries[self._key(token, market_type, exchange)] = CachedSymbol(
+            None, "", time.time()
+        )
+
+    def forget(self, token: str, market_type: MarketType, exchange: str) -> None:
+        self._entries.pop(self._key(token, market_type, exchange), None)
+
+    def _restore(self, payload: dict) -> None:
+        for key, entry in (payload.get("symbols") or {}).items():
+            token, _, rest = key.partition(":")
+            market_type, _, exchange = rest.partition(":")
+            try:
+                cached = CachedSymbol(entry["symbol"], entry["url"], float(entry["updated"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._entries[(token, market_type, exchange)] = cached
+
+    def _snapshot(self) -> dict:
+        now = time.time()
+        return {
+            "version": self.FILE_VERSION,
+            "symbols": {
+                f"{token}:{market_type}:{exchange}": entry._asdict()
+                for (token, market_type, exchange), entry in self._entries.items()
+                # Просроченные записи на диск не попадают
+                if now - entry.updated <= (self.FOUND_TTL if entry.symbol else self.MISSING_TTL)
+            },
+        }
@@ -0,0 +1,377 @@
+import asyncio
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Iterator, Optional, Tuple
+
+import httpx
+
+try:
+    import h2  # noqa: F401 — нужен httpx для HTTP/2
+    HTTP2_AVAILABLE = True
+except ImportError:  # pragma: no cover - зависимость опциональна
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransportPolicy:
+    """
+    Сетевая политика клиентов бирж: таймауты, число попыток, пауза между
+    повторами и общий дедлайн на один тик обновления цен.
+    Строится из настроек `network/*` и передаётся каждому клиенту.
+    """
+
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    # Максимум попыток на запрос (как «Макс. попыток» в настройках)
+    retries: int = 3
+    backoff_base: float = 0.25
+    backoff_max: float = 2.0
+    # Сколько секунд тик ждёт биржи, прежде чем рисовать то, что есть
+    tick_deadline: float = 3.0
+    # Сколько неудач подряд размыкают цепь и на сколько секунд
+    breaker_threshold: int = 5
+    breaker_cooldown: float = 30.0
+    # Пул соединений общего клиента
+    max_connections: int = 100
+    max_keepalive_connections: int = 30
+    keepalive_expiry: float = 90.0
+    # Ограничение темпа по хостам бирж; выключается для подменённой сети
+    # (воспроизведение, бенчмарк), где лимитов бирж нет
+    rate_limits: bool = True
+
+    @property
+    def attempts(self) -> int:
+        return max(1, self.retries)
+
+    def timeout(self, override: Optional[float] = None) -> httpx.Timeout:
+        """Таймаут httpx; override задаёт общий таймаут отдельного запроса."""
+        if override:
+            return httpx.Timeout(override, connect=min(self.connect_timeout, override))
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Пауза перед повтором номер `attempt` (с 1): экспоненциальный рост
+        со случайным разбросом, чтобы повторы к бирже не шли синхронно.
+        """
+        delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+        return random.uniform(delay / 2, delay)
+
+
+def create_http_client(
+    policy: Optional[TransportPolicy] = None,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """
+    Создаёт общий на всё приложение httpx-клиент с явными лимитами пула.
+    Соединения живут между сессиями мониторинга, поэтому повторный поиск
+    не платит за DNS, TCP и TLS. HTTP/2 включается, если установлен h2,
+    и договаривается с каждой биржей отдельно через ALPN.
+
+    `transport` подменяет сеть (воспроизведение записи, тесты).
+    """
+    policy = policy or TransportPolicy()
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=policy.timeout(),
+        limits=httpx.Limits(
+            max_connections=policy.max_connections,
+            max_keepalive_connections=policy.max_keepalive_connections,
+            keepalive_expiry=policy.keepalive_expiry,
+        ),
+        transport=transport,
+    )
+
+
+class RetryBudget:
+    """
+    Бюджет повторов одной биржи. Каждый запрос пополняет его на `ratio`,
+    каждый повтор тратит единицу. Когда биржа лежит, бюджет быстро
+    кончается и запросы перестают повторяться, не задерживая тики.
+    """
+
+    def __init__(self, ratio: float = 0.2, cap: float = 10.0):
+        self.ratio = ratio
+        self.cap = cap
+        self.tokens = cap
+
+    def on_request(self) -> None:
+        self.tokens = min(self.cap, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return True
+        return False
+
+
+class CircuitBreaker:
+    """
+    Автомат защиты биржи. После `failure_threshold` подряд неудачных
+    запросов цепь размыкается: биржа пропускается `cooldown` секунд,
+    затем пропускается один пробный запрос (полуоткрытое состояние).
+    Успех замыкает цепь, неудача снова размыкает её.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def remaining(self) -> float:
+        """Сколько секунд осталось до пробного запроса."""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at))
+
+    def is_open(self) -> bool:
+        """Разомкнута ли цепь прямо сейчас (без перехода в полуоткрытое)."""
+        return self.state == self.OPEN and self.remaining() > 0
+
+    def allow(self) -> bool:
+        """Можно ли отправить запрос. В полуоткрытом состоянии — только один."""
+        if self.state == self.CLOSED:
+            return True
+        if self.state == self.OPEN:
+            if self.remaining() > 0:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_in_flight = False
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+# Приоритеты запросов для RateLimiter: цены тиков идут раньше фоновой работы
+PRIORITY_LIVE = 0
+PRIORITY_BACKGROUND = 1
+
+_priority: ContextVar[int] = ContextVar("request_priority", default=PRIORITY_LIVE)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    Приоритет всех запросов внутри блока (и запущенных из него задач).
+    По умолчанию запросы считаются живыми тиками; поиск символов, списки
+    рынков и прогрев помечают себя как фоновые.
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority() -> int:
+    return _priority.get()
+
+
+# Заголовки «осталось / лимит» разных бирж (Bybit, Gate, общий вариант)
+REMAINING_HEADERS: Tuple[Tuple[str, str], ...] = (
+    ("x-bapi-limit-status", "x-bapi-limit"),
+    ("x-gate-ratelimit-requests-remain", "x-gate-ratelimit-limit"),
+    ("x-ratelimit-remaining", "x-ratelimit-limit"),
+)
+# Заголовок Binance с израсходованным весом за минуту
+USED_WEIGHT_HEADER = "x-mbx-used-weight-1m"
+# Ответы «лимит превышен» (418 — бан IP у Binance)
+THROTTLE_STATUSES = (418, 429)
+
+
+class RateLimiter:
+    """
+    Токен-бакет одного хоста биржи: `rate` запросов в секунду, запас
+    до `burst`. Темп подстраивается под ответы биржи: если заголовки
+    лимитов показывают расход выше HIGH_USAGE, темп делится пополам,
+    ниже LOW_USAGE — понемногу возвращается к исходному. Ответ 429/418
+    ставит хост на паузу по Retry-After.
+
+    Фоновые запросы (PRIORITY_BACKGROUND) не трогают последнюю
+    BACKGROUND_RESERVE часть бакета: при нехватке лимита они ждут,
+    а живые тики проходят первыми.
+    """
+
+    BACKGROUND_RESERVE = 0.5
+    HIGH_USAGE = 0.8
+    LOW_USAGE = 0.5
+    # Темп снижается не чаще раза за столько секунд: пачка ответов — одно решение
+    ADJUST_INTERVAL = 1.0
+    # Пауза после 429 без Retry-After и после 418 (бан IP у Binance)
+    PENALTY = 5.0
+    BAN_PENALTY = 60.0
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        weight_limit: Optional[int] = None,
+        host: str = "",
+    ):
+        self.host = host
+        self.base_rate = rate
+        self.rate = rate
+        self.min_rate = rate / 10
+        self.burst = burst or max(2.0, rate * 2)
+        # Лимит веса в минуту для заголовка used-weight (Binance)
+        self.weight_limit = weight_limit
+        self.tokens = self.burst
+        self.paused_until = 0.0
+        # Последний известный расход лимита по заголовкам, 0..1
+        self.usage: Optional[float] = None
+        self._updated = time.monotonic()
+        self._adjusted_at = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, priority: int = PRIORITY_LIVE, weight: float = 1.0) -> float:
+        """
+        Ждёт, пока хост можно нагрузить запросом весом `weight` (вес
+        эндпоинта по документации биржи). Возвращает время ожидания.
+        """
+        # Запрос тяжелее всего бакета иначе ждал бы вечно
+        weight = min(weight, self.burst)
+        reserve = 0.0
+        if priority != PRIORITY_LIVE:
+            reserve = min(self.burst * self.BACKGROUND_RESERVE, self.burst - weight)
+        waited = 0.0
+        while True:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self.paused_until - now
+            if delay <= 0:
+                if self.tokens - weight >= reserve:
+                    self.tokens -= weight
+                    return waited
+                delay = (weight + reserve - self.tokens) / self.rate
+            waited += delay
+            await asyncio.sleep(delay)
+
+    def observe(self, status: int, headers: httpx.Headers) -> None:
+        """Подстраивает темп по статусу и заголовкам лимитов ответа."""
+        now = time.monotonic()
+        if status in THROTTLE_STATUSES:
+            pause = _retry_after(headers) or (self.BAN_PENALTY if status == 418 else self.PENALTY)
+            self.paused_until = max(self.paused_until, now + pause)
+            self.tokens = 0.0
+            self._slow_down(now, force=True)
+            return
+        usage = self._usage(headers)
+        if usage is None:
+            return
+        self.usage = usage
+        if usage >= self.HIGH_USAGE:
+            self._slow_down(now)
+        elif usage < self.LOW_USAGE and self.rate < self.base_rate:
+            self.rate = min(self.base_rate, self.rate + self.base_rate * 0.1)
+
+    def _slow_down(self, now: float, force: bool = False) -> None:
+        if not force and now - self._adjusted_at < self.ADJUST_INTERVAL:
+            return
+        self._adjusted_at = now
+        self.rate = max(self.min_rate, self.rate / 2)
+        logger.warning(
+            "[%s] Лимит запросов близок к исчерпанию, темп снижен до %.1f/с",
+            self.host,
+            self.rate,
+        )
+
+    def _usage(self, headers: httpx.Headers) -> Optional[float]:
+        try:
+            used = headers.get(USED_WEIGHT_HEADER)
+            if used is not None and self.weight_limit:
+                return float(used) / self.weight_limit
+            for remaining_name, limit_name in REMAINING_HEADERS:
+                remaining, limit = headers.get(remaining_name), headers.get(limit_name)
+                if remaining is not None and limit:
+                    return 1.0 - float(remaining) / float(limit)
+        except ValueError:
+            return None
+        return None
+
+
+def _retry_after(headers: httpx.Headers) -> Optional[float]:
+    try:
+        return max(0.0, float(headers.get("retry-after", "")))
+    except ValueError:
+        return None
+
+
+# Темп (единиц веса в секунду; где биржа не взвешивает запросы — запросов)
+# и лимит веса в минуту по хостам. Темп заметно ниже публичных лимитов
+# бирж: по одному IP может работать не одна программа
+HOST_LIMITS: Dict[str, Tuple[float, Optional[int]]] = {
+    "api.binance.com": (40.0, 6000),
+    "fapi.binance.com": (20.0, 2400),
+    "api.bybit.com": (20.0, None),
+    "www.okx.com": (8.0, None),
+    "api.gateio.ws": (15.0, None),
+    "fx-api.gateio.ws": (15.0, None),
+    "api.bitget.com": (15.0, None),
+    "api.mexc.com": (10.0, None),
+    "contract.mexc.com": (8.0, None),
+    # 1200 единиц веса в минуту на IP; meta весит 20, allMids — 2
+    "api.hyperliquid.xyz": (15.0, None),
+}
+DEFAULT_HOST_RATE = 10.0
+
+
+def limiter_for_host(host: str) -> RateLimiter:
+    rate, weight_limit = HOST_LIMITS.get(host, (DEFAULT_HOST_RATE, None))
+    return RateLimiter(rate, weight_limit=weight_limit, host=host)
+
+
+class HostLimiters:
+    """
+    Ограничители темпа по хостам. Лимиты бирж считаются на IP, поэтому
+    клиенты приложения делят один пул (`shared`); клиенту можно передать
+    свой пул, а при `TransportPolicy.rate_limits=False` пул не используется.
+    """
+
+    def __init__(self):
+        self._limiters: Dict[str, RateLimiter] = {}
+
+    def get(self, url: str) -> RateLimiter:
+        host = _url_host(url)
+        limiter = self._limiters.get(host)
+        if limiter is None:
+            limiter = self._limiters[host] = limiter_for_host(host)
+        return limiter
+
+
+@lru_cache(maxsize=256)
+def _url_host(url: str) -> str:
+    return httpx.URL(url).host
+
+
+# Общий пул ограничителей приложения
+shared_limiters = HostLimiters()
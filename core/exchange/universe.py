@@ -0,0 +1,153 @@
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from core.exchange.base import BaseClient, MarketType
+from core.exchange.storage import JsonFileStore
+from core.exchange.transport import PRIORITY_BACKGROUND, request_priority
+
+logger = logging.getLogger(__name__)
+
+MARKET_TYPES: Tuple[MarketType, ...] = ("perp", "spot")
+
+
+class MarketIndex(JsonFileStore):
+    """
+    Индекс рынков бирж: для каждой пары (биржа, рынок) хранит множество
+    торгуемых символов. Скачивается одним массовым запросом на биржу,
+    обновляется в фоне и сохраняется на диск, поэтому поиск символа
+    по тикеру — это поиск в памяти без запросов к бирже.
+    """
+
+    FILE_VERSION = 1
+    DESCRIPTION = "индекс рынков"
+    REFRESH_INTERVAL: float = 600.0
+    # Старше этого возраста индексу биржи не доверяем и ищем символ по сети
+    MAX_AGE: float = 24 * 3600.0
+    # Если тикер не найден, а список старше этого, он перекачивается
+    # (свежий листинг мог появиться после последнего обновления)
+    MISS_REFRESH_AFTER: float = 30.0
+
+    def __init__(self, path: Optional[Path] = None):
+        super().__init__(path)
+        self._markets: Dict[Tuple[str, str], Set[str]] = {}
+        self._updated: Dict[Tuple[str, str], float] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+
+    def age(self, exchange: str, market_type: MarketType) -> Optional[float]:
+        """Возраст списка рынков в секундах или None, если его нет."""
+        updated = self._updated.get((exchange, market_type))
+        return time.time() - updated if updated is not None else None
+
+    def has(self, exchange: str, market_type: MarketType) -> bool:
+        """Есть ли у биржи достаточно свежий список рынков."""
+        age = self.age(exchange, market_type)
+        return age is not None and age < self.MAX_AGE
+
+    def is_fresh(self, exchange: str, market_type: MarketType) -> bool:
+        """Обновлён ли список только что: промаху по нему можно верить."""
+        age = self.age(exchange, market_type)
+        return age is not None and age <= self.MISS_REFRESH_AFTER
+
+    def get_markets(self, exchange: str, market_type: MarketType) -> Set[str]:
+        return self._markets.get((exchange, market_type), set())
+
+    async def resolve(
+        self, client: BaseClient, token: str, market_type: MarketType
+    ) -> Optional[str]:
+        """
+        Возвращает символ тикера на бирже или None, если рынка нет.
+        При промахе устаревший список один раз перекачивается; если
+        перекачка не удалась, промах сделан по старому списку —
+        это видно по `is_fresh`.
+        """
+        markets = self.get_markets(client.name, market_type)
+        symbol = client.resolve_symbol(token, market_type, markets)
+        if symbol:
+            return symbol
+        age = self.age(client.name, market_type)
+        if age is None or age > self.MISS_REFRESH_AFTER:
+            await self.refresh(client, market_type, max_age=self.MISS_REFRESH_AFTER)
+            markets = self.get_markets(client.name, market_type)
+            symbol = client.resolve_symbol(token, market_type, markets)
+        return symbol
+
+    async def refresh(
+        self,
+        client: BaseClient,
+        market_type: MarketType,
+        max_age: Optional[float] = None,
+    ) -> bool:
+        """
+        Перекачивает список рынков биржи. Параллельные вызовы для одной
+        биржи схлопываются: если пока ждали блокировку список обновился
+        (моложе max_age), повторного запроса не будет.
+        """
+        key = (client.name, market_type)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            age = self.age(client.name, market_type)
+            if max_age is not None and age is not None and age <= max_age:
+                return True
+            try:
+                # Списки рынков — фоновая работа: при нехватке лимита тики идут первыми
+                with request_priority(PRIORITY_BACKGROUND):
+                    if market_type == "perp":
+                        markets = await client.get_futures_markets()
+                    else:
+                        markets = await client.get_spot_markets()
+            except NotImplementedError:
+                return False
+            except Exception as e:
+                logger.warning(
+                    "[%s] Не удалось обновить список рынков %s: %s",
+                    client.name,
+                    market_type,
+                    e,
+                )
+                return False
+            if markets is None:
+                return False
+            self._markets[key] = set(markets)
+            self._updated[key] = time.time()
+            return True
+
+    async def refresh_all(
+        self,
+        clients: Iterable[BaseClient],
+        market_types: Iterable[MarketType] = MARKET_TYPES,
+    ) -> None:
+        """Обновляет все биржи параллельно и сохраняет индекс на диск."""
+        await asyncio.gather(
+            *(
+                self.refresh(client, market_type, max_age=self.MISS_REFRESH_AFTER)
+                for client in clients
+                for market_type in market_types
+            )
+        )
+        await self.save_async()
+
+    def _restore(self, payload: dict) -> None:
+        for key, entry in (payload.get("markets") or {}).items():
+            exchange, _, market_type = key.partition(":")
+            try:
+                updated = float(entry["updated"])
+                symbols = set(entry["symbols"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            self._markets[(exchange, market_type)] = symbols
+            self._updated[(exchange, market_type)] = updated
+
+    def _snapshot(self) -> dict:
+        return {
+            "version": self.FILE_VERSION,
+            "markets": {
+                f"{exchange}:{market_type}": {
+                    "updated": self._updated[(exchange, market_type)],
+                    "symbols": sorted(symbols),
+                }
+                for (exchange, market_type), symbols in self._markets.items()
+            },
+        }
@@ -0,0 +1,133 @@
+from typing import List, Optional
+
+from PyQt6.QtCore import Qt, QTimer
+from PyQt6.QtWidgets import (
+    QDialog,
+    QHBoxLayout,
+    QHeaderView,
+    QLabel,
+    QPushButton,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QVBoxLayout,
+)
+
+from core.exchange.metrics import MetricsRegistry, RequestStats
+
+COLUMNS = (
+    "Биржа / запрос", "Запросы", "Повторы", "Ошибки", "Статусы", "Получено", "Ожидание",
+    "p50", "p99", "Соединение", "TLS", "Ответ",
+)
+
+
+def _ms(value: Optional[float]) -> str:
+    return "—" if value is None else f"{value * 1000:.0f} мс"
+
+
+def _size(n: int) -> str:
+    if n >= 1024 * 1024:
+        return f"{n / 1024 / 1024:.1f} МБ"
+    return f"{n / 1024:.1f} КБ"
+
+
+def _row(title: str, stats: RequestStats) -> List[str]:
+    latency = stats.latency
+    statuses = ", ".join(f"{s}×{n}" for s, n in sorted(stats.statuses.items()))
+    failures = stats.failures
+    return [
+        title,
+        str(stats.requests),
+        str(stats.retries),
+        f"{failures} ({failures / stats.requests:.0%})" if stats.requests else "0",
+        statuses or "—",
+        _size(stats.bytes),
+        f"{stats.throttled} / {stats.throttle_seconds:.1f} с" if stats.throttled else "—",
+        _ms(latency["total"].quantile(0.5)),
+        _ms(latency["total"].quantile(0.99)),
+        _ms(latency["connect"].quantile(0.5)),
+        _ms(latency["tls"].quantile(0.5)),
+        _ms(latency["ttfb"].quantile(0.5)),
+    ]
+
+
+class DiagnosticsDialog(QDialog):
+    """
+    Панель диагностики запросов: по каждой бирже и категории запросов —
+    число попыток, повторы, ошибки, статусы, объём ответов и квантили
+    задержки по фазам (соединение, TLS, время до ответа). Обновляется
+    раз в секунду, пока открыта.
+    """
+
+    REFRESH_MS = 1000
+
+    def __init__(self, registry: MetricsRegistry, parent: Optional[object] = None):
+        super().__init__(parent)
+        self.registry = registry
+        self.setWindowTitle("Диагностика запросов")
+        self.setMinimumSize(900, 360)
+
+        self.tree = QTreeWidget()
+        self.tree.setColumnCount(len(COLUMNS))
+        self.tree.setHeaderLabels(COLUMNS)
+        self.tree.setRootIsDecorated(True)
+        self.tree.setUniformRowHeights(True)
+        header = self.tree.header()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setStretchLastSection(False)
+        self.tree.setToolTip(
+            "Задержки — оценки по гистограмме. Соединение включает разрешение DNS; "
+            "Ответ — от отправки запроса до заголовков ответа; "
+            "Ожидание — попытки, придержанные ограничителем темпа, и сколько они ждали."
+        )
+
+        self.summary_label = QLabel()
+        self.summary_label.setObjectName("statusLabel")
+        reset_button = QPushButton("Сбросить")
+        reset_button.clicked.connect(self._reset)
+        close_button = QPushButton("Закрыть")
+        close_button.clicked.connect(self.accept)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.summary_label)
+        buttons.addStretch()
+        buttons.addWidget(reset_button)
+        buttons.addWidget(close_button)
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.tree)
+        layout.addLayout(buttons)
+
+        self._expanded = set()
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(self.REFRESH_MS)
+        self.refresh()
+
+    def refresh(self) -> None:
+        # Раскрытые биржи остаются раскрытыми после перестроения дерева
+        for i in range(self.tree.topLevelItemCount()):
+            item = self.tree.topLevelItem(i)
+            if item.isExpanded():
+                self._expanded.add(item.text(0))
+            else:
+                self._expanded.discard(item.text(0))
+        self.tree.clear()
+        by_exchange = self.registry.by_exchange()
+        categories = self.registry.items()
+        for exchange, stats in by_exchange.items():
+            parent = QTreeWidgetItem(_row(exchange, stats))
+            for col in range(1, len(COLUMNS)):
+                parent.setTextAlignment(col, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            for (ex, category), cat_stats in categories:
+                if ex == exchange:
+                    child = QTreeWidgetItem(_row(category, cat_stats))
+                    for col in range(1, len(COLUMNS)):
+                        child.setTextAlignment(col, Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                    parent.addChild(child)
+            self.tree.addTopLevelItem(parent)
+            parent.setExpanded(exchange in self._expanded)
+        total = sum(stats.requests for stats in by_exchange.values())
+        self.summary_label.setText(f"Всего попыток: {total}")
+
+    def _reset(self) -> None:
+        self.registry.reset()
+        self.refresh()
@@ -0,0 +1,74 @@
+import logging
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from PyQt6.QtCore import QObject, QTimer
+
+logger = logging.getLogger(__name__)
+
+
+class RenderPump(QObject):
+    """
+    Насос перерисовки: отвязывает частоту отрисовки от частоты прихода цен.
+    Обновления копятся в буфере (для каждого ключа остаётся только
+    последнее значение), а отрисовка вызывается не чаще `fps` раз в секунду
+    и получает всё накопленное за кадр разом.
+
+    Первое обновление после простоя рисуется сразу, если предыдущий кадр
+    был больше одного интервала назад, поэтому редкие тики не ждут таймера.
+    """
+
+    def __init__(
+        self,
+        render: Callable[[Dict[Hashable, Any]], None],
+        fps: float = 15.0,
+        parent: Optional[QObject] = None,
+    ):
+        super().__init__(parent)
+        self._render = render
+        self.frame_interval = 1.0 / max(1.0, fps)
+        self._pending: Dict[Hashable, Any] = {}
+        self._received = 0
+        self._last_frame = 0.0
+        # Статистика: кадров, обновлений всего и объединено в последнем кадре
+        self.frames = 0
+        self.total_updates = 0
+        self.last_merged = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._flush)
+
+    def push(self, key: Hashable, value: Any) -> None:
+        """Кладёт значение в буфер кадра; прежнее значение ключа заменяется."""
+        self._pending[key] = value
+        self.request()
+
+    def request(self) -> None:
+        """Просит перерисовку без новых значений (данные уже обновлены)."""
+        self._received += 1
+        if self._timer.isActive():
+            return
+        wait = self.frame_interval - (time.monotonic() - self._last_frame)
+        self._timer.start(max(0, int(wait * 1000)))
+
+    def cancel(self) -> None:
+        """Сбрасывает буфер и отменяет запланированный кадр."""
+        self._timer.stop()
+        self._pending.clear()
+        self._received = 0
+
+    def _flush(self) -> None:
+        pending, self._pending = self._pending, {}
+        merged, self._received = self._received, 0
+        self._last_frame = time.monotonic()
+        self.frames += 1
+        self.total_updates += merged
+        self.last_merged = merged
+        if merged > 1:
+            logger.debug(
+                "Кадр %d: объединено обновлений: %d (новых значений: %d)",
+                self.frames,
+                merged,
+                len(pending),
+            )
+        self._render(pending)
@@ -5,6 +5,7 @@ from PyQt6.QtWidgets import (
     QCheckBox,
     QComboBox,
     QDialog,
+    QDoubleSpinBox,
     QFormLayout,
     QGroupBox,
     QHBoxLayout,
@@ -17,6 +18,10 @@ from PyQt6.QtWidgets import (
     QAbstractSpinBox,
     QVBoxLayout,
 )
+from core.exchange.base import BaseClient
+from core.exchange.metrics import MetricsServer
+
+from .diagnostics import DiagnosticsDialog
 from .widgets import HotkeyLineEdit
 
 
@@ -40,20 +45,60 @@ class SettingsDialog(QDialog):
         self.hotkey_edit.setPlaceholderText("Не задано")
         self.autostart_check = QCheckBox("Автостарт из буфера")
 
-        self.interval_spin = QSpinBox()
-        self.interval_spin.setRange(1, 3600)
+        self.interval_spin = QDoubleSpinBox()
+        self.interval_spin.setRange(0.1, 3600.0)
+        self.interval_spin.setDecimals(1)
+        self.interval_spin.setSingleStep(0.5)
         self.interval_spin.setSuffix(" сек")
         self.track_prices_check = QCheckBox("Отслеживать цены")
+        self.streaming_check = QCheckBox("Стрим цен через WebSocket")
+        self.streaming_check.setToolTip("Цены приходят сразу по сделкам; при обрыве сокета биржа опрашивается по REST.")
+        self.stagger_check = QCheckBox("Разносить опрос бирж по интервалу")
+        self.stagger_check.setToolTip("Каждая биржа опрашивается раз в интервал, но в свой момент, а не все разом.")
+        self.book_check = QCheckBox("Bid/ask вместо последней цены")
+        self.book_check.setToolTip("Лучшие цены стакана и ширина спреда — цены, по которым реально можно торговать.")
+        self.spread_check = QCheckBox("Спред между биржами")
+        self.spread_check.setToolTip("Где дешевле купить и где дороже продать токен, спред в % и б.п.")
+        self.basis_check = QCheckBox("Базис перп/спот")
+        self.basis_check.setToolTip("Для фьючерсов дополнительно опрашивается спот, базис считается по средним ценам бирж.")
+        self.history_check = QCheckBox("История: график и изменение за 1м / 5м")
+        self.history_check.setToolTip("Спарклайн за 5 минут, изменение за 1 и 5 минут, максимум и минимум в подсказке.")
+        self.record_check = QCheckBox("Записывать тики на диск")
+        self.record_check.setToolTip("Все полученные цены пишутся в бинарный файл за сутки (папка ticks) для последующего разбора.")
+        self.listing_check = QCheckBox("Ждать листинга на остальных биржах")
+        self.listing_check.setToolTip(
+            "Списки рынков бирж, где токена нет, перечитываются в фоне; "
+            "при появлении пары — уведомление и, если включено, ссылка в браузере."
+        )
 
         self.timeout_spin = QSpinBox()
         self.timeout_spin.setRange(1, 60)
         self.timeout_spin.setSuffix(" сек")
+        self.connect_timeout_spin = QSpinBox()
+        self.connect_timeout_spin.setRange(1, 30)
+        self.connect_timeout_spin.setSuffix(" сек")
         self.retries_spin = QSpinBox()
         self.retries_spin.setRange(0, 10)
+        self.deadline_spin = QDoubleSpinBox()
+        self.deadline_spin.setRange(0.5, 60.0)
+        self.deadline_spin.setDecimals(1)
+        self.deadline_spin.setSingleStep(0.5)
+        self.deadline_spin.setSuffix(" сек")
+        self.deadline_spin.setToolTip("Сколько ждать биржи за один тик; опоздавшие не задерживают остальных.")
+        self.metrics_check = QCheckBox("Метрики для Prometheus")
+        self.metrics_check.setToolTip("Счётчики и гистограммы задержек запросов на http://127.0.0.1:<порт>/metrics.")
+        self.metrics_port_spin = QSpinBox()
+        self.metrics_port_spin.setRange(1024, 65535)
+        self.diagnostics_button = QPushButton("Диагностика запросов")
+        self.diagnostics_button.setToolTip("Задержки, ошибки и статусы запросов по биржам.")
+        self.diagnostics_button.clicked.connect(self.open_diagnostics)
 
         self.interval_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
         self.timeout_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
         self.retries_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
+        self.connect_timeout_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
+        self.deadline_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
+        self.metrics_port_spin.setButtonSymbols(QAbstractSpinBox.ButtonSymbols.NoButtons)
 
         self.gate_check = QCheckBox("Gate.io")
         self.hyperliquid_check = QCheckBox("Hyperliquid")
@@ -95,10 +140,23 @@ class SettingsDialog(QDialog):
         hotkey_group.setLayout(hotkey_form)
         layout.addWidget(hotkey_group)
 
+        listing_group = QGroupBox("Листинги")
+        listing_form = QFormLayout()
+        listing_form.addRow(self.listing_check)
+        listing_group.setLayout(listing_form)
+        layout.addWidget(listing_group)
+
         behavior_group = QGroupBox("Цены")
         form_layout2 = QFormLayout()
         form_layout2.addRow(self.track_prices_check)
         form_layout2.addRow("Интервал обновления:", self.interval_spin)
+        form_layout2.addRow(self.streaming_check)
+        form_layout2.addRow(self.stagger_check)
+        form_layout2.addRow(self.book_check)
+        form_layout2.addRow(self.spread_check)
+        form_layout2.addRow(self.basis_check)
+        form_layout2.addRow(self.history_check)
+        form_layout2.addRow(self.record_check)
         behavior_group.setLayout(form_layout2)
         layout.addWidget(behavior_group)
 
@@ -130,8 +188,15 @@ class SettingsDialog(QDialog):
 
         network_group = QGroupBox("API запросы")
         form_layout3 = QFormLayout()
+        form_layout3.addRow("Таймаут подключения:", self.connect_timeout_spin)
         form_layout3.addRow("Таймаут запроса:", self.timeout_spin)
         form_layout3.addRow("Макс. попыток:", self.retries_spin)
+        form_layout3.addRow("Дедлайн тика:", self.deadline_spin)
+        metrics_layout = QHBoxLayout()
+        metrics_layout.addWidget(self.metrics_check)
+        metrics_layout.addWidget(self.metrics_port_spin)
+        form_layout3.addRow(metrics_layout)
+        form_layout3.addRow(self.diagnostics_button)
         network_group.setLayout(form_layout3)
         layout.addWidget(network_group)
 
@@ -149,7 +214,9 @@ class SettingsDialog(QDialog):
         layout.addWidget(self.save_button, alignment=Qt.AlignmentFlag.AlignRight)
         self.opacity_slider.valueChanged.connect(self.update_opacity)
         self.track_prices_check.toggled.connect(self._on_track_prices_toggled)
+        self.spread_check.toggled.connect(self._on_spread_toggled)
         self.open_browser_check.toggled.connect(self._on_open_links_toggled)
+        self.metrics_check.toggled.connect(self.metrics_port_spin.setEnabled)
         self._on_autostart_toggled(self.autostart_check.isChecked())
 
     def load_settings(self):
@@ -159,8 +226,16 @@ class SettingsDialog(QDialog):
         self.theme_combo.setCurrentText(self.settings.value("window/theme", "Dark"))
         self.hotkey_edit.setText(self.settings.value("hotkey/global", ""))
         self.autostart_check.setChecked(self.settings.value("hotkey/enable", False, type=bool))
-        self.interval_spin.setValue(int(self.settings.value("app/interval", 5)))
+        self.interval_spin.setValue(float(self.settings.value("app/interval", 5)))
         self.track_prices_check.setChecked(self.settings.value("app/track_prices", True, type=bool))
+        self.streaming_check.setChecked(self.settings.value("app/streaming", True, type=bool))
+        self.stagger_check.setChecked(self.settings.value("app/stagger", False, type=bool))
+        self.book_check.setChecked(self.settings.value("app/book", False, type=bool))
+        self.spread_check.setChecked(self.settings.value("app/spread", False, type=bool))
+        self.basis_check.setChecked(self.settings.value("app/basis", False, type=bool))
+        self.history_check.setChecked(self.settings.value("app/history", False, type=bool))
+        self.record_check.setChecked(self.settings.value("app/record", False, type=bool))
+        self.listing_check.setChecked(self.settings.value("app/listing_watch", False, type=bool))
         self.open_browser_check.setChecked(self.settings.value("app/open_browser", False, type=bool))
         new_window = self.settings.value("links/new_window", True, type=bool)
         self.links_open_mode_combo.setCurrentIndex(0 if new_window else 1)
@@ -178,6 +253,11 @@ class SettingsDialog(QDialog):
         self.bitget_check.setChecked("bitget" in enabled_exchanges)
         self.timeout_spin.setValue(int(self.settings.value("network/timeout", 10)))
         self.retries_spin.setValue(int(self.settings.value("network/retries", 3)))
+        self.connect_timeout_spin.setValue(int(self.settings.value("network/connect_timeout", 5)))
+        self.deadline_spin.setValue(float(self.settings.value("network/deadline", 3.0)))
+        self.metrics_check.setChecked(self.settings.value("network/metrics", False, type=bool))
+        self.metrics_port_spin.setValue(int(self.settings.value("network/metrics_port", MetricsServer.DEFAULT_PORT)))
+        self.metrics_port_spin.setEnabled(self.metrics_check.isChecked())
 
         self._on_track_prices_toggled(self.track_prices_check.isChecked())
         self._on_open_links_toggled(self.open_browser_check.isChecked())
@@ -193,6 +273,14 @@ class SettingsDialog(QDialog):
         self.settings.setValue("hotkey/enable", self.autostart_check.isChecked())
         self.settings.setValue("app/interval", self.interval_spin.value())
         self.settings.setValue("app/track_prices", self.track_prices_check.isChecked())
+        self.settings.setValue("app/streaming", self.streaming_check.isChecked())
+        self.settings.setValue("app/stagger", self.stagger_check.isChecked())
+        self.settings.setValue("app/book", self.book_check.isChecked())
+        self.settings.setValue("app/spread", self.spread_check.isChecked())
+        self.settings.setValue("app/basis", self.basis_check.isChecked())
+        self.settings.setValue("app/history", self.history_check.isChecked())
+        self.settings.setValue("app/record", self.record_check.isChecked())
+        self.settings.setValue("app/listing_watch", self.listing_check.isChecked())
         self.settings.setValue("app/open_browser", self.open_browser_check.isChecked())
         self.settings.setValue("links/new_window", self.links_open_mode_combo.currentIndex() == 0)
         enabled_exchanges = []
@@ -206,10 +294,27 @@ class SettingsDialog(QDialog):
         self.settings.setValue("app/exchanges", enabled_exchanges)
         self.settings.setValue("network/timeout", self.timeout_spin.value())
         self.settings.setValue("network/retries", self.retries_spin.value())
+        self.settings.setValue("network/connect_timeout", self.connect_timeout_spin.value())
+        self.settings.setValue("network/deadline", self.deadline_spin.value())
+        self.settings.setValue("network/metrics", self.metrics_check.isChecked())
+        self.settings.setValue("network/metrics_port", self.metrics_port_spin.value())
         self.accept()
 
+    def open_diagnostics(self):
+        DiagnosticsDialog(BaseClient.metrics, self).exec()
+
     def _on_track_prices_toggled(self, checked: bool):
         self.interval_spin.setEnabled(checked)
+        self.streaming_check.setEnabled(checked)
+        self.stagger_check.setEnabled(checked)
+        self.book_check.setEnabled(checked)
+        self.spread_check.setEnabled(checked)
+        self.basis_check.setEnabled(checked and self.spread_check.isChecked())
+        self.history_check.setEnabled(checked)
+        self.record_check.setEnabled(checked)
+
+    def _on_spread_toggled(self, checked: bool):
+        self.basis_check.setEnabled(checked and self.track_prices_check.isChecked())
 
     def _on_open_links_toggled(self, checked: bool):
         self.links_open_mode_combo.setEnabled(checked)
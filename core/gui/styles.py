@@ -36,7 +36,7 @@ DARK_STYLE = """
         subcontrol-position: top right; width: 20px;
         border: none;
     }
-    QTableWidget {
+    QTableView {
         background-color: #3c3c3c; border: 1px solid #444;
         border-radius: 5px; gridline-color: #444;
     }
@@ -89,7 +89,7 @@ LIGHT_STYLE = """
         subcontrol-position: top right; width: 20px;
         border: none;
     }
-    QTableWidget {
+    QTableView {
         background-color: #ffffff; border: 1px solid #ddd;
         border-radius: 5px; gridline-color: #e0e0e0;
     }
@@ -0,0 +1,255 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
+from PyQt6.QtGui import (
+    QAbstractTextDocumentLayout,
+    QBrush,
+    QColor,
+    QFont,
+    QPainter,
+    QPalette,
+    QTextDocument,
+)
+from PyQt6.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionViewItem
+
+# Содержимое строки: (подпись биржи, цена, цена в rich text?, Δ %, стиль Δ, подсказка,
+# спарклайн, изменение за 1м / 5м, подсказка истории)
+RowCells = Tuple[str, str, bool, str, Optional[str], Optional[str], str, str, Optional[str]]
+# Строка однозначно определяется парой (токен, биржа)
+RowKey = Tuple[str, str]
+
+# Роль, по которой делегат узнаёт, что цену нужно рисовать как rich text
+RICH_TEXT_ROLE = Qt.ItemDataRole.UserRole + 1
+
+COL_EXCHANGE, COL_PRICE, COL_DELTA, COL_SPARK, COL_CHANGE = range(5)
+# Колонки истории цен, которые показываются только при включённой истории
+HISTORY_COLUMNS = (COL_SPARK, COL_CHANGE)
+# Какие ячейки строки зависят от каких полей RowCells
+_CELL_FIELDS = {
+    COL_EXCHANGE: (0,),
+    COL_PRICE: (1, 2),
+    COL_DELTA: (3, 4, 5),
+    COL_SPARK: (6, 8),
+    COL_CHANGE: (7, 8),
+}
+
+# Стили ячейки Δ %: (цвет текста, цвет фона)
+DELTA_STYLES: Dict[str, Tuple[QColor, QColor]] = {
+    "up": (QColor(0, 200, 83), QColor(0, 200, 83, 30)),  # ярко-зеленый
+    "down": (QColor(255, 82, 82), QColor(255, 82, 82, 30)),  # ярко-красный
+    "error": (QColor(255, 167, 38), QColor(255, 167, 38, 30)),  # оранжевый для ошибок
+    "muted": (QColor(158, 158, 158), QColor(158, 158, 158, 30)),  # серый: пауза или устаревшая цена
+}
+
+
+class ResultsTableModel(QAbstractTableModel):
+    """
+    Модель таблицы результатов. Строки хранятся как кортежи RowCells,
+    а при обновлении сравниваются с прежними: если набор строк не
+    изменился, виду сообщается только о действительно изменённых ячейках.
+    Кисти и шрифты создаются один раз и переиспользуются.
+    """
+
+    HEADERS = ("Биржа", "Цена", "Δ %", "5 мин", "1м / 5м")
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._headers = list(self.HEADERS)
+        self._keys: List[RowKey] = []
+        self._rows: List[RowCells] = []
+        self._brushes: Dict[str, Tuple[QBrush, QBrush]] = {
+            name: (QBrush(fg), QBrush(bg)) for name, (fg, bg) in DELTA_STYLES.items()
+        }
+        self._bold = QFont()
+        self._bold.setBold(True)
+        self._center = Qt.AlignmentFlag.AlignCenter
+        self._left = Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return None
+
+    def set_price_header(self, text: str) -> None:
+        if self._headers[COL_PRICE] != text:
+            self._headers[COL_PRICE] = text
+            self.headerDataChanged.emit(Qt.Orientation.Horizontal, COL_PRICE, COL_PRICE)
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        label, price, is_rich, delta, style, tooltip, spark, change, history_tip = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return (label, price, delta, spark, change)[col]
+        if col == COL_EXCHANGE:
+            return None
+        if col in HISTORY_COLUMNS:
+            if role == Qt.ItemDataRole.TextAlignmentRole:
+                return self._center
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return history_tip
+            return None
+        if role == Qt.ItemDataRole.FontRole:
+            return self._bold
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._center if col == COL_DELTA else self._left
+        if col == COL_PRICE:
+            return is_rich if role == RICH_TEXT_ROLE else None
+        if style and role == Qt.ItemDataRole.ForegroundRole:
+            return self._brushes[style][0]
+        if style and role == Qt.ItemDataRole.BackgroundRole:
+            return self._brushes[style][1]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return tooltip
+        return None
+
+    def clear(self) -> None:
+        self.set_rows([], [])
+
+    def set_rows(self, keys: List[RowKey], rows: List[RowCells]) -> Tuple[bool, int]:
+        """
+        Применяет новое состояние таблицы. Если изменился набор строк
+        (и, значит, высота таблицы), модель сбрасывается, иначе виду
+        сообщается только о ячейках, у которых поменялось содержимое.
+
+        :return: (изменился ли набор строк, сколько ячеек изменилось)
+        """
+        if keys != self._keys:
+            self.beginResetModel()
+            self._keys = list(keys)
+            self._rows = list(rows)
+            self.endResetModel()
+            return True, len(rows) * len(self.HEADERS)
+
+        old_rows = self._rows
+        self._rows = list(rows)
+        changed = 0
+        for r, (old, new) in enumerate(zip(old_rows, rows)):
+            if old == new:
+                continue
+            for col, fields in _CELL_FIELDS.items():
+                if any(old[f] != new[f] for f in fields):
+                    idx = self.index(r, col)
+                    self.dataChanged.emit(idx, idx)
+                    changed += 1
+        return False, changed
+
+
+class PriceDelegate(QStyledItemDelegate):
+    """
+    Рисует цену. Обычные цены рисуются стандартно, а мелкие цены
+    с подстрочным числом нулей (0.0₅123) — через один общий QTextDocument,
+    без отдельного виджета на ячейку.
+    """
+
+    PADDING = 5
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._doc = QTextDocument(self)
+        self._doc.setDocumentMargin(0)
+        self._html = ""
+
+    def paint(self, painter: QPainter, option: QStyleOptionViewItem, index: QModelIndex) -> None:
+        if not index.data(RICH_TEXT_ROLE):
+            super().paint(painter, option, index)
+            return
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        html = opt.text
+        opt.text = ""
+        style = opt.widget.style() if opt.widget else QApplication.style()
+        style.drawControl(QStyle.ControlElement.CE_ItemViewItem, opt, painter, opt.widget)
+
+        if html != self._html or opt.font != self._doc.defaultFont():
+            self._doc.setDefaultFont(opt.font)
+            self._doc.setHtml(html)
+            self._html = html
+        ctx = QAbstractTextDocumentLayout.PaintContext()
+        ctx.palette.setColor(QPalette.ColorRole.Text, opt.palette.color(QPalette.ColorRole.Text))
+        rect = opt.rect.adjusted(self.PADDING, 0, 0, 0)
+        painter.save()
+        painter.translate(rect.left(), rect.top() + (rect.height() - self._doc.size().height()) / 2)
+        self._doc.documentLayout().draw(painter, ctx)
+        painter.restore()
+
+
+# Строка спреда: (токен, где купить, где продать, спред, базис, подсказка)
+SpreadCells = Tuple[str, str, str, str, str, Optional[str]]
+
+
+class SpreadTableModel(QAbstractTableModel):
+    """
+    Модель таблицы межбиржевого спреда: одна строка на токен.
+    Как и ResultsTableModel, сообщает виду только об изменённых ячейках.
+    """
+
+    HEADERS = ("Токен", "Купить", "Продать", "Спред", "Базис")
+
+    def __init__(self, parent: Optional[QObject] = None):
+        super().__init__(parent)
+        self._rows: List[SpreadCells] = []
+        self._bold = QFont()
+        self._bold.setBold(True)
+        self._center = Qt.AlignmentFlag.AlignCenter
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[col]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return row[-1]
+        if col == 0:
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return self._center
+        if role == Qt.ItemDataRole.FontRole and col == 3:
+            return self._bold
+        return None
+
+    def clear(self) -> None:
+        self.set_rows([])
+
+    def set_rows(self, rows: List[SpreadCells]) -> bool:
+        """Применяет новые строки. Возвращает True, если изменилось их число."""
+        if len(rows) != len(self._rows):
+            self.beginResetModel()
+            self._rows = list(rows)
+            self.endResetModel()
+            return True
+        old_rows = self._rows
+        self._rows = list(rows)
+        last_col = len(self.HEADERS) - 1
+        for r, (old, new) in enumerate(zip(old_rows, rows)):
+            if old == new:
+                continue
+            if old[-1] != new[-1]:
+                # Подсказка общая на строку
+                self.dataChanged.emit(self.index(r, 0), self.index(r, last_col))
+                continue
+            for col in range(len(self.HEADERS)):
+                if old[col] != new[col]:
+                    idx = self.index(r, col)
+                    self.dataChanged.emit(idx, idx)
+        return False
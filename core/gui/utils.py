@@ -1,9 +1,17 @@
+import os
 import shutil
 import subprocess
 import sys
+from pathlib import Path
 from typing import List
 
 
+def app_data_path(filename: str) -> Path:
+    """Путь к файлу в пользовательской папке данных приложения."""
+    base = os.environ.get("APPDATA") or os.path.join(os.path.expanduser("~"), ".local", "share")
+    return Path(base) / "CryptoMonitor" / filename
+
+
 def open_links_in_fresh_window(urls: List[str]) -> bool:
     """Пытается открыть все ссылки в одном НОВОМ окне выбранного браузера."""
     if not urls:
@@ -1,6 +1,7 @@
 import asyncio
 import logging
-from typing import Dict, Optional, Tuple
+import time
+from typing import Dict, List, Optional, Set, Tuple
 
 import httpx
 from PyQt6.QtCore import (
@@ -10,8 +11,9 @@ from PyQt6.QtCore import (
     Qt,
     QTimer,
 )
-from PyQt6.QtGui import QBrush, QColor, QMouseEvent, QFont, QGuiApplication
+from PyQt6.QtGui import QMouseEvent, QGuiApplication
 from PyQt6.QtWidgets import (
+    QApplication,
     QComboBox,
     QHeaderView,
     QLabel,
@@ -19,8 +21,7 @@ from PyQt6.QtWidgets import (
     QMainWindow,
     QPushButton,
     QHBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QVBoxLayout,
     QWidget,
     QAbstractScrollArea,
@@ -33,12 +34,32 @@ from core.exchange.okx import OkxClient
 from core.exchange.bybit import BybitClient
 from core.exchange.mexc import MexcClient
 from core.exchange.bitget import BitgetClient
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.stream import StreamEngine
+from core.exchange.symbols import SymbolCache
+from core.exchange.metrics import MetricsServer
+from core.exchange.transport import CircuitBreaker, TransportPolicy, create_http_client
+from core.exchange.universe import MarketIndex
+from core.history import PriceHistory
 from core.monitor import Monitor
+from core.recorder import TickRecorder
+from core.spread import SpreadBook
+from core.scheduler import FixedRateScheduler, stagger_groups
 
 from .settings import SettingsDialog
 from .styles import DARK_STYLE, LIGHT_STYLE
-from .utils import open_links_in_fresh_window, open_links_in_tabs
+from .pump import RenderPump
+from .table import (
+    COL_PRICE,
+    HISTORY_COLUMNS,
+    PriceDelegate,
+    ResultsTableModel,
+    RowCells,
+    RowKey,
+    SpreadCells,
+    SpreadTableModel,
+)
+from .utils import app_data_path, open_links_in_fresh_window, open_links_in_tabs
 from .widgets import DragHandleLabel
 import webbrowser
 import re
@@ -52,21 +73,75 @@ class MainWindow(QMainWindow):
     COMPACT_HEIGHT = 90
     MONITORING_WIDTH = 385
     MONITORING_HEIGHT = 350
-
-    def __init__(self):
+    MAX_TABLE_HEIGHT = 600
+    TABLE_ROW_HEIGHT = 28
+    # Ширины колонок (биржа, цена, Δ) для последней цены и для bid/ask
+    PRICE_COLUMNS = (130, 120, 110)
+    BOOK_COLUMNS = (110, 190, 130)
+    # Ширины колонок истории: спарклайн и изменение за 1м / 5м
+    HISTORY_WIDTHS = (100, 130)
+    MAX_WATCHLIST = 200
+    # Частота кадров насоса перерисовки: чаще глаз всё равно не заметит
+    RENDER_FPS = 15
+    # Спот для базиса опрашивается не чаще, чем раз в столько секунд
+    BASIS_INTERVAL = 5.0
+    # Чаще, чем keepalive_expiry пула, чтобы соединения не успевали закрыться
+    WARMUP_INTERVAL = 60
+    # Как часто перечитываются списки рынков бирж в ожидании листинга
+    LISTING_INTERVAL = 10.0
+
+    def __init__(
+        self,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        exchanges: Optional[List[str]] = None,
+        interval: Optional[float] = None,
+    ):
         super().__init__()
+        # Воспроизведение записи: сеть подменена транспортом, кэши на диске не трогаются,
+        # биржи и интервал опроса берутся из записи, а не из настроек
+        self.replay_mode = transport is not None
+        self.exchanges_override = exchanges
+        self.interval_override = interval
         self.settings = QSettings("CryptoMonitor", "App")
         self.worker_task: Optional[asyncio.Task] = None
-        self.http_client: Optional[httpx.AsyncClient] = None
         self.old_pos: Optional[QPoint] = None
-        self.known_symbols: Dict[str, str] = {}
-        self.urls_map: Dict[str, str] = {}
-        self.baseline_prices: Dict[str, float] = {}
+        self.tokens: List[str] = []
+        self.known_symbols: Dict[str, Dict[str, str]] = {}
+        self.urls_map: Dict[str, Dict[str, str]] = {}
+        self.baseline_prices: Dict[str, Dict[str, float]] = {}
+        self.latest_data: Dict[str, Dict[str, Tuple[str, float, str]]] = {}
+        self.latest_errors: Dict[str, Dict[str, str]] = {}
+        # Лучшие bid/ask бирж, когда вместо последней цены отслеживается стакан
+        self.latest_books: Dict[str, Dict[str, BookTicker]] = {}
+        # История цен по (биржа, символ) для спарклайна и изменений за 1м / 5м
+        self.price_history: Dict[Tuple[str, str], PriceHistory] = {}
+        self.history_enabled = False
+        # Запись всех полученных цен на диск (включается в настройках)
+        self.recorder: Optional[TickRecorder] = None
+        self._status_text = ""
+        self.market_type: MarketType = "perp"
+        # Межбиржевой спред и базис, обновляются по мере прихода цен
+        self.spread_book = SpreadBook()
         self.exchange_order = BaseClient.get_supported_exchanges()
+        self.market_index = MarketIndex(None if self.replay_mode else app_data_path("markets.json"))
+        self.market_index.load()
+        self.symbol_cache = SymbolCache(None if self.replay_mode else app_data_path("symbols.json"))
+        self.symbol_cache.load()
+        self.index_task: Optional[asyncio.Task] = None
+        self.warmup_task: Optional[asyncio.Task] = None
+        self.monitor: Optional[Monitor] = None
+        # HTTP-эндпоинт метрик для Prometheus (включается в настройках)
+        self.metrics_server: Optional[MetricsServer] = None
 
         self.setup_ui()
+        self.render_pump = RenderPump(self._render_frame, fps=self.RENDER_FPS, parent=self)
         self.apply_settings()
         self._register_global_hotkey()
+        # Один клиент на всё время жизни приложения: пул соединений переживает
+        # сессии мониторинга, и повторный поиск не платит за DNS/TCP/TLS
+        self.http_client = create_http_client(self._transport_policy(), transport)
+        if not self.replay_mode:
+            QTimer.singleShot(0, self._start_background_tasks)
 
     def setup_ui(self):
         """Настройка интерфейса главного окна."""
@@ -86,7 +161,7 @@ class MainWindow(QMainWindow):
         controls_layout.setSpacing(10)
 
         self.token_input = QLineEdit()
-        self.token_input.setPlaceholderText("Найти токен...")
+        self.token_input.setPlaceholderText("Найти токен (или ETH, SOL, ...)")
         self.token_input.returnPressed.connect(self.start_monitoring)
         controls_layout.addWidget(self.token_input)
 
@@ -114,21 +189,23 @@ class MainWindow(QMainWindow):
         self.error_label.hide()
         self.main_layout.addWidget(self.error_label)
 
-        self.results_table = QTableWidget()
-        self.results_table.setColumnCount(3)
-        self.results_table.setHorizontalHeaderLabels(["Биржа", "Цена", "Δ %"])
+        self.results_model = ResultsTableModel(self)
+        self.results_table = QTableView()
+        self.results_table.setModel(self.results_model)
+        self.results_table.setItemDelegateForColumn(COL_PRICE, PriceDelegate(self.results_table))
         header = self.results_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Fixed)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)
-        self.results_table.setColumnWidth(0, 130)
-        self.results_table.setColumnWidth(1, 120)
-        self.results_table.setColumnWidth(2, 110)
-        self.results_table.verticalHeader().setVisible(False)
-        self.results_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        for col in range(self.results_model.columnCount()):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
+        self._set_price_columns(book_mode=False)
+        # Высота строк фиксирована: таблица не пересчитывает её на каждом тике
+        vertical_header = self.results_table.verticalHeader()
+        vertical_header.setVisible(False)
+        vertical_header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        vertical_header.setDefaultSectionSize(self.TABLE_ROW_HEIGHT)
+        self.results_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
         self.results_table.setShowGrid(False)
         self.results_table.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.results_table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.results_table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
         self.results_table.setSizeAdjustPolicy(QAbstractScrollArea.SizeAdjustPolicy.AdjustToContents)
         self.results_table.setSortingEnabled(False)
         header = self.results_table.horizontalHeader()
@@ -137,6 +214,26 @@ class MainWindow(QMainWindow):
         self.results_table.hide()
         self.main_layout.addWidget(self.results_table)
 
+        self.spread_model = SpreadTableModel(self)
+        self.spread_table = QTableView()
+        self.spread_table.setModel(self.spread_model)
+        spread_header = self.spread_table.horizontalHeader()
+        for col, width in enumerate((48, 76, 76, 100)):
+            spread_header.setSectionResizeMode(col, QHeaderView.ResizeMode.Fixed)
+            self.spread_table.setColumnWidth(col, width)
+        spread_header.setStretchLastSection(True)
+        spread_header.setSectionsClickable(False)
+        spread_vertical = self.spread_table.verticalHeader()
+        spread_vertical.setVisible(False)
+        spread_vertical.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        spread_vertical.setDefaultSectionSize(self.TABLE_ROW_HEIGHT)
+        self.spread_table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.spread_table.setShowGrid(False)
+        self.spread_table.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.spread_table.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAsNeeded)
+        self.spread_table.hide()
+        self.main_layout.addWidget(self.spread_table)
+
         self.status_label = QLabel("")
         self.status_label.setObjectName("statusLabel")
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -156,6 +253,19 @@ class MainWindow(QMainWindow):
         self.main_widget.setStyleSheet(style)
         self._apply_behavior_visibility()
         self._register_global_hotkey()
+        self._apply_metrics_endpoint()
+
+    def _apply_metrics_endpoint(self) -> None:
+        """Открывает, переносит на другой порт или закрывает эндпоинт метрик."""
+        enabled = self.settings.value("network/metrics", False, type=bool)
+        port = int(self.settings.value("network/metrics_port", MetricsServer.DEFAULT_PORT))
+        server = self.metrics_server
+        if server and (not enabled or server.port != port):
+            asyncio.ensure_future(server.stop())
+            self.metrics_server = None
+        if enabled and self.metrics_server is None:
+            self.metrics_server = MetricsServer(BaseClient.metrics, port=port)
+            asyncio.ensure_future(self.metrics_server.start())
 
     def _register_global_hotkey(self) -> None:
         """Регистрирует/снимает глобальный хоткей из настроек.
@@ -212,6 +322,17 @@ class MainWindow(QMainWindow):
         m2 = re.search(r"\b([A-Z0-9]{2,10})\b", s)
         return m2.group(1) if m2 else ""
 
+    @classmethod
+    def _parse_tokens(cls, text: str) -> List[str]:
+        """Разбирает ввод в список тикеров для вотчлиста.
+        Разделители — запятая, точка с запятой и пробелы; дубли отбрасываются,
+        порядок сохраняется, длина ограничена MAX_WATCHLIST."""
+        tokens: List[str] = []
+        for part in re.split(r"[,;\s]+", (text or "").strip().upper()):
+            if part and part not in tokens:
+                tokens.append(part)
+        return tokens[: cls.MAX_WATCHLIST]
+
     def open_settings_dialog(self):
         """Открывает диалог настроек."""
         dialog = SettingsDialog(self.settings, self)
@@ -227,6 +348,7 @@ class MainWindow(QMainWindow):
 
         if is_monitoring:
             self.results_table.show()
+            self.spread_table.setVisible(self._spread_enabled())
             self.status_label.show()
             self.setFixedWidth(self.MONITORING_WIDTH)
             self.setMinimumHeight(self.MONITORING_HEIGHT)
@@ -234,6 +356,7 @@ class MainWindow(QMainWindow):
             self.adjustSize()
         else:
             self.results_table.hide()
+            self.spread_table.hide()
             self.status_label.hide()
             self.setFixedSize(self.COMPACT_WIDTH, self.COMPACT_HEIGHT)
 
@@ -242,8 +365,8 @@ class MainWindow(QMainWindow):
         if self.worker_task and not self.worker_task.done():
             return
 
-        token = self.token_input.text().strip().upper()
-        if not token:
+        tokens = self._parse_tokens(self.token_input.text())
+        if not tokens:
             self.show_error("Введите название токена.")
             return
 
@@ -251,9 +374,11 @@ class MainWindow(QMainWindow):
         if track_prices:
             self.set_monitoring_state(True)
         self.error_label.hide()
-        self.results_table.setRowCount(0)
+        self.results_model.clear()
+        self.spread_model.clear()
+        self.spread_book.clear()
 
-        self.worker_task = asyncio.create_task(self.run_monitor_loop(token))
+        self.worker_task = asyncio.create_task(self.run_monitor_loop(tokens))
 
     def stop_monitoring(self):
         """Останавливает процесс мониторинга."""
@@ -266,82 +391,155 @@ class MainWindow(QMainWindow):
         self.error_label.show()
         QTimer.singleShot(duration, self.error_label.hide)
 
-    async def run_monitor_loop(self, token: str):
-        """Основная асинхронная логика поиска и обновления цен."""
+    async def run_monitor_loop(self, tokens: List[str]):
+        """Основная асинхронная логика поиска и обновления цен.
+        Один токен и вотчлист обрабатываются одинаково: за тик каждая биржа
+        опрашивается один раз сразу по всем отслеживаемым символам.
+        Биржи с живым WebSocket обновляются стримом, остальные — по REST."""
+        stream: Optional[StreamEngine] = None
+        basis_task: Optional[asyncio.Task] = None
+        listing_task: Optional[asyncio.Task] = None
         try:
             market_type = "perp" if self.market_type_combo.currentText() == "Futures" else "spot"
-            enabled_exchanges = self.settings.value("app/exchanges", type=list)
+            self.market_type = market_type
+            enabled_exchanges = self.exchanges_override or self.settings.value("app/exchanges", type=list)
             track_prices = self.settings.value("app/track_prices", True, type=bool)
             open_links_flag = self.settings.value("app/open_browser", False, type=bool)
             open_new_window = self.settings.value("links/new_window", True, type=bool)
+            policy = self._transport_policy()
 
-            _TIMEOUT = int(self.settings.value("network/timeout", 10))
-            _MAX_RETRIES = int(self.settings.value("network/retries", 3))
-
-            self.http_client = httpx.AsyncClient()
-            clients = []
-            if "gate" in enabled_exchanges:
-                clients.append(GateClient(self.http_client))
-            if "binance" in enabled_exchanges:
-                clients.append(BinanceClient(self.http_client))
-            if "okx" in enabled_exchanges:
-                clients.append(OkxClient(self.http_client))
-            if "bybit" in enabled_exchanges:
-                clients.append(BybitClient(self.http_client))
-            if "mexc" in enabled_exchanges:
-                clients.append(MexcClient(self.http_client))
-            if "bitget" in enabled_exchanges:
-                clients.append(BitgetClient(self.http_client))
-            if "hyperliquid" in enabled_exchanges and market_type == 'perp':
-                clients.append(HyperliquidClient(self.http_client))
+            clients = self._build_clients(self.http_client, enabled_exchanges, policy)
 
             if not clients:
                 self.show_error("Не выбрана ни одна биржа в настройках.")
                 return
 
-            mon = Monitor(clients=clients)
-            logging.info(f"Начинаю поиск {token} на рынке {market_type}...")
-            initial_data, initial_errors = await mon.query(token, market_type)
-
-            if not initial_data and not initial_errors:
-                self.show_error(f"Токен '{token}' не найден.", duration=10000)
-                return
-
-            self.known_symbols = {name: payload[0] for name, payload in initial_data.items()}
-            self.urls_map = {name: payload[2] for name, payload in initial_data.items()}
-            self.baseline_prices = {name: payload[1] for name, payload in initial_data.items()}
-
-            if open_links_flag:
-                urls = list(self.urls_map.values())
-                if urls:
-                    if open_new_window:
-                        if not open_links_in_fresh_window(urls):
-                            webbrowser.open_new(urls[0])
-                            for url in urls[1:]:
-                                webbrowser.open_new_tab(url)
-                    else:
-                        if not open_links_in_tabs(urls):
-                            webbrowser.open_new(urls[0])
-                            for url in urls[1:]:
-                                webbrowser.open_new_tab(url)
+            mon = Monitor(
+                clients=clients, index=self.market_index, symbols=self.symbol_cache, tick_deadline=policy.tick_deadline
+            )
+            self.monitor = mon
+            self.tokens = tokens
+            self.known_symbols, self.urls_map, self.baseline_prices = {}, {}, {}
+            self.latest_data, self.latest_errors, self.latest_books = {}, {}, {}
+            self.price_history = {}
+            self.history_enabled = track_prices and self.settings.value("app/history", False, type=bool)
+            if track_prices and not self.replay_mode and self.settings.value("app/record", False, type=bool):
+                self.recorder = TickRecorder(app_data_path("ticks"))
+                self.recorder.start()
+            # В режиме вотчлиста ссылки не открываются: это десятки вкладок на токен
+            open_links = open_links_flag and len(tokens) == 1
+            links_opened = 0
+            logging.info(f"Начинаю поиск {', '.join(tokens)} на рынке {market_type}...")
+
+            # Строки и ссылки появляются по мере ответа бирж, а не после самой медленной
+            async for token, name, payload, error in mon.iter_query_watchlist(tokens, market_type):
+                if error:
+                    self.latest_errors.setdefault(token, {})[name] = error
+                if payload:
+                    symbol, price, url = payload
+                    self.known_symbols.setdefault(token, {})[name] = symbol
+                    self.urls_map.setdefault(token, {})[name] = url
+                    self.baseline_prices.setdefault(token, {})[name] = price
+                    self._store_price(token, name, payload)
+                    if open_links:
+                        self._open_found_link(url, first=links_opened == 0, new_window=open_new_window)
+                        links_opened += 1
+                if track_prices and (payload or error):
+                    self.render_pump.request()
+            await self.symbol_cache.save_async()
+
+            missing: Dict[str, Set[str]] = {}
+            if self.settings.value("app/listing_watch", False, type=bool):
+                for token in tokens:
+                    answered = {*self.known_symbols.get(token, {}), *self.latest_errors.get(token, {})}
+                    names = {c.name for c in clients} - answered
+                    if names:
+                        missing[token] = names
+
+            if not self.latest_data and not self.latest_errors:
+                if not missing:
+                    self.show_error(f"Токен '{', '.join(tokens)}' не найден.", duration=10000)
+                    return
+                self.show_error(f"Токен '{', '.join(tokens)}' не найден, жду листинга.", duration=10000)
+
+            if missing:
+                venues = sorted({name for names in missing.values() for name in names})
+                logging.info(f"Жду листинга на: {', '.join(venues)}")
+
+                def on_listed(token: str, name: str, payload: Tuple[str, float, str]) -> None:
+                    symbol, price, url = payload
+                    logging.warning(f"Листинг {token} на {name}: {symbol} по {price:g}")
+                    self.known_symbols.setdefault(token, {})[name] = symbol
+                    self.urls_map.setdefault(token, {})[name] = url
+                    self.baseline_prices.setdefault(token, {})[name] = price
+                    self.latest_errors.get(token, {}).pop(name, None)
+                    self._store_price(token, name, payload)
+                    self.show_error(f"Листинг {token} на {name.capitalize()}: {symbol}", duration=15000)
+                    QApplication.beep()
+                    if open_links_flag:
+                        self._open_found_link(url, first=True, new_window=open_new_window)
+                    self.render_pump.request()
+
+                listing_task = asyncio.create_task(
+                    mon.watch_listings(missing, market_type, on_listed, self.LISTING_INTERVAL)
+                )
 
             if not track_prices:
+                if listing_task:
+                    # Ожидание листинга можно остановить только кнопкой «Стоп»
+                    self.set_monitoring_state(True)
+                    self.render_pump.request()
+                    await listing_task
                 return
 
-            self.update_table(initial_data, errors=initial_errors)
-            self.adjustSize()
-            interval = int(self.settings.value("app/interval", 5))
-            logging.info(f"Запуск обновления каждые {interval} сек.")
-
-            while True:
-                await asyncio.sleep(interval)
-                new_prices, fetch_errors = await mon.fetch_prices_for_known_symbols(self.known_symbols, market_type)
-                updated_data = {
-                    name: (self.known_symbols[name], price, self.urls_map[name])
-                    for name, price in new_prices.items() if name in self.known_symbols
-                }
-                self.update_table(updated_data, errors=fetch_errors)
-                self.adjustSize()
+            self.render_pump.request()
+            interval = self.interval_override or float(self.settings.value("app/interval", 5))
+            # При разнесении каждая биржа получает свой слот внутри периода
+            found = {name for symbols in self.known_symbols.values() for name in symbols}
+            polled = [c.name for c in clients if c.name in found]
+            slots = len(polled) if self.settings.value("app/stagger", False, type=bool) else 1
+            groups = stagger_groups(polled, slots)
+            scheduler = FixedRateScheduler(interval, slots=len(groups))
+            logging.info(f"Запуск обновления каждые {scheduler.period:g} сек. (слотов: {len(groups)})")
+
+            book_mode = self.settings.value("app/book", False, type=bool)
+            self._set_price_columns(book_mode, history=self.history_enabled)
+            if book_mode:
+                # Стримы бирж подписаны на сделки, а не на стакан: bid/ask идут по REST
+                logging.info("Отслеживаются bid/ask, стрим сделок не используется.")
+            elif not self.replay_mode and self.settings.value("app/streaming", True, type=bool):
+                stream = mon.start_streaming(self.known_symbols, market_type, self._on_stream_price)
+            if market_type == "perp" and self._spread_enabled() and self.settings.value("app/basis", False, type=bool):
+                basis_task = asyncio.create_task(self._track_spot_basis(tokens, interval, enabled_exchanges, policy))
+
+            async for slot in scheduler.ticks():
+                # Биржи, найденные по листингу, дописываются в конец и раскладываются
+                # по слотам текущего расписания; у остальных слот не меняется
+                listed = {name for symbols in self.known_symbols.values() for name in symbols}
+                if listed != found:
+                    found = listed
+                    polled += [c.name for c in clients if c.name in found and c.name not in polled]
+                    groups = stagger_groups(polled, scheduler.slots)
+                group = groups[slot]
+                # Символы, цены которых идут по стриму, по REST не опрашиваются
+                live = stream.live_symbols if stream else set()
+                skip = found - set(group)
+                # Тик не должен наезжать на следующий: опоздавшие переносятся
+                deadline = min(policy.tick_deadline, scheduler.time_to_next())
+                new_prices, fetch_errors = await mon.fetch_prices_for_watchlist(
+                    self.known_symbols, market_type, exclude_exchanges=skip, deadline=deadline,
+                    books=book_mode, exclude_symbols=live,
+                )
+                self._apply_tick_prices(new_prices, skip, live, mon.stragglers, book_mode)
+                for token in list(self.latest_errors):
+                    per_token = self.latest_errors[token]
+                    for name in group:
+                        per_token.pop(name, None)
+                    if not per_token:
+                        del self.latest_errors[token]
+                for token, per_token in fetch_errors.items():
+                    self.latest_errors.setdefault(token, {}).update(per_token)
+                self.render_pump.request()
 
         except asyncio.CancelledError:
             logging.info("Задача была отменена.")
@@ -349,91 +547,411 @@ class MainWindow(QMainWindow):
             logging.critical(f"Непредвиденная ошибка в воркере: {e}", exc_info=True)
             self.show_error("Произошла критическая ошибка. Подробности см. в логе.", duration=10000)
         finally:
-            if self.http_client:
-                await self.http_client.aclose()
+            for task in (basis_task, listing_task):
+                if task:
+                    task.cancel()
+                    await asyncio.gather(task, return_exceptions=True)
+            if listing_task:
+                await self.symbol_cache.save_async()
+            if self.recorder:
+                await self.recorder.close()
+                logging.info(f"Записано тиков: {self.recorder.recorded}")
+                self.recorder = None
+            if stream:
+                await stream.stop()
+            if self.monitor:
+                self.monitor.cancel_pending()
+            self.render_pump.cancel()
             self.worker_task = None
+            self.monitor = None
             self.set_monitoring_state(False)
 
-    def update_table(self, data: Dict[str, Tuple[str, float, str]], errors: Optional[Dict[str, str]] = None):
-        """Обновляет QTableWidget без изменения размера окна."""
-        errors = errors or {}
-        current_time = QDateTime.currentDateTime().toString("HH:mm:ss.zzz")
-        token = self.token_input.text().strip().upper()
-        market_text = self.market_type_combo.currentText()
-        status_text = f"{market_text} • {token} • Обновлено {current_time}"
-        self.status_label.setText(status_text)
+    @staticmethod
+    def _open_found_link(url: str, first: bool, new_window: bool) -> None:
+        """Открывает ссылку найденной биржи сразу по её ответу.
+        Первая ссылка открывает новое окно (если так настроено),
+        следующие добавляются вкладками."""
+        if first and new_window:
+            if not open_links_in_fresh_window([url]):
+                webbrowser.open_new(url)
+        elif not open_links_in_tabs([url]):
+            webbrowser.open_new_tab(url)
+
+    def _transport_policy(self) -> TransportPolicy:
+        """Собирает сетевую политику клиентов из настроек network/*."""
+        return TransportPolicy(
+            connect_timeout=float(self.settings.value("network/connect_timeout", 5)),
+            read_timeout=float(self.settings.value("network/timeout", 10)),
+            retries=int(self.settings.value("network/retries", 3)),
+            tick_deadline=float(self.settings.value("network/deadline", 3.0)),
+            # У воспроизведения лимитов бирж нет: ограничитель только замедлил бы ленту
+            rate_limits=not self.replay_mode,
+        )
+
+    @staticmethod
+    def _build_clients(
+        http_client: httpx.AsyncClient,
+        enabled_exchanges: List[str],
+        policy: TransportPolicy,
+    ) -> List[BaseClient]:
+        """Создает клиентов включенных бирж; клиент обслуживает оба рынка."""
+        clients: List[BaseClient] = []
+        if "gate" in enabled_exchanges:
+            clients.append(GateClient(http_client, policy))
+        if "binance" in enabled_exchanges:
+            clients.append(BinanceClient(http_client, policy))
+        if "okx" in enabled_exchanges:
+            clients.append(OkxClient(http_client, policy))
+        if "bybit" in enabled_exchanges:
+            clients.append(BybitClient(http_client, policy))
+        if "mexc" in enabled_exchanges:
+            clients.append(MexcClient(http_client, policy))
+        if "bitget" in enabled_exchanges:
+            clients.append(BitgetClient(http_client, policy))
+        if "hyperliquid" in enabled_exchanges:
+            clients.append(HyperliquidClient(http_client, policy))
+        return clients
+
+    def _start_background_tasks(self) -> None:
+        if self.index_task is None:
+            self.index_task = asyncio.ensure_future(self._refresh_market_index_loop())
+        if self.warmup_task is None:
+            self.warmup_task = asyncio.ensure_future(self._keep_connections_warm())
+
+    def _background_clients(self) -> List[BaseClient]:
+        """Клиенты всех включенных бирж (оба рынка) на общем http-клиенте."""
+        enabled_exchanges = self.settings.value(
+            "app/exchanges", BaseClient.get_supported_exchanges(), type=list
+        )
+        return self._build_clients(self.http_client, enabled_exchanges, self._transport_policy())
+
+    async def _refresh_market_index_loop(self) -> None:
+        """Фоновое обновление индекса рынков включенных бирж."""
+        try:
+            while True:
+                try:
+                    await self.market_index.refresh_all(self._background_clients())
+                except Exception as e:
+                    logging.warning(f"Не удалось обновить индекс рынков: {e}")
+                await asyncio.sleep(MarketIndex.REFRESH_INTERVAL)
+        except asyncio.CancelledError:
+            pass
+
+    async def _keep_connections_warm(self) -> None:
+        """Держит пул соединений с биржами тёплым, пока мониторинг простаивает.
+        Во время мониторинга соединения и так заняты запросами цен."""
+        try:
+            while True:
+                if self.worker_task is None:
+                    try:
+                        await Monitor(clients=self._background_clients()).warm_up()
+                    except Exception as e:
+                        logging.warning(f"Не удалось прогреть соединения: {e}")
+                await asyncio.sleep(self.WARMUP_INTERVAL)
+        except asyncio.CancelledError:
+            pass
 
-        all_names = list({*data.keys(), *errors.keys()})
+    def _on_stream_price(self, token: str, ex_name: str, price: float) -> None:
+        """Принимает цену из WebSocket: она ждёт ближайшего кадра в буфере насоса,
+        и из серии сделок между кадрами до таблицы доходит только последняя."""
+        if ex_name in self.known_symbols.get(token, {}):
+            self.render_pump.push((token, ex_name), price)
+
+    def _store_price(
+        self,
+        token: str,
+        ex_name: str,
+        payload: Tuple[str, float, str],
+        quote: Optional[BookTicker] = None,
+    ) -> None:
+        """Сохраняет цену (и стакан, если есть) биржи для таблицы и учитывает её в спреде."""
+        self.latest_data.setdefault(token, {})[ex_name] = payload
+        if quote:
+            self.latest_books.setdefault(token, {})[ex_name] = quote
+        self.spread_book.update(token, self.market_type, ex_name, payload[1], quote)
+        # Нулевая цена (нет торгов) в историю не попадает и запись не заводит
+        if self.history_enabled and payload[1] > 0:
+            key = (ex_name, payload[0])
+            history = self.price_history.get(key)
+            if history is None:
+                history = self.price_history[key] = PriceHistory()
+            history.add(time.monotonic(), payload[1])
+        if self.recorder:
+            self.recorder.record(ex_name, self.market_type, payload[0], payload[1])
+
+    def _apply_tick_prices(
+        self,
+        new_prices: Dict[str, Dict[str, object]],
+        skip: Set[str],
+        live: Set[Tuple[str, str]],
+        stragglers: Set[str],
+        book_mode: bool,
+    ) -> None:
+        """
+        Раскладывает цены тика по таблице. Пришедшая цена применяется, даже
+        если биржа не в слоте этого тика: так доставляется запрос, перенесённый
+        с прошлого тика. Без цены биржа чужого слота и опоздавшая сохраняют
+        последнюю цену (опоздавшая — помеченную как устаревшая).
+        """
+        for token, symbols in self.known_symbols.items():
+            for name, symbol in symbols.items():
+                # Цены символа из стрима новее любого ответа REST
+                if (name, symbol) in live:
+                    continue
+                price = new_prices.get(token, {}).get(name)
+                if price is None:
+                    if name not in skip and name not in stragglers:
+                        self._drop_price(token, name)
+                    continue
+                if book_mode:
+                    payload = (symbol, price.mid, self.urls_map[token][name])
+                    self._store_price(token, name, payload, quote=price)
+                else:
+                    self._store_price(token, name, (symbol, price, self.urls_map[token][name]))
+                self.latest_errors.get(token, {}).pop(name, None)
+
+    def _drop_price(self, token: str, ex_name: str) -> None:
+        self.latest_books.get(token, {}).pop(ex_name, None)
+        if self.latest_data.get(token, {}).pop(ex_name, None) is not None:
+            self.spread_book.remove(token, self.market_type, ex_name)
+
+    def _set_price_columns(self, book_mode: bool, history: bool = False) -> None:
+        """Колонка цены показывает последнюю цену или пару bid / ask;
+        колонки истории видны, только когда история включена."""
+        self.results_model.set_price_header("Bid / Ask" if book_mode else "Цена")
+        widths = self.BOOK_COLUMNS if book_mode else self.PRICE_COLUMNS
+        for col, width in enumerate(widths):
+            self.results_table.setColumnWidth(col, width)
+        for col, width in zip(HISTORY_COLUMNS, self.HISTORY_WIDTHS):
+            self.results_table.setColumnWidth(col, width)
+            self.results_table.setColumnHidden(col, not history)
+        if history:
+            widths = (*widths, *self.HISTORY_WIDTHS)
+        if self.worker_task is not None:
+            # Пара bid / ask и история не помещаются в компактную ширину — окно расширяется
+            margins = self.MONITORING_WIDTH - sum(self.PRICE_COLUMNS)
+            self.setFixedWidth(max(self.MONITORING_WIDTH, sum(widths) + margins))
+
+    def _spread_enabled(self) -> bool:
+        return self.settings.value("app/spread", False, type=bool)
+
+    async def _track_spot_basis(
+        self,
+        tokens: List[str],
+        interval: float,
+        enabled_exchanges: List[str],
+        policy: TransportPolicy,
+    ) -> None:
+        """Следит за спотовыми ценами токенов, чтобы считать базис перп/спот.
+        Споту хватает отдельного, более редкого опроса: базис меняется медленно."""
+        clients = self._build_clients(self.http_client, enabled_exchanges, policy)
+        if not clients:
+            return
+        spot_mon = Monitor(
+            clients=clients, index=self.market_index, symbols=self.symbol_cache, tick_deadline=policy.tick_deadline
+        )
+        spot_symbols: Dict[str, Dict[str, str]] = {}
+        try:
+            async for token, name, payload, _ in spot_mon.iter_query_watchlist(tokens, "spot"):
+                if payload:
+                    spot_symbols.setdefault(token, {})[name] = payload[0]
+                    self.spread_book.update(token, "spot", name, payload[1])
+                    self.render_pump.request()
+            await self.symbol_cache.save_async()
+            if not spot_symbols:
+                return
+            scheduler = FixedRateScheduler(max(interval, self.BASIS_INTERVAL))
+            async for _ in scheduler.ticks():
+                prices, _ = await spot_mon.fetch_prices_for_watchlist(spot_symbols, "spot")
+                for token, symbols in spot_symbols.items():
+                    for name in symbols:
+                        if name in spot_mon.stragglers:
+                            continue
+                        price = prices.get(token, {}).get(name)
+                        if price is None:
+                            self.spread_book.remove(token, "spot", name)
+                        else:
+                            self.spread_book.update(token, "spot", name, price)
+                self.render_pump.request()
+        finally:
+            spot_mon.cancel_pending()
+
+    def _render_frame(self, prices: Dict[Tuple[str, str], float]) -> None:
+        """Кадр насоса: применяет накопленные цены стрима и обновляет таблицу."""
+        if self.worker_task is None:
+            return
+        for (token, ex_name), price in prices.items():
+            symbol = self.known_symbols[token][ex_name]
+            self._store_price(token, ex_name, (symbol, price, self.urls_map[token][ex_name]))
+            self.latest_errors.get(token, {}).pop(ex_name, None)
+        self.update_table(self.latest_data, errors=self.latest_errors)
+
+    def update_table(
+        self,
+        data: Dict[str, Dict[str, Tuple[str, float, str]]],
+        errors: Optional[Dict[str, Dict[str, str]]] = None,
+    ):
+        """Обновляет модель таблицы: перерисовываются только изменившиеся ячейки,
+        а размер окна пересчитывается, только когда меняется число строк.
+        Строки идут по токенам в порядке ввода, внутри токена — по биржам.
+        Время в статусе — момент последнего изменения таблицы."""
+        errors = errors or {}
         def _key(name: str) -> tuple:
             try:
                 idx = self.exchange_order.index(name)
             except ValueError:
                 idx = 999
             return (idx, name)
-        all_names.sort(key=_key)
-        self.results_table.setRowCount(len(all_names))
-        for i, ex_name in enumerate(all_names):
-            payload = data.get(ex_name)
-            err_text = errors.get(ex_name)
+
+        keys: List[RowKey] = []
+        for token in self.tokens:
+            names = list({*data.get(token, {}).keys(), *errors.get(token, {}).keys()})
+            names.sort(key=_key)
+            keys.extend((token, name) for name in names)
+
+        is_watchlist = len(self.tokens) > 1
+        health = self.monitor.health() if self.monitor else {}
+        stragglers = self.monitor.stragglers if self.monitor else set()
+        rows: List[RowCells] = []
+        for token, ex_name in keys:
+            payload = data.get(token, {}).get(ex_name)
+            err_text = errors.get(token, {}).get(ex_name)
             if payload:
                 _, price, _ = payload
             else:
                 price = None
-            ex_item = QTableWidgetItem(ex_name.capitalize())
-            self.results_table.setItem(i, 0, ex_item)
+            quote = self.latest_books.get(token, {}).get(ex_name)
+            ex_label = f"{token} · {ex_name.capitalize()}" if is_watchlist else ex_name.capitalize()
 
-            base = self.baseline_prices.get(ex_name)
+            base = self.baseline_prices.get(token, {}).get(ex_name)
             delta = (price - base) / base * 100.0 if (price is not None and base and base > 0) else 0.0
 
             sign = "+" if delta > 0 else ""
-            pct_text = f"{sign}{delta:.3f}%" if price is not None else ("ERROR" if err_text else "—")
-            pct_item = QTableWidgetItem(pct_text)
-            pct_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            font: QFont = pct_item.font()
-            font.setBold(True)
-            pct_item.setFont(font)
-            if err_text:
-                fg = QColor(255, 167, 38)  # оранжевый для ошибок
-                bg = QColor(255, 167, 38, 30)
-                pct_item.setForeground(QBrush(fg))
-                pct_item.setBackground(QBrush(bg))
-                pct_item.setToolTip(err_text)
+            state, remaining = health.get(ex_name, (CircuitBreaker.CLOSED, 0.0))
+            is_stale = price is not None and ex_name in stragglers and err_text
+            if is_stale:
+                age = self.monitor.price_age(token, ex_name)
+                pct_text = f"⏱ {age:.0f}с" if age is not None else "⏱"
+            elif quote is not None:
+                pct_text = f"{sign}{delta:.2f}% · {quote.spread_bps:.0f}bp"
+            elif price is not None:
+                pct_text = f"{sign}{delta:.3f}%"
+            elif state == CircuitBreaker.OPEN:
+                pct_text = f"ПАУЗА {remaining:.0f}с"
+            elif state == CircuitBreaker.HALF_OPEN:
+                pct_text = "ПРОБА"
+            else:
+                pct_text = "ERROR" if err_text else "—"
+
+            if is_stale or (err_text and state != CircuitBreaker.CLOSED):
+                style = "muted"
+            elif err_text:
+                style = "error"
             elif delta > 0:
-                fg = QColor(0, 200, 83)  # ярко-зеленый
-                bg = QColor(0, 200, 83, 30)
-                pct_item.setForeground(QBrush(fg))
-                pct_item.setBackground(QBrush(bg))
+                style = "up"
             elif delta < 0:
-                fg = QColor(255, 82, 82)  # ярко-красный
-                bg = QColor(255, 82, 82, 30)
-                pct_item.setForeground(QBrush(fg))
-                pct_item.setBackground(QBrush(bg))
-            self.results_table.setItem(i, 2, pct_item)
-
-            rich_text, is_rich = self._format_price(price) if price is not None else ("", False)
-            lbl = QLabel()
-            lbl.setTextFormat(Qt.TextFormat.RichText if is_rich else Qt.TextFormat.PlainText)
-            lbl.setText(rich_text)
-            lbl.setAlignment(Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter)
-            lbl.setContentsMargins(5, 0, 0, 0)
-            lbl.setStyleSheet("background: transparent; font-weight: 600;")
-            self.results_table.setCellWidget(i, 1, lbl)
-
-        self.results_table.resizeRowsToContents()
-        self._adjust_table_height()
+                style = "down"
+            else:
+                style = None
+
+            tooltip = err_text or None
+            if quote is not None:
+                bid_text, bid_rich = self._format_price(quote.bid)
+                ask_text, ask_rich = self._format_price(quote.ask)
+                price_text, is_rich = f"{bid_text} / {ask_text}", bid_rich or ask_rich
+                if not tooltip:
+                    tooltip = (
+                        f"Bid {quote.bid:.10g} · Ask {quote.ask:.10g} · "
+                        f"спред {quote.spread_bps:.1f} б.п."
+                    )
+            elif price is not None:
+                price_text, is_rich = self._format_price(price)
+            else:
+                price_text, is_rich = "", False
+            spark, change_text, history_tip = self._history_cells(token, ex_name, payload)
+            rows.append((ex_label, price_text, is_rich, pct_text, style, tooltip, spark, change_text, history_tip))
+
+        reset, changed = self.results_model.set_rows(keys, rows)
+        if not self.spread_table.isHidden():
+            spread_reset = self.spread_model.set_rows(self._spread_rows())
+            reset = reset or spread_reset
+        if reset:
+            self._adjust_table_height()
+            self.adjustSize()
+        if reset or changed:
+            self._update_status()
+
+    def _history_cells(
+        self, token: str, ex_name: str, payload: Optional[Tuple[str, float, str]]
+    ) -> Tuple[str, str, Optional[str]]:
+        """Спарклайн, изменение за 1м / 5м и подсказка с максимумом и минимумом.
+        Всё берётся из инкрементальных счётчиков истории, без прохода по ней."""
+        history = self.price_history.get((ex_name, payload[0])) if payload and self.history_enabled else None
+        if history is None or not len(history):
+            return "", "", None
+        changes = []
+        lines = []
+        for span, label in ((60.0, "1м"), (300.0, "5м")):
+            change = history.change(span)
+            changes.append(f"{change:+.2f}%" if change is not None else "—")
+            lines.append(
+                f"{label}: {changes[-1]} · макс {history.high(span):.10g} · мин {history.low(span):.10g}"
+            )
+        return history.sparkline(), " / ".join(changes), "\n".join(lines)
+
+    def _spread_rows(self) -> List[SpreadCells]:
+        """Строки таблицы спреда из SpreadBook: по одной на токен, без перебора пар бирж."""
+        rows: List[SpreadCells] = []
+        for token in self.tokens:
+            spread = self.spread_book.spread(token, self.market_type)
+            basis = self.spread_book.basis(token) if self.market_type == "perp" else None
+            basis_text = f"{basis:+.3f}%" if basis is not None else "—"
+            if spread is None:
+                rows.append((token, "—", "—", "—", basis_text, None))
+                continue
+            tooltip = (
+                f"Купить на {spread.buy_venue.capitalize()} по {spread.buy_price:.10g}, "
+                f"продать на {spread.sell_venue.capitalize()} по {spread.sell_price:.10g}"
+            )
+            rows.append((
+                token,
+                spread.buy_venue.capitalize(),
+                spread.sell_venue.capitalize(),
+                f"{spread.pct:.3f}% · {spread.bps:.0f}bp",
+                basis_text,
+                tooltip,
+            ))
+        return rows
+
+    def _update_status(self) -> None:
+        current_time = QDateTime.currentDateTime().toString("HH:mm:ss.zzz")
+        if len(self.tokens) == 1:
+            token_text = self.tokens[0]
+        else:
+            token_text = f"{len(self.tokens)} токенов"
+        market_text = self.market_type_combo.currentText()
+        status_text = f"{market_text} • {token_text} • Обновлено {current_time}"
+        if status_text != self._status_text:
+            self._status_text = status_text
+            self.status_label.setText(status_text)
 
     def _adjust_table_height(self) -> None:
-        """Подгоняет высоту таблицы под содержимое, убирая необходимость скролла."""
-        header_h = self.results_table.horizontalHeader().height()
-        rows_h = sum(self.results_table.rowHeight(r) for r in range(self.results_table.rowCount()))
-        frame = 2  # границы таблицы
-        total = header_h + rows_h + frame
-        self.results_table.setFixedHeight(total)
+        """Подгоняет высоту таблиц под содержимое, убирая необходимость скролла."""
+        total = self._fit_table_height(self.results_table)
+        if not self.spread_table.isHidden():
+            total += self._fit_table_height(self.spread_table) + self.main_layout.spacing()
         static_h = 120
         new_h = max(self.MONITORING_HEIGHT, static_h + total)
         self.setMinimumHeight(new_h)
 
+    def _fit_table_height(self, table: QTableView) -> int:
+        header_h = table.horizontalHeader().height()
+        rows_h = table.model().rowCount() * table.verticalHeader().defaultSectionSize()
+        frame = 2  # границы таблицы
+        height = min(header_h + rows_h + frame, self.MAX_TABLE_HEIGHT)
+        table.setFixedHeight(height)
+        return height
+
     @staticmethod
     def _format_price(price: float) -> tuple[str, bool]:
         if price is None:
@@ -463,6 +981,7 @@ class MainWindow(QMainWindow):
         track_prices = self.settings.value("app/track_prices", True, type=bool)
         if not track_prices:
             self.results_table.hide()
+            self.spread_table.hide()
             self.status_label.hide()
 
     def mousePressEvent(self, event: QMouseEvent):
@@ -480,4 +999,10 @@ class MainWindow(QMainWindow):
 
     def closeEvent(self, event):
         self.stop_monitoring()
+        for task in (self.index_task, self.warmup_task):
+            if task and not task.done():
+                task.cancel()
+        if self.metrics_server:
+            asyncio.ensure_future(self.metrics_server.stop())
+        asyncio.ensure_future(self.http_client.aclose())
         super().closeEvent(event)
@@ -0,0 +1,155 @@
+# core/history.py
+from array import array
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+# Символы спарклайна снизу вверх
+SPARK_CHARS = "▁▂▃▄▅▆▇█"
+
+
+class _Window:
+    """
+    Скользящее окно `span` секунд над кольцевым буфером PriceHistory.
+    Начало окна только сдвигается вперёд, а максимум и минимум ведутся
+    монотонными очередями номеров отсчётов, поэтому каждый отсчёт
+    обрабатывается O(1) амортизированно, без прохода по буферу.
+    """
+
+    def __init__(self, span: float):
+        self.span = span
+        # Номер самого старого отсчёта внутри окна
+        self.start = 0
+        self.highs: Deque[int] = deque()
+        self.lows: Deque[int] = deque()
+
+    def push(self, history: "PriceHistory", seq: int) -> None:
+        price = history.price_at(seq)
+        while self.highs and history.price_at(self.highs[-1]) <= price:
+            self.highs.pop()
+        self.highs.append(seq)
+        while self.lows and history.price_at(self.lows[-1]) >= price:
+            self.lows.pop()
+        self.lows.append(seq)
+
+        # Отсчёты старше окна или уже перезаписанные в кольце выпадают
+        oldest = max(self.start, seq - history.capacity + 1)
+        cutoff = history.time_at(seq) - self.span
+        while oldest < seq and history.time_at(oldest) < cutoff:
+            oldest += 1
+        self.start = oldest
+        while self.highs[0] < oldest:
+            self.highs.popleft()
+        while self.lows[0] < oldest:
+            self.lows.popleft()
+
+
+class PriceHistory:
+    """
+    История цен одного символа на бирже в кольцевом буфере фиксированного
+    размера (array из double), так что память не растёт за многочасовую
+    сессию. В буфер попадает не больше одного отсчёта за `resolution`
+    секунд: более частые цены (стрим сделок) лишь обновляют последнюю.
+
+    Для окон из `windows` (по умолчанию 1 и 5 минут) изменение цены,
+    максимум и минимум поддерживаются инкрементально. Спарклайн строится
+    по отдельному короткому буферу: одна точка на `span / points` секунд
+    самого длинного окна.
+    """
+
+    def __init__(
+        self,
+        capacity: int = 320,
+        resolution: float = 1.0,
+        windows: Tuple[float, ...] = (60.0, 300.0),
+        spark_points: int = 20,
+    ):
+        self.capacity = capacity
+        self.resolution = resolution
+        self._times = array("d", bytes(8 * capacity))
+        self._prices = array("d", bytes(8 * capacity))
+        # Номер следующего отсчёта; отсчёт seq лежит в ячейке seq % capacity
+        self._seq = 0
+        self.last: Optional[float] = None
+        self._windows: Dict[float, _Window] = {span: _Window(span) for span in windows}
+
+        self.spark_points = spark_points
+        self._spark_step = max(windows) / spark_points if windows else 15.0
+        self._spark = array("d", bytes(8 * spark_points))
+        self._spark_count = 0
+        self._spark_bucket: Optional[int] = None
+        self._spark_text: Optional[str] = None
+
+    def __len__(self) -> int:
+        return min(self._seq, self.capacity)
+
+    def time_at(self, seq: int) -> float:
+        return self._times[seq % self.capacity]
+
+    def price_at(self, seq: int) -> float:
+        return self._prices[seq % self.capacity]
+
+    def add(self, t: float, price: float) -> None:
+        """Учитывает цену в момент t (монотонные секунды)."""
+        if price <= 0:
+            return
+        self.last = price
+        self._add_spark(t, price)
+        if self._seq and t - self.time_at(self._seq - 1) < self.resolution:
+            return
+        seq = self._seq
+        i = seq % self.capacity
+        self._times[i] = t
+        self._prices[i] = price
+        self._seq += 1
+        for window in self._windows.values():
+            window.push(self, seq)
+
+    def change(self, span: float) -> Optional[float]:
+        """Изменение последней цены к началу окна в % (None — мало данных)."""
+        window = self._windows[span]
+        if self._seq < 2 or self.last is None:
+            return None
+        first = self.price_at(window.start)
+        return (self.last - first) / first * 100.0
+
+    def high(self, span: float) -> Optional[float]:
+        """Максимум за окно (None, пока не было ни одной положительной цены)."""
+        window = self._windows[span]
+        if not self._seq:
+            return None
+        return max(self.price_at(window.highs[0]), self.last)
+
+    def low(self, span: float) -> Optional[float]:
+        window = self._windows[span]
+        if not self._seq:
+            return None
+        return min(self.price_at(window.lows[0]), self.last)
+
+    def _add_spark(self, t: float, price: float) -> None:
+        bucket = int(t // self._spark_step)
+        if bucket != self._spark_bucket:
+            if self._spark_count == self.spark_points:
+                # Сдвиг 20 чисел дешевле, чем держать ещё одно кольцо
+                self._spark[:-1] = self._spark[1:]
+            else:
+                self._spark_count += 1
+            self._spark_bucket = bucket
+        self._spark[self._spark_count - 1] = price
+        self._spark_text = None
+
+    def sparkline(self) -> str:
+        """Спарклайн по закрытиям интервалов; строка кэшируется до новой цены."""
+        if self._spark_text is None:
+            points = self._spark[: self._spark_count]
+            if len(points) < 2:
+                self._spark_text = ""
+            else:
+                lo, hi = min(points), max(points)
+                top = len(SPARK_CHARS) - 1
+                if hi == lo:
+                    self._spark_text = SPARK_CHARS[top // 2] * len(points)
+                else:
+                    self._spark_text = "".join(
+                        SPARK_CHARS[round((p - lo) / (hi - lo) * top)] for p in points
+                    )
+        return self._spark_text
@@ -1,11 +1,31 @@
 # core/monitor.py
 import asyncio
-from dataclasses import dataclass
-from typing import List, Dict, Tuple, Literal, Awaitable, Optional
+import time
+from dataclasses import dataclass, field
+from typing import (
+    List,
+    Dict,
+    Tuple,
+    Awaitable,
+    Optional,
+    Callable,
+    Collection,
+    AsyncIterator,
+    Set,
+    Any,
+)
 
-from core.exchange.base import BaseClient
+from core.exchange.base import BaseClient, BookTicker, MarketType
+from core.exchange.stream import StreamEngine
+from core.exchange.symbols import SymbolCache
+from core.exchange.transport import PRIORITY_BACKGROUND, request_priority
+from core.exchange.universe import MarketIndex
+from core.scheduler import FixedRateScheduler
 
-MarketType = Literal["spot", "perp"]
+DEADLINE_ERROR = "Биржа не ответила за дедлайн тика"
+
+# Ключ-заглушка токена, когда отслеживается один набор символов
+_SINGLE_TOKEN = ""
 
 
 @dataclass
@@ -16,6 +36,26 @@ class Monitor:
     """
 
     clients: List[BaseClient]
+    # Индекс рынков: если задан, символы ищутся в памяти, а не перебором по сети
+    index: Optional[MarketIndex] = None
+    # Кэш найденных символов между сессиями: повторный поиск идёт сразу за ценой
+    symbols: Optional[SymbolCache] = None
+    # Сколько токенов вотчлиста ищется одновременно при первичном поиске
+    discovery_concurrency: int = 8
+    # Начиная с какого числа символов на бирже выгоднее один запрос всех цен
+    bulk_threshold: int = 3
+    # Общий дедлайн на биржу за один тик обновления цен (None — без ограничения)
+    tick_deadline: Optional[float] = None
+    # Не успевший к дедлайну запрос доживает до следующего тика (иначе отменяется)
+    carry_stragglers: bool = True
+    # Биржи, не уложившиеся в дедлайн своего последнего тика
+    stragglers: Set[str] = field(default_factory=set, init=False)
+    _inflight: Dict[str, Tuple[asyncio.Task, Dict[str, List[str]]]] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _last_good: Dict[Tuple[str, str], float] = field(
+        default_factory=dict, init=False, repr=False
+    )
 
     async def query(
         self, token: str, market_type: MarketType
@@ -28,64 +68,497 @@ class Monitor:
         """
         results: Dict[str, Tuple[str, float, str]] = {}
         errors: Dict[str, str] = {}
+        async for client_name, result, error in self.iter_query(token, market_type):
+            if result:
+                results[client_name] = result
+            if error:
+                errors[client_name] = error
+        return results, errors
 
-        async def fetch_from_client(client: BaseClient) -> None:
-            """Внутренняя функция для запроса данных от одного клиента."""
-            price_coro: Optional[Awaitable[Optional[Tuple[str, float, str]]]] = None
+    async def iter_query(
+        self,
+        token: str,
+        market_type: MarketType,
+        clients: Optional[List[BaseClient]] = None,
+    ) -> AsyncIterator[Tuple[str, Optional[Tuple[str, float, str]], Optional[str]]]:
+        """
+        Потоковый вариант `query`: отдаёт (название_биржи, (символ, цена, url)
+        или None, ошибка или None) по каждой бирже сразу, как она ответила,
+        а не ждёт самую медленную. Если потребитель прекратил итерацию,
+        незавершённые запросы отменяются.
 
-            if market_type == "perp":
-                price_coro = client.get_futures_price(token)
-            elif market_type == "spot":
-                price_coro = client.get_spot_price(token)
+        :param clients: Биржи для поиска (по умолчанию — все клиенты монитора)
+        """
+        tasks = [
+            asyncio.ensure_future(self._query_client(client, token, market_type))
+            for client in (self.clients if clients is None else clients)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
 
-            if price_coro:
-                try:
-                    result = await price_coro
-                    if result:
-                        results[client.name] = result
-                except Exception as e:
-                    errors[client.name] = str(e)
+    async def _query_client(
+        self, client: BaseClient, token: str, market_type: MarketType
+    ) -> Tuple[str, Optional[Tuple[str, float, str]], Optional[str]]:
+        """Полный поиск символа на одной бирже."""
+        price_coro: Optional[Awaitable[Optional[Tuple[str, float, str]]]] = None
 
-        await asyncio.gather(*(fetch_from_client(c) for c in self.clients))
-        return results, errors
+        breaker_error = self._breaker_error(client)
+        if breaker_error:
+            return client.name, None, breaker_error
+
+        if self.index is not None and self.index.has(client.name, market_type):
+            price_coro = self._query_indexed(client, token, market_type)
+        elif market_type == "perp":
+            price_coro = client.get_futures_price(token)
+        elif market_type == "spot":
+            price_coro = client.get_spot_price(token)
+
+        if price_coro:
+            try:
+                # Поиск уступает лимит запросов ценам уже найденных символов
+                with request_priority(PRIORITY_BACKGROUND):
+                    result = await price_coro
+            except Exception as e:
+                return client.name, None, str(e)
+            if result and self.symbols is not None:
+                symbol, _, url = result
+                self.symbols.put(token, market_type, client.name, symbol, url)
+            return client.name, result, None
+        return client.name, None, None
 
     async def fetch_prices_for_known_symbols(
         self, known_symbols: Dict[str, str], market_type: MarketType
     ) -> Tuple[Dict[str, float], Dict[str, str]]:
         """
         Быстро запрашивает цены для уже известных символов без их повторного поиска.
+        Подчиняется дедлайну тика так же, как `fetch_prices_for_watchlist`.
 
         :param known_symbols: Словарь {название_биржи: символ}
         :param market_type: Тип рынка
         :return: Словарь {название_биржи: цена}
         """
-        results: Dict[str, float] = {}
-        errors: Dict[str, str] = {}
-        client_map = {c.name: c for c in self.clients}
+        results, errors = await self.fetch_prices_for_watchlist(
+            {_SINGLE_TOKEN: known_symbols}, market_type
+        )
+        return results.get(_SINGLE_TOKEN, {}), errors.get(_SINGLE_TOKEN, {})
 
-        async def fetch_for_client(client_name: str, symbol: str) -> None:
-            """Внутренняя функция для запроса цены у одного клиента."""
-            client = client_map.get(client_name)
-            if not client:
+    async def _query_indexed(
+        self, client: BaseClient, token: str, market_type: MarketType
+    ) -> Optional[Tuple[str, float, str]]:
+        """
+        Поиск через индекс рынков: символ берётся из памяти, к бирже идёт
+        только один запрос цены. Возвращает (символ, цена, url) или None.
+        """
+        symbol = await self.index.resolve(client, token, market_type)
+        if not symbol:
+            # Свежий список рынков — достоверный отказ, его можно запомнить.
+            # Промах по старому списку (перекачка не удалась) таким не считается
+            if self.symbols is not None and self.index.is_fresh(client.name, market_type):
+                self.symbols.put_missing(token, market_type, client.name)
+            return None
+        return await self._price_for_symbol(client, symbol, market_type)
+
+    @staticmethod
+    async def _price_for_symbol(
+        client: BaseClient, symbol: str, market_type: MarketType
+    ) -> Optional[Tuple[str, float, str]]:
+        """Цена известного символа: (символ, цена, url) или None."""
+        if market_type == "perp":
+            price = await client.get_price_for_futures_symbol(symbol)
+            url = client.get_futures_link(symbol)
+        else:
+            price = await client.get_price_for_spot_symbol(symbol)
+            url = client.get_spot_link(symbol)
+        if price is None:
+            return None
+        return symbol, price, url
+
+    async def watch_listings(
+        self,
+        missing: Dict[str, Set[str]],
+        market_type: MarketType,
+        on_listed: Callable[[str, str, Tuple[str, float, str]], None],
+        interval: float = 10.0,
+    ) -> None:
+        """
+        Ожидание листинга: раз в `interval` перечитывает списки рынков бирж
+        из `missing` ({токен: {биржи без рынка}}) — один массовый запрос на
+        биржу для всех токенов сразу — и ищет тикеры в памяти, без проб
+        по символам. Как только пара появилась и по ней есть цена,
+        вызывается on_listed(токен, биржа, (символ, цена, url)), а биржа
+        убирается из `missing`. Завершается, когда ждать больше нечего.
+        Требует индекс рынков.
+        """
+        if self.index is None:
+            return
+        client_map = {c.name: c for c in self.clients}
+        scheduler = FixedRateScheduler(interval)
+        async for _ in scheduler.ticks():
+            venues = sorted({name for names in missing.values() for name in names})
+            if not venues:
                 return
+            refreshed = await asyncio.gather(
+                *(
+                    self.index.refresh(client_map[name], market_type, max_age=interval / 2)
+                    for name in venues
+                )
+            )
+            fresh = {name for name, ok in zip(venues, refreshed) if ok}
+            for token, names in missing.items():
+                for name in sorted(names & fresh):
+                    client = client_map[name]
+                    markets = self.index.get_markets(name, market_type)
+                    symbol = client.resolve_symbol(token, market_type, markets)
+                    if not symbol:
+                        if self.symbols is not None:
+                            self.symbols.put_missing(token, market_type, name)
+                        continue
+                    # Рынок бывает заведён до начала торгов — тогда ждём цену
+                    with request_priority(PRIORITY_BACKGROUND):
+                        payload = await self._price_for_symbol(client, symbol, market_type)
+                    if payload is None:
+                        continue
+                    names.discard(name)
+                    if self.symbols is not None:
+                        self.symbols.put(token, market_type, name, symbol, payload[2])
+                    on_listed(token, name, payload)
 
-            price: Optional[float] = None
-            try:
-                if market_type == "perp":
-                    price = await client.get_price_for_futures_symbol(symbol)
-                elif market_type == "spot":
-                    price = await client.get_price_for_spot_symbol(symbol)
-            except Exception as e:
-                errors[client_name] = str(e)
+    async def warm_up(self) -> None:
+        """Прогревает соединения со всеми биржами параллельно."""
+        await asyncio.gather(*(c.warm_up() for c in self.clients))
+
+    async def query_watchlist(
+        self, tokens: List[str], market_type: MarketType
+    ) -> Tuple[
+        Dict[str, Dict[str, Tuple[str, float, str]]], Dict[str, Dict[str, str]]
+    ]:
+        """
+        Выполняет полный поиск символов для списка токенов.
+
+        Возвращает словари {токен: {название_биржи: (символ, цена, url)}}
+        и {токен: {название_биржи: ошибка}}.
+        """
+        results: Dict[str, Dict[str, Tuple[str, float, str]]] = {}
+        errors: Dict[str, Dict[str, str]] = {}
+        async for token, client_name, result, error in self.iter_query_watchlist(
+            tokens, market_type
+        ):
+            if result:
+                results.setdefault(token, {})[client_name] = result
+            if error:
+                errors.setdefault(token, {})[client_name] = error
+        return results, errors
+
+    async def iter_query_watchlist(
+        self, tokens: List[str], market_type: MarketType
+    ) -> AsyncIterator[
+        Tuple[str, str, Optional[Tuple[str, float, str]], Optional[str]]
+    ]:
+        """
+        Потоковый поиск для списка токенов: отдаёт (токен, название_биржи,
+        результат, ошибка) по мере ответов бирж. Число одновременно ищущихся
+        токенов ограничено `discovery_concurrency`, чтобы большой вотчлист
+        не упирался в лимиты бирж. Пары из кэша символов (`symbols`) не ищутся:
+        их цены приходят первыми, одним запросом на биржу.
+        """
+        remaining: Dict[str, List[BaseClient]] = {t: list(self.clients) for t in tokens}
+        if self.symbols is not None:
+            async for item in self._query_cached(tokens, market_type, remaining):
+                yield item
+
+        queue: asyncio.Queue = asyncio.Queue()
+        semaphore = asyncio.Semaphore(max(1, self.discovery_concurrency))
+
+        async def query_token(token: str) -> None:
+            async with semaphore:
+                async for item in self.iter_query(token, market_type, remaining[token]):
+                    queue.put_nowait((token, *item))
+
+        tasks = [asyncio.ensure_future(query_token(t)) for t in tokens if remaining[t]]
+        for task in tasks:
+            # Маркер завершения токена приходит после всех его результатов
+            task.add_done_callback(lambda _: queue.put_nowait(None))
+        pending = len(tasks)
+        try:
+            while pending:
+                item = await queue.get()
+                if item is None:
+                    pending -= 1
+                    continue
+                yield item
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _query_cached(
+        self,
+        tokens: List[str],
+        market_type: MarketType,
+        remaining: Dict[str, List[BaseClient]],
+    ) -> AsyncIterator[
+        Tuple[str, str, Optional[Tuple[str, float, str]], Optional[str]]
+    ]:
+        """
+        Отдаёт результаты по символам из кэша: цены всех закэшированных
+        символов запрашиваются одним проходом `fetch_prices_for_watchlist`,
+        без поиска. Из `remaining` убираются биржи, по которым ответ уже
+        известен (включая «рынка нет»); символ, оставшийся без цены,
+        возвращается в поиск — он мог быть переименован или снят с торгов.
+        """
+        watchlist: Dict[str, Dict[str, str]] = {}
+        urls: Dict[Tuple[str, str], str] = {}
+        for token in tokens:
+            rest: List[BaseClient] = []
+            for client in remaining[token]:
+                entry = self.symbols.get(token, market_type, client.name)
+                if entry is None:
+                    rest.append(client)
+                elif entry.symbol:
+                    watchlist.setdefault(token, {})[client.name] = entry.symbol
+                    urls[(token, client.name)] = entry.url
+            remaining[token] = rest
+        if not watchlist:
+            return
+
+        client_map = {c.name: c for c in self.clients}
+        prices, _ = await self.fetch_prices_for_watchlist(watchlist, market_type)
+        for token, symbols in watchlist.items():
+            for client_name, symbol in symbols.items():
+                price = prices.get(token, {}).get(client_name)
+                if price is None:
+                    self.symbols.forget(token, market_type, client_name)
+                    remaining[token].append(client_map[client_name])
+                    continue
+                yield token, client_name, (symbol, price, urls[(token, client_name)]), None
+
+    async def fetch_prices_for_watchlist(
+        self,
+        watchlist: Dict[str, Dict[str, str]],
+        market_type: MarketType,
+        exclude_exchanges: Collection[str] = (),
+        deadline: Optional[float] = None,
+        books: bool = False,
+        exclude_symbols: Collection[Tuple[str, str]] = (),
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Dict[str, str]]]:
+        """
+        Обновляет цены для всего вотчлиста: символы группируются по биржам,
+        и каждая биржа опрашивается одним вызовом `get_prices_for_symbols`,
+        после чего результат раздаётся всем токенам.
+
+        Тик длится не дольше `tick_deadline`: биржи, не успевшие ответить,
+        попадают в `stragglers` с ошибкой о возрасте последней цены, а их
+        запрос либо отменяется, либо (`carry_stragglers`) доживает и его
+        результат отдаётся следующим тиком вместо нового запроса.
+
+        :param watchlist: Словарь {токен: {название_биржи: символ}}
+        :param market_type: Тип рынка
+        :param exclude_exchanges: Биржи, которые не нужно опрашивать
+                                  (например, не входящие в слот тика)
+        :param deadline: Дедлайн этого тика вместо `tick_deadline`
+                         (например, время до следующего тика планировщика)
+        :param books: Запрашивать лучшие bid/ask (BookTicker) вместо цены
+        :param exclude_symbols: Пары (биржа, символ), которые не нужно
+                                опрашивать (например, уже получающие цены по стриму)
+        :return: Словари {токен: {название_биржи: цена или BookTicker}} и
+                 {токен: {название_биржи: ошибка}}
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        errors: Dict[str, Dict[str, str]] = {}
+        fetch = self._fetch_symbol_books if books else self._fetch_symbol_prices
+        client_map = {c.name: c for c in self.clients}
+
+        # {биржа: {символ: [токены]}} — один символ может понадобиться
+        # нескольким токенам (например, при дублях во вводе)
+        by_exchange: Dict[str, Dict[str, List[str]]] = {}
+        for token, symbols in watchlist.items():
+            for client_name, symbol in symbols.items():
+                if client_name in exclude_exchanges or (client_name, symbol) in exclude_symbols:
+                    continue
+                by_exchange.setdefault(client_name, {}).setdefault(
+                    symbol, []
+                ).append(token)
+
+        def deliver(
+            client_name: str, symbol_map: Dict[str, List[str]], task: asyncio.Task
+        ) -> None:
+            """Раскладывает результат завершённого запроса биржи по токенам."""
+            if task.cancelled():
+                return
+            exc = task.exception()
+            if exc is not None:
+                for tokens in symbol_map.values():
+                    for token in tokens:
+                        errors.setdefault(token, {})[client_name] = str(exc) or repr(exc)
                 return
+            now = time.monotonic()
+            for symbol, price in task.result().items():
+                for token in symbol_map.get(symbol, ()):
+                    results.setdefault(token, {})[client_name] = price
+                    errors.get(token, {}).pop(client_name, None)
+                    self._last_good[(token, client_name)] = now
+
+        # Опоздавшие с прошлого тика, которые успели завершиться между тиками
+        for client_name, (task, symbol_map) in list(self._inflight.items()):
+            if task.done():
+                del self._inflight[client_name]
+                deliver(client_name, symbol_map, task)
+
+        for client_name, symbol_map in by_exchange.items():
+            client = client_map.get(client_name)
+            if not client or client_name in self._inflight:
+                continue  # запрос с прошлого тика ещё летит — второй не шлём
 
-            if price is not None:
-                results[client_name] = price
+            breaker_error = self._breaker_error(client)
+            if breaker_error:
+                for tokens in symbol_map.values():
+                    for token in tokens:
+                        errors.setdefault(token, {})[client_name] = breaker_error
+                continue
 
-        await asyncio.gather(
-            *(
-                fetch_for_client(name, sym)
-                for name, sym in known_symbols.items()
+            task = asyncio.ensure_future(
+                fetch(client, list(symbol_map), market_type)
             )
+            self._inflight[client_name] = (task, symbol_map)
+
+        waiting = [name for name in by_exchange if name in self._inflight]
+        if waiting:
+            await asyncio.wait(
+                [self._inflight[name][0] for name in waiting],
+                timeout=self.tick_deadline if deadline is None else deadline,
+            )
+
+        # Биржи, не опрошенные в этом тике, сохраняют свою отметку
+        self.stragglers = {
+            name
+            for name in self.stragglers
+            if name not in by_exchange and name in self._inflight
+        }
+        for client_name in waiting:
+            task, symbol_map = self._inflight[client_name]
+            if task.done():
+                del self._inflight[client_name]
+                deliver(client_name, symbol_map, task)
+                continue
+            self.stragglers.add(client_name)
+            if not self.carry_stragglers:
+                task.cancel()
+                del self._inflight[client_name]
+            for tokens in symbol_map.values():
+                for token in tokens:
+                    errors.setdefault(token, {})[client_name] = self._stale_error(
+                        token, client_name
+                    )
+        return results, errors
+
+    def price_age(self, token: str, client_name: str) -> Optional[float]:
+        """Сколько секунд назад по REST пришла последняя цена (None — не было)."""
+        updated = self._last_good.get((token, client_name))
+        return time.monotonic() - updated if updated is not None else None
+
+    def _stale_error(self, token: str, client_name: str) -> str:
+        age = self.price_age(token, client_name)
+        if age is None:
+            return DEADLINE_ERROR
+        return f"{DEADLINE_ERROR}, последняя цена {age:.1f} с назад"
+
+    def cancel_pending(self) -> None:
+        """Отменяет запросы, перенесённые на следующий тик (при остановке)."""
+        for task, _ in self._inflight.values():
+            task.cancel()
+        self._inflight.clear()
+
+    def start_streaming(
+        self,
+        watchlist: Dict[str, Dict[str, str]],
+        market_type: MarketType,
+        on_update: Callable[[str, str, float], None],
+    ) -> StreamEngine:
+        """
+        Подписывается на WebSocket-стримы бирж для символов вотчлиста.
+        Каждая пришедшая цена раздаётся токенам через
+        on_update(токен, название_биржи, цена).
+
+        Возвращает запущенный движок: по `live_symbols` видно, какие символы
+        уже не нужно опрашивать по REST, `stop()` закрывает сокеты.
+        """
+        # {(биржа, символ): [токены]}
+        routes: Dict[Tuple[str, str], List[str]] = {}
+        for token, symbols in watchlist.items():
+            for client_name, symbol in symbols.items():
+                routes.setdefault((client_name, symbol), []).append(token)
+
+        def on_price(client_name: str, symbol: str, price: float) -> None:
+            for token in routes.get((client_name, symbol), ()):
+                on_update(token, client_name, price)
+
+        symbols_by_exchange: Dict[str, List[str]] = {}
+        for client_name, symbol in routes:
+            symbols_by_exchange.setdefault(client_name, []).append(symbol)
+
+        engine = StreamEngine(self.clients, market_type, on_price)
+        engine.start(symbols_by_exchange)
+        return engine
+
+    def health(self) -> Dict[str, Tuple[str, float]]:
+        """
+        Состояние автоматов защиты бирж:
+        {название_биржи: (состояние, секунд_до_пробного_запроса)}.
+        """
+        return {
+            c.name: (c.breaker.state, c.breaker.remaining()) for c in self.clients
+        }
+
+    @staticmethod
+    def _breaker_error(client: BaseClient) -> Optional[str]:
+        """Текст ошибки, если биржа пропускается из-за разомкнутой цепи."""
+        if not client.breaker.is_open():
+            return None
+        return (
+            f"Биржа недоступна ({client.breaker.failures} ошибок подряд), "
+            f"повтор через {client.breaker.remaining():.0f} с"
         )
-        return results, errors
\ No newline at end of file
+
+    async def _fetch_symbol_prices(
+        self, client: BaseClient, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, float]:
+        """
+        Получает цены набора символов одной биржи. Если символов больше
+        `bulk_threshold` и биржа умеет отдавать все тикеры, делается один
+        запрос — стоимость тика не растёт вместе с вотчлистом.
+        """
+        if len(symbols) > self.bulk_threshold:
+            if market_type == "perp":
+                fetch_all = client.get_all_futures_prices
+            else:
+                fetch_all = client.get_all_spot_prices
+            try:
+                all_prices = await fetch_all()
+            except NotImplementedError:
+                pass
+            else:
+                if all_prices is None:
+                    return {}
+                return {s: all_prices[s] for s in symbols if s in all_prices}
+        return await client.get_prices_for_symbols(symbols, market_type)
+
+    async def _fetch_symbol_books(
+        self, client: BaseClient, symbols: List[str], market_type: MarketType
+    ) -> Dict[str, BookTicker]:
+        """То же, что `_fetch_symbol_prices`, но для лучших bid/ask."""
+        if len(symbols) > self.bulk_threshold:
+            try:
+                all_books = await client.get_all_book_tickers(market_type)
+            except NotImplementedError:
+                pass
+            else:
+                if all_books is None:
+                    return {}
+                return {s: all_books[s] for s in symbols if s in all_books}
+        try:
+            return await client.get_book_tickers_for_symbols(symbols, market_type)
+        except NotImplementedError:
+            return {}
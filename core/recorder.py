@@ -0,0 +1,173 @@
+# core/recorder.py
+import asyncio
+import json
+import logging
+import mmap
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"THTICKS\x01"
+# Запись тика: время (unix, double), номер серии (uint32), цена (double)
+RECORD = struct.Struct("<dId")
+HEADER = struct.Struct("<8sI")
+
+
+class Tick(NamedTuple):
+    ts: float
+    exchange: str
+    market: str
+    symbol: str
+    price: float
+
+
+class TickRecorder:
+    """
+    Запись всех полученных цен в компактный бинарный файл, по файлу на
+    сутки (UTC): ticks-YYYYMMDD.bin. Файл — заголовок и массив записей
+    фиксированной длины (20 байт), его можно отобразить в память и читать
+    без разбора. Строки (биржа, рынок, символ) хранятся один раз в
+    словаре серий ticks-YYYYMMDD.json рядом с файлом.
+
+    `record` только дописывает байты в буфер в памяти; на диск буфер
+    уходит пачкой раз в `flush_interval` секунд (или раньше, если вырос
+    до `flush_bytes`) в отдельном потоке, поэтому цикл событий на записи
+    не блокируется.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        flush_interval: float = 1.0,
+        flush_bytes: int = 64 * 1024,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+        # Буферы и словари серий по дням: сутки могут смениться между сбросами
+        self._buffers: Dict[str, bytearray] = {}
+        self._series: Dict[str, Dict[Tuple[str, str, str], int]] = {}
+        self._dirty_series: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._flushing: Optional[asyncio.Task] = None
+        # Сбросы идут по очереди: иначе два потока дописывали бы один файл разом
+        self._write_lock = asyncio.Lock()
+        self.recorded = 0
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._flush_loop())
+
+    async def close(self) -> None:
+        """Останавливает фоновый сброс и дописывает остаток буфера."""
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def record(
+        self, exchange: str, market: str, symbol: str, price: float, ts: Optional[float] = None
+    ) -> None:
+        ts = time.time() if ts is None else ts
+        day = datetime.fromtimestamp(ts, timezone.utc).strftime("%Y%m%d")
+        series = self._series.get(day)
+        if series is None:
+            series = self._series[day] = self._load_series(day)
+        key = (exchange, market, symbol)
+        sid = series.get(key)
+        if sid is None:
+            sid = series[key] = len(series)
+            self._dirty_series.add(day)
+        buffer = self._buffers.setdefault(day, bytearray())
+        buffer += RECORD.pack(ts, sid, price)
+        self.recorded += 1
+        if len(buffer) >= self.flush_bytes and (self._flushing is None or self._flushing.done()):
+            self._flushing = asyncio.ensure_future(self.flush())
+
+    async def flush(self) -> None:
+        """Сбрасывает накопленные записи на диск в отдельном потоке."""
+        async with self._write_lock:
+            if not self._buffers:
+                return
+            buffers, self._buffers = self._buffers, {}
+            dirty, self._dirty_series = self._dirty_series, set()
+            # Словарь серий пишется до записей, чтобы у любой записи на диске была серия
+            series = {day: self._series_list(day) for day in dirty}
+            await asyncio.to_thread(self._write, buffers, series)
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def path_for(self, day: str) -> Path:
+        return self.directory / f"ticks-{day}.bin"
+
+    def _series_list(self, day: str) -> List[List[str]]:
+        series = self._series[day]
+        names: List[List[str]] = [[] for _ in series]
+        for key, sid in series.items():
+            names[sid] = list(key)
+        return names
+
+    def _load_series(self, day: str) -> Dict[Tuple[str, str, str], int]:
+        """Словарь серий уже начатого за сутки файла (после перезапуска)."""
+        try:
+            names = read_series(self.path_for(day))
+        except (OSError, ValueError) as e:
+            logger.warning("Не удалось прочитать серии тиков за %s: %s", day, e)
+            return {}
+        return {tuple(name): sid for sid, name in enumerate(names)}
+
+    def _write(self, buffers: Dict[str, bytearray], series: Dict[str, List[List[str]]]) -> None:
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for day, names in series.items():
+                meta = self.path_for(day).with_suffix(".json")
+                tmp = meta.with_suffix(".json.tmp")
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump({"series": names}, f)
+                tmp.replace(meta)
+            for day, chunk in buffers.items():
+                path = self.path_for(day)
+                with open(path, "ab") as f:
+                    if f.tell() == 0:
+                        f.write(HEADER.pack(MAGIC, RECORD.size))
+                    f.write(chunk)
+        except OSError as e:
+            logger.warning("Не удалось записать тики в %s: %s", self.directory, e)
+
+
+def read_series(path: Path) -> List[List[str]]:
+    """Словарь серий файла тиков: [биржа, рынок, символ] по номеру серии."""
+    meta = path.with_suffix(".json")
+    if not meta.exists():
+        return []
+    with open(meta, "r", encoding="utf-8") as f:
+        return list((json.load(f) or {}).get("series") or [])
+
+
+def read_ticks(path: Path) -> Iterator[Tick]:
+    """
+    Читает файл тиков через mmap. Недописанная запись в конце файла
+    (обрыв при записи) пропускается.
+    """
+    names = read_series(path)
+    with open(path, "rb") as f:
+        if f.seek(0, 2) <= HEADER.size:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            magic, size = HEADER.unpack_from(mm, 0)
+            if magic != MAGIC or size != RECORD.size:
+                raise ValueError(f"{path} не является файлом тиков")
+            end = HEADER.size + (len(mm) - HEADER.size) // size * size
+            for offset in range(HEADER.size, end, size):
+                ts, sid, price = RECORD.unpack_from(mm, offset)
+                if sid < len(names):
+                    exchange, market, symbol = names[sid]
+                    yield Tick(ts, exchange, market, symbol, price)
@@ -0,0 +1,340 @@
+# core/replay.py
+"""
+Воспроизведение записанных тиков (core/recorder.py) через настоящие
+клиенты бирж, Monitor и GUI без сети:
+
+    python -m core.replay ticks-20250101.bin --speed 10 --tokens ETH,SOL
+
+ReplayTransport подставляется в httpx.AsyncClient вместо сети и отвечает
+на запросы клиентов в формате API каждой биржи ценами из записи.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import re
+import sys
+import time
+from bisect import bisect_right
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from core.recorder import Tick, read_ticks
+
+logger = logging.getLogger(__name__)
+
+# Тики одной биржи ближе этого интервала считаются одним опросом
+GROUP_WINDOW = 0.05
+# Интервал опроса при воспроизведении на максимальной скорости
+MAX_SPEED_INTERVAL = 0.05
+
+Venue = Tuple[str, str]  # (биржа, рынок)
+
+
+class TickTape:
+    """
+    Лента записанных тиков с виртуальными часами. При скорости `speed`
+    запись проигрывается в speed раз быстрее реального времени от первого
+    запроса; при speed=None («максимум») каждый запрос к бирже сдвигает
+    её ленту на следующий опрос из записи, и лента идёт ровно с той
+    скоростью, с которой её читает приложение.
+    """
+
+    def __init__(self, ticks: Iterable[Tick], speed: Optional[float] = 1.0):
+        self.speed = speed
+        self._tapes: Dict[Venue, List[Tuple[float, str, float]]] = {}
+        for tick in sorted(ticks, key=lambda t: t.ts):
+            self._tapes.setdefault((tick.exchange, tick.market), []).append(
+                (tick.ts, tick.symbol, tick.price)
+            )
+        self._times = {venue: [t for t, _, _ in tape] for venue, tape in self._tapes.items()}
+        self._cursor: Dict[Venue, int] = {venue: 0 for venue in self._tapes}
+        # До первого своего тика символ стоит по первой цене из записи: рынки
+        # биржи существуют с начала воспроизведения, как и на настоящей бирже
+        self.prices: Dict[Venue, Dict[str, float]] = {venue: {} for venue in self._tapes}
+        for venue, tape in self._tapes.items():
+            for _, symbol, price in tape:
+                self.prices[venue].setdefault(symbol, price)
+        self.start = min((tape[0][0] for tape in self._tapes.values()), default=0.0)
+        self.end = max((tape[-1][0] for tape in self._tapes.values()), default=0.0)
+        self._wall_start: Optional[float] = None
+        self.served = 0
+        self._finished_logged = False
+
+    @property
+    def venues(self) -> List[Venue]:
+        return list(self._tapes)
+
+    def symbols(self, market: str) -> List[str]:
+        """Все символы рынка в записи в порядке первого появления."""
+        seen: Dict[str, None] = {}
+        for (_, venue_market), tape in self._tapes.items():
+            if venue_market == market:
+                for _, symbol, _ in tape:
+                    seen.setdefault(symbol, None)
+        return list(seen)
+
+    @property
+    def finished(self) -> bool:
+        return all(self._cursor[v] >= len(tape) for v, tape in self._tapes.items())
+
+    def now(self) -> float:
+        """Время записи, соответствующее текущему моменту воспроизведения."""
+        if self._wall_start is None:
+            self._wall_start = time.monotonic()
+        if not self.speed:
+            return self.start
+        return self.start + (time.monotonic() - self._wall_start) * self.speed
+
+    def prices_for(self, exchange: str, market: str) -> Dict[str, float]:
+        """Цены биржи на текущий момент ленты (символ → цена)."""
+        venue = (exchange, market)
+        tape = self._tapes.get(venue)
+        if tape is None:
+            return {}
+        cursor = self._cursor[venue]
+        if self.speed:
+            target = bisect_right(self._times[venue], self.now(), lo=cursor)
+        elif cursor < len(tape):
+            target = bisect_right(self._times[venue], tape[cursor][0] + GROUP_WINDOW, lo=cursor)
+        else:
+            target = cursor
+        prices = self.prices[venue]
+        for _, symbol, price in tape[cursor:target]:
+            prices[symbol] = price
+        self.served += target - cursor
+        self._cursor[venue] = target
+        if not self._finished_logged and self.finished:
+            self._finished_logged = True
+            logger.info("Запись воспроизведена: тиков %d", self.served)
+        return prices
+
+
+# Ответ биржи: (биржа, рынок, символ из запроса или None, сборщик JSON).
+# Сборщик получает {символ: цена} и флаг «запрошен один символ».
+Route = Tuple[str, str, Optional[str], Callable[[Dict[str, float], bool], object]]
+
+
+def _binance_like(s: str, p: float) -> dict:
+    return {"symbol": s, "price": str(p), "bidPrice": str(p), "askPrice": str(p)}
+
+
+def _one_or_list(row: Callable[[str, float], dict]) -> Callable[[Dict[str, float], bool], object]:
+    def render(prices: Dict[str, float], single: bool) -> object:
+        rows = [row(s, p) for s, p in prices.items()]
+        return rows[0] if single else rows
+    return render
+
+
+def _wrap(key: str, row: Callable[[str, float], dict], single_dict: bool = False, **extra) -> Callable:
+    def render(prices: Dict[str, float], single: bool) -> object:
+        rows = [row(s, p) for s, p in prices.items()]
+        return {**extra, key: rows[0] if single and single_dict else rows}
+    return render
+
+
+def _wrap_list(row: Callable[[str, float], dict]) -> Callable[[Dict[str, float], bool], object]:
+    return lambda prices, _: [row(s, p) for s, p in prices.items()]
+
+
+def _bybit_row(s: str, p: float) -> dict:
+    return {"symbol": s, "lastPrice": str(p), "bid1Price": str(p), "ask1Price": str(p)}
+
+
+def _okx_row(s: str, p: float) -> dict:
+    return {"instId": s, "last": str(p), "bidPx": str(p), "askPx": str(p)}
+
+
+def _gate_row(key: str) -> Callable[[str, float], dict]:
+    return lambda s, p: {key: s, "last": str(p), "highest_bid": str(p), "lowest_ask": str(p)}
+
+
+def _bitget_spot_row(s: str, p: float) -> dict:
+    return {"symbol": s, "close": str(p), "last": str(p), "buyOne": str(p), "sellOne": str(p)}
+
+
+def _bitget_perp_row(s: str, p: float) -> dict:
+    return {"symbol": s, "last": str(p), "bestBid": str(p), "bestAsk": str(p)}
+
+
+def _mexc_perp_row(s: str, p: float) -> dict:
+    return {"symbol": s, "lastPrice": p, "bid1": p, "ask1": p}
+
+
+def route_request(request: httpx.Request) -> Optional[Route]:
+    """Определяет по URL биржу, рынок и формат ответа REST-запроса клиента."""
+    host, path = request.url.host, request.url.path
+    params = request.url.params
+    if host in ("api.binance.com", "fapi.binance.com"):
+        market = "spot" if host == "api.binance.com" else "perp"
+        if path.endswith(("/ticker/price", "/ticker/bookTicker")):
+            return "binance", market, params.get("symbol"), _one_or_list(_binance_like)
+    elif host == "api.bybit.com" and path == "/v5/market/tickers":
+        market = "perp" if params.get("category") == "linear" else "spot"
+        return "bybit", market, params.get("symbol"), lambda prices, _: {
+            "retCode": 0, "result": {"list": [_bybit_row(s, p) for s, p in prices.items()]}
+        }
+    elif host == "www.okx.com":
+        render = _wrap("data", _okx_row, code="0")
+        if path.endswith("/market/ticker"):
+            inst = params.get("instId", "")
+            return "okx", "perp" if inst.endswith("-SWAP") else "spot", inst, render
+        if path.endswith("/market/tickers"):
+            return "okx", "perp" if params.get("instType") == "SWAP" else "spot", None, render
+    elif host == "fx-api.gateio.ws" and path.endswith("/tickers"):
+        return "gate", "perp", params.get("contract"), _wrap_list(_gate_row("contract"))
+    elif host == "api.gateio.ws" and path.endswith("/spot/tickers"):
+        return "gate", "spot", params.get("currency_pair"), _wrap_list(_gate_row("currency_pair"))
+    elif host == "api.bitget.com":
+        if path.endswith("/spot/v1/market/tickers"):
+            return "bitget", "spot", params.get("symbol"), _wrap("data", _bitget_spot_row)
+        if path.endswith("/mix/v1/market/ticker"):
+            return "bitget", "perp", params.get("symbol"), _wrap("data", _bitget_perp_row, single_dict=True)
+        if path.endswith("/mix/v1/market/tickers"):
+            return "bitget", "perp", None, _wrap("data", _bitget_perp_row)
+    elif host == "api.mexc.com" and path.endswith(("/ticker/price", "/ticker/bookTicker")):
+        return "mexc", "spot", params.get("symbol"), _one_or_list(_binance_like)
+    elif host == "contract.mexc.com" and path.endswith("/contract/ticker"):
+        return "mexc", "perp", params.get("symbol"), _wrap("data", _mexc_perp_row, single_dict=True, success=True)
+    return None
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Транспорт httpx, отвечающий на запросы клиентов бирж ценами из
+    TickTape в формате API каждой биржи. Символ, которого ещё нет на
+    записи, отклоняется так же, как несуществующий рынок (HTTP 400).
+    Эндпоинты без цен (прогрев, ping) получают 404.
+    """
+
+    def __init__(self, tape: TickTape):
+        self.tape = tape
+        # Спот Hyperliquid адресуется индексами (@N): раздаются по порядку появления
+        self._hl_spot: Dict[str, str] = {}
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == "api.hyperliquid.xyz":
+            return self._hyperliquid(json.loads(request.content or b"{}"))
+        route = route_request(request)
+        if route is None:
+            return httpx.Response(404, json={"msg": "replay: нет данных"})
+        exchange, market, symbol, render = route
+        prices = self.tape.prices_for(exchange, market)
+        if symbol is not None:
+            if symbol not in prices:
+                return httpx.Response(400, json={"msg": f"replay: нет символа {symbol}"})
+            prices = {symbol: prices[symbol]}
+        return httpx.Response(200, json=render(prices, symbol is not None))
+
+    def _hyperliquid(self, body: dict) -> httpx.Response:
+        kind = body.get("type")
+        perp = self.tape.prices_for("hyperliquid", "perp")
+        spot = self.tape.prices_for("hyperliquid", "spot")
+        for pair in spot:
+            self._hl_spot.setdefault(pair, f"@{len(self._hl_spot) + 1}")
+        spot_mids = {self._hl_spot[pair]: p for pair, p in spot.items()}
+        if kind == "meta":
+            return httpx.Response(200, json={"universe": [{"name": coin} for coin in perp]})
+        if kind == "allMids":
+            return httpx.Response(200, json={k: str(p) for k, p in {**perp, **spot_mids}.items()})
+        if kind in ("spotMeta", "spotMetaAndAssetCtxs"):
+            meta = self._hl_spot_meta()
+            if kind == "spotMeta":
+                return httpx.Response(200, json=meta)
+            ctxs = [{"coin": coin, "midPx": str(p)} for coin, p in spot_mids.items()]
+            return httpx.Response(200, json=[meta, ctxs])
+        if kind == "l2Book":
+            coin = body.get("coin")
+            price = perp.get(coin, spot_mids.get(coin))
+            if price is None:
+                return httpx.Response(200, json={"levels": [[], []]})
+            return httpx.Response(200, json={"levels": [[{"px": str(price)}], [{"px": str(price)}]]})
+        return httpx.Response(404, json={})
+
+    def _hl_spot_meta(self) -> dict:
+        tokens = [{"index": 0, "name": "USDC"}]
+        universe = []
+        for pair, coin in self._hl_spot.items():
+            index = int(coin[1:])
+            tokens.append({"index": index, "name": pair.split("/")[0]})
+            universe.append({"name": coin, "tokens": [index, 0]})
+        return {"tokens": tokens, "universe": universe}
+
+
+def base_token(symbol: str) -> str:
+    """Тикер из символа биржи: ETH-USDT-SWAP, ETH_USDT, ETHUSDT_UMCBL → ETH."""
+    s = re.split(r"[-_/]", symbol.upper())[0]
+    for quote in ("USDT", "USDC", "USD"):
+        if s.endswith(quote) and len(s) > len(quote):
+            return s[: -len(quote)]
+    return s
+
+
+def load_tape(path: Path, speed: Optional[float]) -> TickTape:
+    return TickTape(read_ticks(path), speed=speed)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Запускает GUI на записанных тиках вместо сети."""
+    parser = argparse.ArgumentParser(description="Воспроизведение записанных тиков в GUI")
+    parser.add_argument("file", type=Path, help="файл ticks-YYYYMMDD.bin")
+    parser.add_argument("--speed", default="1", help="множитель скорости (1, 10, ...) или max")
+    parser.add_argument("--tokens", default="", help="тикеры через запятую (по умолчанию — все из записи)")
+    parser.add_argument("--market", choices=("perp", "spot"), default=None)
+    parser.add_argument("--duration", type=float, default=0.0, help="выйти через N секунд и вывести статистику")
+    args = parser.parse_args(argv)
+
+    speed = None if args.speed == "max" else float(args.speed)
+    tape = load_tape(args.file, speed)
+    if not tape.venues:
+        sys.exit(f"В {args.file} нет тиков")
+    market = args.market or tape.venues[0][1]
+    tokens = [t.strip().upper() for t in args.tokens.split(",") if t.strip()]
+    if not tokens:
+        tokens = list(dict.fromkeys(base_token(s) for s in tape.symbols(market)))
+
+    import qasync
+    from PyQt6.QtCore import QTimer
+    from PyQt6.QtWidgets import QApplication
+
+    from core.gui.window import MainWindow
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    app = QApplication(sys.argv)
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+
+    # На максимальной скорости опрос идёт так часто, как успевает приложение
+    exchanges = list(dict.fromkeys(exchange for exchange, _ in tape.venues))
+    window = MainWindow(
+        transport=ReplayTransport(tape),
+        exchanges=exchanges,
+        interval=MAX_SPEED_INTERVAL if speed is None else None,
+    )
+    window.market_type_combo.setCurrentText("Futures" if market == "perp" else "Spot")
+    window.token_input.setText(", ".join(tokens[: window.MAX_WATCHLIST]))
+    window.show()
+    QTimer.singleShot(0, window.start_monitoring)
+    started = time.monotonic()
+
+    if args.duration > 0:
+        def report() -> None:
+            elapsed = time.monotonic() - started
+            pump = window.render_pump
+            print(
+                f"за {elapsed:.1f} с: тиков {tape.served}, кадров {pump.frames}, "
+                f"обновлений {pump.total_updates} ({pump.total_updates / elapsed:.0f}/с)"
+            )
+            window.close()
+            app.quit()
+
+        QTimer.singleShot(int(args.duration * 1000), report)
+
+    with loop:
+        loop.run_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# core/scheduler.py
+import asyncio
+import logging
+import time
+from typing import AsyncIterator, Callable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Меньше этого периода тики превращаются в непрерывный опрос бирж
+MIN_PERIOD = 0.1
+
+
+def stagger_groups(names: Sequence[str], slots: int) -> List[List[str]]:
+    """
+    Раскладывает биржи по слотам периода по кругу: биржа i попадает
+    в слот i % slots. Пустых слотов не бывает.
+    """
+    slots = max(1, min(slots, len(names))) if names else 1
+    groups: List[List[str]] = [[] for _ in range(slots)]
+    for i, name in enumerate(names):
+        groups[i % slots].append(name)
+    return groups
+
+
+class FixedRateScheduler:
+    """
+    Планировщик тиков с фиксированной частотой. Моменты тиков считаются
+    от старта по монотонным часам (start + n * step), поэтому время самого
+    опроса не сдвигает расписание и период не «плывёт» вместе с сетью.
+
+    Период делится на `slots` равных шагов: на каждом шаге отдаётся номер
+    слота, что позволяет разнести биржи по периоду. Если тело тика
+    затянулось дольше шага, пропущенные тики не копятся, а отбрасываются:
+    следующим выполняется ближайший по расписанию.
+    """
+
+    def __init__(
+        self,
+        period: float,
+        slots: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.period = max(MIN_PERIOD, period)
+        self.slots = max(1, slots)
+        self.clock = clock
+        # Сколько тиков отброшено из-за отставания
+        self.skipped = 0
+        self._start: Optional[float] = None
+        self._tick = 0
+
+    @property
+    def step(self) -> float:
+        """Расстояние между соседними тиками (слотами) в секундах."""
+        return self.period / self.slots
+
+    def time_to_next(self) -> float:
+        """Сколько секунд осталось до следующего тика по расписанию."""
+        if self._start is None:
+            return self.step
+        return max(0.0, self._start + (self._tick + 1) * self.step - self.clock())
+
+    async def ticks(self) -> AsyncIterator[int]:
+        """
+        Бесконечно отдаёт номер слота очередного тика. Первый тик
+        наступает через один шаг после старта.
+        """
+        self._start = self.clock()
+        self._tick = 1
+        while True:
+            lag = self.clock() - (self._start + self._tick * self.step)
+            if lag < 0:
+                await asyncio.sleep(-lag)
+            elif lag >= self.step:
+                missed = int(lag // self.step)
+                self.skipped += missed
+                self._tick += missed
+                logger.debug(
+                    "Опрос отстал от расписания на %.3f с, пропущено тиков: %d",
+                    lag,
+                    missed,
+                )
+            yield (self._tick - 1) % self.slots
+            self._tick += 1
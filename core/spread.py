@@ -0,0 +1,136 @@
+# core/spread.py
+from dataclasses import dataclass, field
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from core.exchange.base import BookTicker, MarketType
+
+
+class Spread(NamedTuple):
+    """Лучшая пара бирж для токена: где дешевле купить и где дороже продать."""
+
+    buy_venue: str
+    buy_price: float
+    sell_venue: str
+    sell_price: float
+    pct: float
+    bps: float
+
+
+@dataclass
+class _Extreme:
+    """Минимум (lowest=True) или максимум значения по биржам."""
+
+    lowest: bool
+    values: Dict[str, float] = field(default_factory=dict)
+    venue: Optional[str] = None
+
+    def _better(self, a: float, b: float) -> bool:
+        return a < b if self.lowest else a > b
+
+    def set(self, venue: str, value: float) -> None:
+        old = self.values.get(venue)
+        self.values[venue] = value
+        if self.venue == venue:
+            # Держатель края ушёл внутрь — край мог перейти к другой бирже
+            if old is not None and self._better(old, value):
+                self.rescan()
+        elif self.venue is None or self._better(value, self.values[self.venue]):
+            self.venue = venue
+
+    def remove(self, venue: str) -> None:
+        if self.values.pop(venue, None) is not None and venue == self.venue:
+            self.rescan()
+
+    def rescan(self) -> None:
+        if not self.values:
+            self.venue = None
+            return
+        pick = min if self.lowest else max
+        self.venue = pick(self.values, key=self.values.__getitem__)
+
+
+@dataclass
+class _Book:
+    """Цены одного токена на одном рынке."""
+
+    # Купить можно по ask (или по последней цене), продать — по bid
+    buy: _Extreme = field(default_factory=lambda: _Extreme(lowest=True))
+    sell: _Extreme = field(default_factory=lambda: _Extreme(lowest=False))
+    prices: Dict[str, float] = field(default_factory=dict)
+    # Сумма цен, чтобы средняя для базиса считалась за O(1)
+    total: float = 0.0
+
+
+class SpreadBook:
+    """
+    Межбиржевой спред и базис спот/перп, которые пересчитываются
+    инкрементально: каждая новая цена сравнивается только с текущими
+    минимумом и максимумом токена. Полный проход по биржам токена нужен,
+    лишь когда биржа-экстремум сама уходит от края или пропадает,
+    поэтому пары бирж не перебираются ни на одном тике.
+
+    Если у биржи есть стакан (BookTicker), покупка считается по ask,
+    а продажа по bid, иначе обе стороны — по последней цене.
+    """
+
+    def __init__(self):
+        self._books: Dict[Tuple[str, MarketType], _Book] = {}
+
+    def clear(self) -> None:
+        self._books.clear()
+
+    def update(
+        self,
+        token: str,
+        market_type: MarketType,
+        venue: str,
+        price: float,
+        quote: Optional[BookTicker] = None,
+    ) -> None:
+        """Учитывает новую цену (и, если есть, стакан) биржи."""
+        if price <= 0:
+            self.remove(token, market_type, venue)
+            return
+        book = self._books.setdefault((token, market_type), _Book())
+        old = book.prices.get(venue)
+        book.prices[venue] = price
+        book.total += price - (old or 0.0)
+        book.buy.set(venue, quote.ask if quote else price)
+        book.sell.set(venue, quote.bid if quote else price)
+
+    def remove(self, token: str, market_type: MarketType, venue: str) -> None:
+        """Убирает биржу, у которой больше нет цены."""
+        book = self._books.get((token, market_type))
+        if not book or venue not in book.prices:
+            return
+        book.prices.pop(venue)
+        book.total = sum(book.prices.values())
+        book.buy.remove(venue)
+        book.sell.remove(venue)
+
+    def spread(self, token: str, market_type: MarketType) -> Optional[Spread]:
+        """
+        Максимальный спред токена между биржами или None, если бирж меньше
+        двух. По стаканам спред бывает отрицательным — арбитража нет.
+        """
+        book = self._books.get((token, market_type))
+        if not book or len(book.prices) < 2:
+            return None
+        buy = book.buy.values[book.buy.venue]
+        sell = book.sell.values[book.sell.venue]
+        ratio = (sell - buy) / buy
+        return Spread(book.buy.venue, buy, book.sell.venue, sell, ratio * 100.0, ratio * 10_000.0)
+
+    def mean(self, token: str, market_type: MarketType) -> Optional[float]:
+        book = self._books.get((token, market_type))
+        if not book or not book.prices:
+            return None
+        return book.total / len(book.prices)
+
+    def basis(self, token: str) -> Optional[float]:
+        """Базис перп к споту в % по средним ценам бирж (None — нет одного из рынков)."""
+        perp = self.mean(token, "perp")
+        spot = self.mean(token, "spot")
+        if perp is None or not spot:
+            return None
+        return (perp - spot) / spot * 100.0
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.history import SPARK_CHARS, PriceHistory
+
+
+def test_non_positive_first_price_is_ignored():
+    history = PriceHistory()
+    history.add(1.0, 0.0)
+    history.add(2.0, -5.0)
+    assert len(history) == 0
+    assert history.last is None
+    assert history.change(60.0) is None
+    assert history.high(60.0) is None
+    assert history.low(60.0) is None
+    assert history.sparkline() == ""
+
+    history.add(3.0, 10.0)
+    assert len(history) == 1
+    assert history.high(60.0) == history.low(60.0) == 10.0
+
+
+def test_prices_within_resolution_update_last_only():
+    history = PriceHistory(resolution=1.0)
+    history.add(0.0, 10.0)
+    history.add(0.5, 12.0)
+    assert len(history) == 1
+    assert history.last == 12.0
+    # Последняя цена учитывается в максимуме, даже не попав в буфер
+    assert history.high(60.0) == 12.0
+    assert history.low(60.0) == 10.0
+
+
+def test_window_change_high_low():
+    history = PriceHistory(windows=(60.0, 300.0))
+    for t in range(121):
+        history.add(float(t), 100.0 + t)
+    # Окно 60 с: отсчёты 60..120
+    assert history.change(60.0) == pytest.approx((220.0 - 160.0) / 160.0 * 100.0)
+    assert history.high(60.0) == 220.0
+    assert history.low(60.0) == 160.0
+    # Окно 5 минут ещё не заполнено: от самого первого отсчёта
+    assert history.low(300.0) == 100.0
+
+
+def test_window_drops_extremes_that_leave_it():
+    history = PriceHistory(windows=(10.0,))
+    history.add(0.0, 500.0)
+    for t in range(1, 30):
+        history.add(float(t), 100.0)
+    assert history.high(10.0) == 100.0
+
+
+def test_ring_buffer_keeps_capacity():
+    history = PriceHistory(capacity=5, windows=(1000.0,))
+    for t in range(20):
+        history.add(float(t), 1.0 + t)
+    assert len(history) == 5
+    # Перезаписанные отсчёты выпадают из окна
+    assert history.low(1000.0) == 16.0
+    assert history.high(1000.0) == 20.0
+
+
+def test_sparkline():
+    history = PriceHistory(windows=(20.0,), spark_points=4)
+    for t, price in enumerate((1.0, 2.0, 3.0, 4.0)):
+        history.add(t * 5.0, price)
+    assert history.sparkline() == SPARK_CHARS[0] + SPARK_CHARS[2] + SPARK_CHARS[5] + SPARK_CHARS[-1]
+
+    flat = PriceHistory(windows=(20.0,), spark_points=4)
+    for t in range(3):
+        flat.add(t * 5.0, 7.0)
+    assert flat.sparkline() == SPARK_CHARS[(len(SPARK_CHARS) - 1) // 2] * 3
+
+
+def test_history_cells_without_positive_price():
+    pytest.importorskip("PyQt6")
+    from core.gui.window import MainWindow
+
+    # Запись истории, не получившая ни одной положительной цены, не ломает отрисовку
+    window = SimpleNamespace(history_enabled=True, price_history={("binance", "ETHUSDT"): PriceHistory()})
+    window.price_history[("binance", "ETHUSDT")].add(1.0, 0.0)
+    assert MainWindow._history_cells(window, "ETH", "binance", ("ETHUSDT", 0.0, "")) == ("", "", None)
@@ -0,0 +1,48 @@
+import asyncio
+
+import httpx
+
+from core.exchange.metrics import MetricsRegistry
+from core.exchange.okx import OkxClient
+from core.exchange.transport import TransportPolicy
+
+
+def test_categories_keep_market():
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={"data": []}))
+    client = OkxClient(httpx.AsyncClient(transport=transport), TransportPolicy(rate_limits=False))
+    client.metrics = MetricsRegistry()
+
+    async def scenario():
+        await client.get_all_spot_prices()
+        await client.get_all_futures_prices()
+        await client.get_all_book_tickers("perp")
+        await client.get_book_ticker("BTC-USDT-SWAP", "perp")
+        await client.get_book_ticker("ETH-USDT-SWAP", "perp")
+        await client.http_client.aclose()
+
+    asyncio.run(scenario())
+    categories = {category: stats.requests for (_, category), stats in client.metrics.items()}
+    # SPOT и SWAP не сливаются, а символы не дробят категорию
+    assert categories == {
+        "spot all prices": 1,
+        "perp all prices": 1,
+        "perp all books": 1,
+        "perp book": 2,
+    }
+
+
+def test_registry_summary_and_prometheus():
+    registry = MetricsRegistry()
+    registry.observe("okx", "perp price", 0, 0.02, status=200, size=100)
+    registry.observe("okx", "perp price", 1, 0.2, error="ReadTimeout")
+    registry.skip("okx", "spot price")
+    registry.throttle("okx", "perp price", 0.5)
+
+    summary = registry.by_exchange()["okx"]
+    assert (summary.requests, summary.retries, summary.skipped, summary.throttled) == (2, 1, 1, 1)
+    assert summary.failures == 1
+    assert 0.01 <= summary.latency["total"].quantile(0.5) <= 0.025
+
+    text = registry.render_prometheus()
+    assert 'trade_helper_requests_total{exchange="okx",category="perp price"} 2' in text
+    assert 'trade_helper_errors_total{exchange="okx",category="perp price",error="ReadTimeout"} 1' in text
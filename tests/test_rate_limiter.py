@@ -0,0 +1,129 @@
+import asyncio
+
+import httpx
+
+from core.exchange.binance import BinanceClient
+from core.exchange.transport import (
+    PRIORITY_BACKGROUND,
+    HostLimiters,
+    RateLimiter,
+    TransportPolicy,
+    limiter_for_host,
+)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_burst_passes_without_waiting():
+    limiter = RateLimiter(10.0, burst=3)
+
+    async def scenario():
+        return await asyncio.gather(*(limiter.acquire() for _ in range(3)))
+
+    assert run(scenario()) == [0.0, 0.0, 0.0]
+
+
+def test_waits_when_bucket_is_empty():
+    limiter = RateLimiter(100.0, burst=2)
+
+    async def scenario():
+        await limiter.acquire(weight=2)
+        return await limiter.acquire()
+
+    assert run(scenario()) > 0
+
+
+def test_weight_is_charged_and_capped_by_burst():
+    limiter = RateLimiter(1.0, burst=5)
+    run(limiter.acquire(weight=4))
+    assert limiter.tokens < 1.5
+    # Вес больше бакета не должен ждать вечно
+    fresh = RateLimiter(1000.0, burst=5)
+    assert run(fresh.acquire(weight=50)) == 0.0
+
+
+def test_background_keeps_reserve_for_live():
+    limiter = RateLimiter(100.0, burst=4)
+
+    async def scenario():
+        assert await limiter.acquire(PRIORITY_BACKGROUND) == 0.0
+        assert await limiter.acquire(PRIORITY_BACKGROUND) == 0.0
+        # Оставшаяся половина бакета — только для живых тиков
+        tokens = limiter.tokens
+        assert await limiter.acquire() == 0.0
+        assert limiter.tokens < tokens
+        return await limiter.acquire(PRIORITY_BACKGROUND)
+
+    assert run(scenario()) > 0
+
+
+def test_429_pauses_host_for_retry_after():
+    limiter = RateLimiter(10.0)
+    limiter.observe(429, httpx.Headers({"Retry-After": "0.05"}))
+    assert limiter.tokens == 0.0
+    assert limiter.rate == 5.0
+    assert run(limiter.acquire()) >= 0.05
+
+
+def test_used_weight_header_slows_down_and_recovers():
+    limiter = RateLimiter(20.0, weight_limit=1000)
+    limiter.observe(200, httpx.Headers({"X-MBX-USED-WEIGHT-1M": "900"}))
+    assert limiter.usage == 0.9
+    assert limiter.rate == 10.0
+    # Повторное превышение в пределах ADJUST_INTERVAL темп не трогает
+    limiter.observe(200, httpx.Headers({"X-MBX-USED-WEIGHT-1M": "950"}))
+    assert limiter.rate == 10.0
+    limiter.observe(200, httpx.Headers({"X-MBX-USED-WEIGHT-1M": "100"}))
+    assert limiter.rate == 12.0
+
+
+def test_remaining_headers_and_garbage():
+    limiter = RateLimiter(10.0)
+    limiter.observe(200, httpx.Headers({"X-RateLimit-Remaining": "1", "X-RateLimit-Limit": "10"}))
+    assert limiter.usage == 0.9
+    limiter.observe(200, httpx.Headers({"X-RateLimit-Remaining": "n/a", "X-RateLimit-Limit": "10"}))
+    assert limiter.usage == 0.9
+
+
+def test_host_limiters_pool():
+    pool = HostLimiters()
+    spot = pool.get("https://api.binance.com/api/v3/ticker/price")
+    assert spot is pool.get("https://api.binance.com/api/v3/ping")
+    assert spot is not HostLimiters().get("https://api.binance.com/api/v3/ping")
+    assert spot.weight_limit == 6000
+    assert pool.get("https://example.com/").rate == limiter_for_host("example.com").rate
+
+
+def binance_client(status: int, headers: dict) -> BinanceClient:
+    transport = httpx.MockTransport(lambda request: httpx.Response(status, headers=headers, json={}))
+    return BinanceClient(httpx.AsyncClient(transport=transport), TransportPolicy(retries=0), HostLimiters())
+
+
+def test_throttled_response_counts_as_breaker_failure():
+    client = binance_client(429, {"Retry-After": "0"})
+    client.breaker.failures = 1
+
+    async def scenario():
+        resp = await client._request(
+            "GET", client.FUT_API, request_name="binance fut all prices", category="perp all prices"
+        )
+        await client.http_client.aclose()
+        return resp
+
+    assert run(scenario()).status_code == 429
+    # 429 не сбрасывает счётчик неудач, а увеличивает его
+    assert client.breaker.failures == 2
+
+
+def test_warm_up_feeds_limiter_headers():
+    client = binance_client(200, {"X-MBX-USED-WEIGHT-1M": "600"})
+
+    async def scenario():
+        await client.warm_up()
+        await client.http_client.aclose()
+
+    run(scenario())
+    assert client.limiters.get(client.SPOT_API).usage == 0.1
+    assert client.limiters.get(client.FUT_API).usage == 0.25
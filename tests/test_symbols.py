@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+from core.exchange import symbols as symbols_module
+from core.exchange.symbols import SymbolCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(symbols_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_found_and_missing_ttl(clock):
+    cache = SymbolCache()
+    cache.put(" eth ", "perp", "binance", "ETHUSDT", "https://binance/eth")
+    cache.put_missing("ETH", "perp", "okx")
+
+    entry = cache.get("ETH", "perp", "binance")
+    assert entry.symbol == "ETHUSDT" and entry.url == "https://binance/eth"
+    # Отрицательный ответ — запись с symbol=None, а не отсутствие записи
+    assert cache.get("eth", "perp", "okx").symbol is None
+    assert cache.get("ETH", "spot", "binance") is None
+
+    clock[0] += SymbolCache.MISSING_TTL + 1
+    assert cache.get("ETH", "perp", "okx") is None
+    assert cache.get("ETH", "perp", "binance") is not None
+
+    clock[0] += SymbolCache.FOUND_TTL
+    assert cache.get("ETH", "perp", "binance") is None
+
+
+def test_put_replaces_missing_and_forget(clock):
+    cache = SymbolCache()
+    cache.put_missing("SOL", "spot", "gate")
+    cache.put("SOL", "spot", "gate", "SOL_USDT", "u")
+    assert cache.get("SOL", "spot", "gate").symbol == "SOL_USDT"
+    cache.forget("SOL", "spot", "gate")
+    assert cache.get("SOL", "spot", "gate") is None
+
+
+def test_save_and_load_round_trip(clock, tmp_path):
+    path = tmp_path / "data" / "symbols.json"
+    cache = SymbolCache(path)
+    cache.put("ETH", "perp", "binance", "ETHUSDT", "u1")
+    cache.put_missing("ETH", "spot", "okx")
+    cache.save()
+    assert not path.with_suffix(".json.tmp").exists()
+
+    loaded = SymbolCache(path)
+    loaded.load()
+    assert loaded.get("ETH", "perp", "binance") == cache.get("ETH", "perp", "binance")
+    assert loaded.get("ETH", "spot", "okx").symbol is None
+
+
+def test_expired_entries_are_not_saved(clock, tmp_path):
+    path = tmp_path / "symbols.json"
+    cache = SymbolCache(path)
+    cache.put_missing("ETH", "perp", "okx")
+    clock[0] += SymbolCache.MISSING_TTL + 1
+    cache.put("ETH", "perp", "binance", "ETHUSDT", "u")
+    cache.save()
+    saved = json.loads(path.read_text(encoding="utf-8"))["symbols"]
+    assert list(saved) == ["ETH:perp:binance"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    ["{", "[]", json.dumps({"version": SymbolCache.FILE_VERSION + 1, "symbols": {"ETH:perp:okx": {}}})],
+)
+def test_broken_or_foreign_file_is_ignored(clock, tmp_path, content):
+    path = tmp_path / "symbols.json"
+    path.write_text(content, encoding="utf-8")
+    cache = SymbolCache(path)
+    cache.load()
+    assert cache.get("ETH", "perp", "okx") is None
+
+
+def test_bad_entries_are_skipped(clock, tmp_path):
+    path = tmp_path / "symbols.json"
+    path.write_text(
+        json.dumps(
+            {
+                "version": SymbolCache.FILE_VERSION,
+                "symbols": {
+                    "ETH:perp:okx": {"symbol": "ETH-USDT-SWAP", "url": "u", "updated": clock[0]},
+                    "BTC:perp:okx": {"symbol": "BTC-USDT-SWAP"},
+                },
+            }
+        ),
+        encoding="utf-8",
+    )
+    cache = SymbolCache(path)
+    cache.load()
+    assert cache.get("ETH", "perp", "okx").symbol == "ETH-USDT-SWAP"
+    assert cache.get("BTC", "perp", "okx") is None
+
+
+def test_without_path_nothing_is_written(tmp_path):
+    cache = SymbolCache()
+    cache.put("ETH", "perp", "binance", "ETHUSDT", "u")
+    cache.save()
+    cache.load()
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core.exchange.transport import CircuitBreaker
+from core.monitor import DEADLINE_ERROR, Monitor
+
+
+def fake_client(name: str, price: float, delay: float = 0.0):
+    async def get_prices_for_symbols(symbols, market_type):
+        await asyncio.sleep(delay)
+        return {symbol: price for symbol in symbols}
+
+    return SimpleNamespace(
+        name=name,
+        breaker=CircuitBreaker(3, 30.0),
+        get_prices_for_symbols=get_prices_for_symbols,
+    )
+
+
+def test_straggler_result_is_delivered_on_foreign_slot():
+    watchlist = {"ETH": {"slow": "ETH-SLOW", "fast": "ETH-FAST"}}
+    mon = Monitor(clients=[fake_client("slow", 1.0, delay=0.05), fake_client("fast", 2.0)])
+
+    async def scenario():
+        # Слот медленной биржи: она не успевает к дедлайну шага
+        first = await mon.fetch_prices_for_watchlist(
+            watchlist, "perp", exclude_exchanges={"fast"}, deadline=0.01
+        )
+        await asyncio.sleep(0.1)
+        # Слот другой биржи: перенесённый ответ приходит, хотя «slow» исключена
+        second = await mon.fetch_prices_for_watchlist(
+            watchlist, "perp", exclude_exchanges={"slow"}, deadline=0.01
+        )
+        return first, second
+
+    (prices1, errors1), (prices2, errors2) = asyncio.run(scenario())
+    assert prices1 == {}
+    assert errors1["ETH"]["slow"] == DEADLINE_ERROR
+    assert prices2 == {"ETH": {"slow": 1.0, "fast": 2.0}}
+    assert mon.stragglers == set()
+    assert mon.price_age("ETH", "slow") is not None
+
+
+def window_stub(known_symbols):
+    stored, dropped = {}, []
+    window = SimpleNamespace(
+        known_symbols=known_symbols,
+        urls_map={token: {name: "" for name in symbols} for token, symbols in known_symbols.items()},
+        latest_errors={},
+        _store_price=lambda token, name, payload, quote=None: stored.__setitem__((token, name), payload[1]),
+        _drop_price=lambda token, name: dropped.append((token, name)),
+    )
+    return window, stored, dropped
+
+
+def test_apply_tick_prices_keeps_prices_of_skipped_exchanges():
+    pytest.importorskip("PyQt6")
+    from core.gui.window import MainWindow
+
+    window, stored, dropped = window_stub(
+        {"ETH": {"slow": "ETH-SLOW", "fast": "ETH-FAST", "late": "ETH-LATE", "idle": "ETH-IDLE"}}
+    )
+    window.latest_errors = {"ETH": {"slow": DEADLINE_ERROR, "late": DEADLINE_ERROR}}
+    MainWindow._apply_tick_prices(
+        window,
+        {"ETH": {"slow": 1.0}},
+        skip={"slow", "idle"},
+        live=set(),
+        stragglers={"late"},
+        book_mode=False,
+    )
+    # Перенесённая цена биржи чужого слота применяется и снимает отметку устаревания
+    assert stored == {("ETH", "slow"): 1.0}
+    assert window.latest_errors == {"ETH": {"late": DEADLINE_ERROR}}
+    # Цену теряет только опрошенная и ответившая без неё биржа
+    assert dropped == [("ETH", "fast")]
+
+
+def test_apply_tick_prices_ignores_live_stream_symbols():
+    pytest.importorskip("PyQt6")
+    from core.gui.window import MainWindow
+
+    window, stored, dropped = window_stub({"ETH": {"binance": "ETHUSDT"}})
+    MainWindow._apply_tick_prices(
+        window,
+        {"ETH": {"binance": 5.0}},
+        skip=set(),
+        live={("binance", "ETHUSDT")},
+        stragglers=set(),
+        book_mode=False,
+    )
+    assert stored == {} and dropped == []